@@ -0,0 +1,125 @@
+import asyncio
+import contextlib
+import html
+import json
+import logging
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot
+
+# Ліміт Telegram на довжину повідомлення — 4096 символів, лишаємо запас
+DIGEST_MAX_CHARS = 3800
+
+
+class AdminAuditLog:
+    """
+    Буфер журналу команд для адмін-чату.
+
+    Замість окремого повідомлення на кожну команду накопичує записи і раз на
+    flush_interval_sec (або щойно набралось max_entries) надсилає один дайджест.
+    Сирі записи дописуються у JSONL-файл (лише append) для подальшого аналізу.
+    """
+
+    def __init__(
+        self,
+        chat_id: int,
+        path: Path | None,
+        flush_interval_sec: float = 60.0,
+        max_entries: int = 50,
+    ) -> None:
+        self.chat_id = chat_id
+        self.path = path
+        self.flush_interval_sec = flush_interval_sec
+        self.max_entries = max_entries
+        self._entries: list[dict[str, Any]] = []
+        self._bot: Bot | None = None
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+        # метрики
+        self.recorded_total = 0
+        self.digests_sent = 0
+
+    def start(self, bot: Bot) -> None:
+        self._bot = bot
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    def record(self, command: str, chat_id: int, user_id: int | None, username: str | None, thread_id: int | None) -> None:
+        self._entries.append({
+            "ts": round(time.time(), 3),
+            "command": command,
+            "chat_id": chat_id,
+            "thread_id": thread_id,
+            "user_id": user_id,
+            "username": username,
+        })
+        self.recorded_total += 1
+        if len(self._entries) >= self.max_entries:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_sec)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("Admin audit flush error")
+
+    async def flush(self) -> None:
+        if not self._entries:
+            return
+        entries, self._entries = self._entries, []
+        if self.path is not None:
+            try:
+                await asyncio.to_thread(self._append, entries)
+            except OSError:
+                logging.exception("Не вдалося дописати журнал команд %s", self.path)
+        if self._bot is None or not self.chat_id:
+            return
+        try:
+            await self._bot.send_message(self.chat_id, format_digest(entries), disable_notification=True)
+            self.digests_sent += 1
+        except Exception as e:
+            logging.error("Failed to send audit digest: %s", e)
+
+    def _append(self, entries: list[dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+
+
+def format_digest(entries: list[dict[str, Any]]) -> str:
+    span = max(0, int(entries[-1]["ts"] - entries[0]["ts"]))
+    commands = Counter(entry["command"] for entry in entries)
+    lines = [
+        f"📮 Команди: {len(entries)} за {span} с",
+        ", ".join(f"/{command} — {count}" for command, count in commands.most_common()),
+        "",
+    ]
+    by_place: dict[tuple[int, int | None], list[dict[str, Any]]] = {}
+    for entry in entries:
+        by_place.setdefault((entry["chat_id"], entry["thread_id"]), []).append(entry)
+    for (chat_id, thread_id), place_entries in sorted(by_place.items(), key=lambda item: -len(item[1])):
+        place = f"chat={chat_id}" + (f", thread={thread_id}" if thread_id is not None else "")
+        users = list(dict.fromkeys(entry["username"] or str(entry["user_id"]) for entry in place_entries))
+        users_label = ", ".join(users[:5]) + (f" +{len(users) - 5}" if len(users) > 5 else "")
+        # Бот шле повідомлення з parse_mode=HTML, а імена користувачів довільні
+        lines.append(f"• {place}: {len(place_entries)} ({html.escape(users_label)})")
+    text = "\n".join(lines)
+    if len(text) > DIGEST_MAX_CHARS:
+        text = text[:DIGEST_MAX_CHARS].rsplit("\n", 1)[0] + "\n…"
+    return text
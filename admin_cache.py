@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+from aiogram import Bot
+from aiogram.types import ChatMemberUpdated
+
+ADMIN_STATUSES = frozenset({"creator", "administrator"})
+
+
+class ChatAdminCache:
+    """
+    Кеш адміністраторів чатів для модерації silent-чатів.
+
+    Список адмінів чату завантажується одним викликом get_chat_administrators,
+    далі підтримується оновленнями chat_member, а раз на ttl_sec перечитується
+    повністю (на випадок пропущених оновлень). У сталому режимі перевірка
+    «чи адмін» — це пошук у множині без звернень до Telegram API.
+    """
+
+    def __init__(self, ttl_sec: float = 3600.0) -> None:
+        self.ttl_sec = ttl_sec
+        self._admins: dict[int, frozenset[int]] = {}
+        self._loaded_at: dict[int, float] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+        # метрики
+        self.hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.member_updates = 0
+
+    async def is_admin(self, bot: Bot, chat_id: int, user_id: int) -> bool:
+        admins = self._admins.get(chat_id)
+        if admins is None or time.monotonic() - self._loaded_at.get(chat_id, 0.0) > self.ttl_sec:
+            admins = await self._refresh(bot, chat_id)
+        else:
+            self.hits += 1
+        return user_id in admins
+
+    async def warm(self, bot: Bot, chat_ids: set[int]) -> None:
+        """Завантажує списки адмінів наперед (при старті), щоб перше повідомлення не чекало на API."""
+        for chat_id in chat_ids:
+            await self._refresh(bot, chat_id)
+
+    async def _refresh(self, bot: Bot, chat_id: int) -> frozenset[int]:
+        lock = self._locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            # Поки чекали на лок, список міг оновити інший запит
+            if time.monotonic() - self._loaded_at.get(chat_id, float("-inf")) <= self.ttl_sec:
+                return self._admins[chat_id]
+            try:
+                members = await bot.get_chat_administrators(chat_id)
+            except Exception as error:
+                self.refresh_errors += 1
+                logging.warning("get_chat_administrators failed (%s): %s", chat_id, error)
+                # Лишаємо попередній список (якщо був); повторимо не раніше ніж через хвилину
+                stale = self._admins.get(chat_id, frozenset())
+                self._admins[chat_id] = stale
+                self._loaded_at[chat_id] = time.monotonic() - max(0.0, self.ttl_sec - 60.0)
+                return stale
+            admins = frozenset(member.user.id for member in members)
+            self._admins[chat_id] = admins
+            self._loaded_at[chat_id] = time.monotonic()
+            self.refreshes += 1
+            return admins
+
+    def apply_member_update(self, update: ChatMemberUpdated) -> None:
+        """Оновлює кеш з chat_member-події (призначення/зняття адміна, вихід з чату)."""
+        admins = self._admins.get(update.chat.id)
+        if admins is None:
+            return
+        self.member_updates += 1
+        user_id = update.new_chat_member.user.id
+        if update.new_chat_member.status in ADMIN_STATUSES:
+            self._admins[update.chat.id] = admins | {user_id}
+        else:
+            self._admins[update.chat.id] = admins - {user_id}
+
+    def invalidate(self, chat_id: int) -> None:
+        self._admins.pop(chat_id, None)
+        self._loaded_at.pop(chat_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "chats": len(self._admins),
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "member_updates": self.member_updates,
+        }
@@ -8,23 +8,43 @@ import time
 import tempfile
 import contextlib
 import json
-import urllib.request
-import urllib.error
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
+from urllib.parse import urlsplit
 from zoneinfo import ZoneInfo
 from typing import Any, Final, Literal
 
 from aiogram import Bot, Dispatcher, Router, types
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.types import Message
 from aiogram.filters import Command, CommandObject
 
 from dotenv import load_dotenv
 from udp_listener import UDPListener
 from yasno_outages import YasnoOutages
+from circuit_breaker import CircuitBreaker
 from storage import db
+from web_outbox import WebOutboxWorker
+from event_channel import EventChannelServer
+from power_debounce import PowerDebouncer, PowerTransition
+from status_snapshot import StatusSnapshotWriter
+from status_api import StatusApiServer, day_info_to_json
+from timeline_renderer import BASE_WIDTH as NATIVE_TIMELINE_WIDTH, RENDERER_VERSION, render_snake_timeline
+from screenshot_cache import ScreenshotCache
+from schedule_message_cache import ScheduleMessageCache
+from image_output import compact_png, make_thumbnail
+from admin_cache import ChatAdminCache
+from admin_audit import AdminAuditLog
+from loop_watchdog import LoopLagMonitor
+from tracing import Trace, Tracer
+from clock import Clock
+from recording import EventRecorder
+from command_throttle import CommandThrottleMiddleware, RequestCoalescer, parse_rate
+from webhook import ConcurrencyLimitMiddleware, run_webhook
+from metrics import FANOUT_SECONDS, LOOP_ITERATION_SECONDS, REGISTRY, SCREENSHOT_SECONDS, MetricsServer
 
 
 
@@ -34,6 +54,17 @@ load_dotenv()  # підтягуємо .env із поточної директо
 YASNO_GROUP = os.getenv("YASNO_GROUP", "6.2")
 
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
+# Webhook-режим: публічна адреса (за проксі з TLS); порожньо — long polling
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").strip()
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "").strip() or (urlsplit(WEBHOOK_URL).path or "/telegram/webhook")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+# Скільки оновлень обробляється одночасно (і в polling, і у webhook-режимі)
+BOT_UPDATE_CONCURRENCY = int(os.getenv("BOT_UPDATE_CONCURRENCY", "32"))
+# Альтернативний Bot API сервер (локальний telegram-bot-api або scripts/fake_telegram_server.py)
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "").strip()
 ADMIN_LOG_CHAT_ID = int(os.getenv("ADMIN_LOG_CHAT_ID", "396952666"))
 def _parse_chat_targets_env(raw: str | None) -> tuple[tuple[int, int | None], ...]:
     if not raw:
@@ -57,16 +88,77 @@ def _parse_chat_targets_env(raw: str | None) -> tuple[tuple[int, int | None], ..
 ALERT_CHAT_TARGETS: Final[tuple[tuple[int, int | None], ...]] = _parse_chat_targets_env(os.getenv("ALERT_CHAT_ID"))
 BLOCKED_CHAT_TARGETS: Final[tuple[tuple[int, int | None], ...]] = _parse_chat_targets_env(os.getenv("BLOCK_ALERT_CHAT_ID"))
 SILENT_CHAT_TARGETS: Final[tuple[tuple[int, int | None], ...]] = _parse_chat_targets_env(os.getenv("SILENT_CHAT_ID"))
+# Ціль без thread_id збігається лише з повідомленнями поза топіками, тож достатньо точного пошуку пари
+BLOCKED_CHAT_SET: Final[frozenset[tuple[int, int | None]]] = frozenset(BLOCKED_CHAT_TARGETS)
+SILENT_CHAT_SET: Final[frozenset[tuple[int, int | None]]] = frozenset(SILENT_CHAT_TARGETS)
+ADMIN_CACHE_TTL_SEC = float(os.getenv("ADMIN_CACHE_TTL_SEC", "3600"))
+# Журнал команд: дайджест в адмін-чат раз на N секунд або M записів, сирі записи — у JSONL
+ADMIN_AUDIT_FLUSH_SEC = float(os.getenv("ADMIN_AUDIT_FLUSH_SEC", "60"))
+ADMIN_AUDIT_MAX_ENTRIES = int(os.getenv("ADMIN_AUDIT_MAX_ENTRIES", "50"))
+ADMIN_AUDIT_LOG_PATH = os.getenv("ADMIN_AUDIT_LOG_PATH", str(Path("data") / "command_audit.jsonl"))
+# Однакові /status, /today, /tomorrow у межах цього вікна отримують одну обчислену відповідь
+COMMAND_COALESCE_SEC = float(os.getenv("COMMAND_COALESCE_SEC", "3"))
+# Ліміти команд у форматі "кількість/секунди"; понад ліміт — остання готова відповідь
+COMMAND_RATE_USER = parse_rate(os.getenv("COMMAND_RATE_USER", "3/30"), (3, 0.1))
+COMMAND_RATE_CHAT = parse_rate(os.getenv("COMMAND_RATE_CHAT", "10/20"), (10, 0.5))
+# Старішу готову відповідь понад ліміт не надсилаємо зовсім
+COMMAND_THROTTLED_ANSWER_MAX_AGE_SEC = COMMAND_COALESCE_SEC * 5
 UDP_PORT = int(os.getenv("UDP_PORT", "5005"))
 DEFAULT_THRESHOLD_SEC = float(os.getenv("THRESHOLD_SEC", "6"))
-SCHEDULE_POLL_INTERVAL_SEC = 60
+POWER_SETTLE_SEC = float(os.getenv("POWER_SETTLE_SEC", "10"))
+POWER_FLAP_WINDOW_SEC = float(os.getenv("POWER_FLAP_WINDOW_SEC", "900"))
+POWER_FLAP_THRESHOLD = int(os.getenv("POWER_FLAP_THRESHOLD", "4"))
+POWER_FLAP_SETTLE_SEC = float(os.getenv("POWER_FLAP_SETTLE_SEC", "180"))
+SCHEDULE_POLL_INTERVAL_SEC = int(os.getenv("SCHEDULE_POLL_INTERVAL_SEC", "60"))
+# Базова адреса API Yasno (для локальних стендів і навантажувальних тестів)
+YASNO_API_BASE = os.getenv("YASNO_API_BASE", "https://app.yasno.ua").rstrip("/")
+# Запобіжник Yasno: після стількох помилок поспіль запити призупиняються на YASNO_BREAKER_RESET_SEC
+YASNO_BREAKER_FAILURES = int(os.getenv("YASNO_BREAKER_FAILURES", "3"))
+YASNO_BREAKER_RESET_SEC = float(os.getenv("YASNO_BREAKER_RESET_SEC", "60"))
+# Скільки команда чекає на Yasno, коли в пам'яті ще немає жодної відповіді (далі — графік з БД)
+YASNO_WAIT_SEC = float(os.getenv("YASNO_WAIT_SEC", "3"))
 WEB_NOTIFY_URL = os.getenv("WEB_NOTIFY_URL", "http://127.0.0.1:3000/api/notify")
 NOTIFY_BOT_TOKEN = os.getenv("NOTIFY_BOT_TOKEN", "")
+WEB_OUTBOX_MAX_BACKOFF_SEC = float(os.getenv("WEB_OUTBOX_MAX_BACKOFF_SEC", "300"))
+WEB_OUTBOX_MAX_AGE_SEC = float(os.getenv("WEB_OUTBOX_MAX_AGE_SEC", str(6 * 3600)))
+# "http" — POST на WEB_NOTIFY_URL; "channel" — постійний NDJSON-канал, на який підписується веб-додаток
+WEB_EVENT_TRANSPORT = os.getenv("WEB_EVENT_TRANSPORT", "http").strip().lower()
+EVENT_CHANNEL_SOCKET = os.getenv("EVENT_CHANNEL_SOCKET", "")
+EVENT_CHANNEL_PORT = int(os.getenv("EVENT_CHANNEL_PORT", "0"))
+STATUS_API_HOST = os.getenv("STATUS_API_HOST", "127.0.0.1")
+# Prometheus-метрики (GET /metrics); 0 — вимкнено
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Трасування сповіщень про світло (етапи від останнього UDP-пакета до доставки), JSONL; порожнє — вимкнено
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", str(Path("data") / "traces.jsonl"))
+# Запис вхідних подій (відповіді Yasno, UDP-пакети) для scripts/replay_recording.py; порожнє — вимкнено
+RECORD_PATH = os.getenv("RECORD_PATH", "")
+# Детектор лагу циклу asyncio: період вимірювання і поріг, після якого логуємо стек блокуючого коду; 0 — вимкнено
+LOOP_LAG_INTERVAL_SEC = float(os.getenv("LOOP_LAG_INTERVAL_SEC", "0.5"))
+LOOP_LAG_THRESHOLD_SEC = float(os.getenv("LOOP_LAG_THRESHOLD_SEC", "0.25"))
+STATUS_API_PORT = int(os.getenv("STATUS_API_PORT", "0"))
+STATUS_SNAPSHOT_PATH = os.getenv("STATUS_SNAPSHOT_PATH", str(Path("data") / "status.bin"))
 DEFAULT_SCREENSHOT_SCRIPT = Path(__file__).with_name("scripts").joinpath("render_timeline_screenshot.py")
 TIMELINE_SCREENSHOT_SCRIPT = Path(os.getenv("TIMELINE_SCREENSHOT_SCRIPT", str(DEFAULT_SCREENSHOT_SCRIPT)))
 TIMELINE_SCREENSHOT_BASE_URL = os.getenv("TIMELINE_SCREENSHOT_BASE_URL", "http://127.0.0.1:3000")
 TIMELINE_SCREENSHOT_ENABLED = os.getenv("TIMELINE_SCREENSHOT_ENABLED", "1").strip().lower() not in {"0", "false", "no"}
 TIMELINE_SCREENSHOT_PYTHON = os.getenv("TIMELINE_SCREENSHOT_PYTHON") or sys.executable
+# Адреса постійного воркера рендеру (scripts/timeline_render_worker.py): "host:port" або шлях до Unix-сокета
+TIMELINE_RENDER_WORKER = os.getenv("TIMELINE_RENDER_WORKER", "").strip()
+TIMELINE_RENDER_WORKER_TIMEOUT_SEC = float(os.getenv("TIMELINE_RENDER_WORKER_TIMEOUT_SEC", "20"))
+# "native" — малювати таймлайн у процесі бота (Pillow), "playwright" — через воркер/скрипт з браузером
+TIMELINE_SCREENSHOT_BACKEND = os.getenv("TIMELINE_SCREENSHOT_BACKEND", "playwright").strip().lower()
+SCREENSHOT_CACHE_DIR = os.getenv("SCREENSHOT_CACHE_DIR", str(Path("data") / "screenshots"))
+SCREENSHOT_CACHE_MAX_MB = float(os.getenv("SCREENSHOT_CACHE_MAX_MB", "64"))
+# Скріншот «сьогодні» містить лінію поточного часу, тож кешуємо його лише в межах цього вікна
+SCREENSHOT_CACHE_TODAY_TTL_SEC = int(os.getenv("SCREENSHOT_CACHE_TODAY_TTL_SEC", "600"))
+# Бюджети розміру зображень: скріншот для Telegram (палітровий PNG) і WebP-мініатюра для push
+SCREENSHOT_BYTE_BUDGET_KB = float(os.getenv("SCREENSHOT_BYTE_BUDGET_KB", "120"))
+SCREENSHOT_THUMBNAIL_DIR = os.getenv("SCREENSHOT_THUMBNAIL_DIR", str(Path("data") / "thumbnails"))
+SCREENSHOT_THUMBNAIL_WIDTH = int(os.getenv("SCREENSHOT_THUMBNAIL_WIDTH", "360"))
+SCREENSHOT_THUMBNAIL_BUDGET_KB = float(os.getenv("SCREENSHOT_THUMBNAIL_BUDGET_KB", "24"))
+# Скільки сповіщення про графік чекає на попередньо запущений рендер, перш ніж піти без картинки
+SCREENSHOT_ATTACH_TIMEOUT_SEC = float(os.getenv("SCREENSHOT_ATTACH_TIMEOUT_SEC", "15"))
 
 TZ = ZoneInfo("Europe/Kyiv")
 SCHEDULE_URL: Final[str] = "https://svitlo4u.online"
@@ -95,11 +187,64 @@ def _sanitize_web_payload(obj: Any) -> Any:
 
 # ───────────────── глобальний стан ─────────────────
 router = Router()
+# Час фонових циклів; replay підміняє його (разом з listener.clock) на VirtualClock
+clock = Clock()
 listener = UDPListener(port=UDP_PORT)
-yasno = YasnoOutages(region_id=25, dso_id=902, group_id=YASNO_GROUP)
+yasno = YasnoOutages(
+    region_id=25,
+    dso_id=902,
+    group_id=YASNO_GROUP,
+    api_base=YASNO_API_BASE,
+    fresh_sec=SCHEDULE_POLL_INTERVAL_SEC,
+    breaker=CircuitBreaker(YASNO_BREAKER_FAILURES, YASNO_BREAKER_RESET_SEC),
+)
+web_outbox: WebOutboxWorker | None = (
+    WebOutboxWorker(
+        db,
+        WEB_NOTIFY_URL,
+        NOTIFY_BOT_TOKEN,
+        max_backoff_sec=WEB_OUTBOX_MAX_BACKOFF_SEC,
+        max_age_sec=WEB_OUTBOX_MAX_AGE_SEC,
+    )
+    if WEB_EVENT_TRANSPORT == "http" and WEB_NOTIFY_URL and NOTIFY_BOT_TOKEN
+    else None
+)
+event_channel: EventChannelServer | None = (
+    EventChannelServer(
+        db,
+        NOTIFY_BOT_TOKEN,
+        socket_path=Path(EVENT_CHANNEL_SOCKET) if EVENT_CHANNEL_SOCKET else None,
+        port=EVENT_CHANNEL_PORT or None,
+        max_age_sec=WEB_OUTBOX_MAX_AGE_SEC,
+    )
+    if WEB_EVENT_TRANSPORT == "channel" and NOTIFY_BOT_TOKEN and (EVENT_CHANNEL_SOCKET or EVENT_CHANNEL_PORT)
+    else None
+)
+status_api: StatusApiServer | None = (
+    StatusApiServer(STATUS_API_HOST, STATUS_API_PORT, token=NOTIFY_BOT_TOKEN) if STATUS_API_PORT else None
+)
+status_snapshot: StatusSnapshotWriter | None = (
+    StatusSnapshotWriter(Path(STATUS_SNAPSHOT_PATH)) if STATUS_SNAPSHOT_PATH else None
+)
+screenshot_cache: ScreenshotCache | None = (
+    ScreenshotCache(Path(SCREENSHOT_CACHE_DIR), max_bytes=int(SCREENSHOT_CACHE_MAX_MB * 1024 * 1024))
+    if SCREENSHOT_CACHE_DIR and SCREENSHOT_CACHE_MAX_MB > 0
+    else None
+)
+power_debouncer = PowerDebouncer(
+    settle_sec=POWER_SETTLE_SEC,
+    flap_window_sec=POWER_FLAP_WINDOW_SEC,
+    flap_threshold=POWER_FLAP_THRESHOLD,
+    flap_settle_sec=POWER_FLAP_SETTLE_SEC,
+)
 
 threshold_sec = DEFAULT_THRESHOLD_SEC
 startup_ts = 0.0
+# Останній UDP-пакет перед рестартом (зі збереженого стану моніторів): якщо після старту
+# пакетів так і немає, відключення почалося не пізніше за нього, а не в момент старту
+restored_last_packet_ts = 0.0
+# Як часто зберігати час останнього пакета (сек) — межа похибки початку відключення після падіння
+LAST_PACKET_CHECKPOINT_SEC = 10.0
 last_today_signature: tuple | None = None
 last_tomorrow_status: str | None = None
 last_today_date = None
@@ -109,45 +254,81 @@ REMINDER_TRIGGER_WINDOW_SEC = 45
 REMINDER_HISTORY_TTL_SEC = 6 * 3600
 reminder_history: dict[str, float] = {}
 
+
+@dataclass
+class ScreenshotPrerender:
+    signature: tuple
+    task: asyncio.Task
+    taken: bool = False
+
+
+chat_admins = ChatAdminCache(ttl_sec=ADMIN_CACHE_TTL_SEC)
+command_answers = RequestCoalescer()
+admin_audit = AdminAuditLog(
+    ADMIN_LOG_CHAT_ID,
+    Path(ADMIN_AUDIT_LOG_PATH) if ADMIN_AUDIT_LOG_PATH else None,
+    flush_interval_sec=ADMIN_AUDIT_FLUSH_SEC,
+    max_entries=ADMIN_AUDIT_MAX_ENTRIES,
+)
+# Який файл скріншоту останнім перетворено на мініатюру (ключ — scope)
+thumbnail_sources: dict[str, str] = {}
+# Версія графіка (див. _thumbnail_version), для якої зараз опублікована мініатюра
+thumbnail_versions: dict[str, str] = {}
+# Дані Yasno, старші за це, показуються з позначкою віку
+YASNO_STALE_NOTE_SEC = SCHEDULE_POLL_INTERVAL_SEC * 3
+# Фонові рендери скріншотів, запущені одразу після виявлення нового графіка (ключ — scope)
+screenshot_prerenders: dict[str, ScreenshotPrerender] = {}
+metrics_server: MetricsServer | None = MetricsServer(METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+tracer = Tracer(Path(TRACE_LOG_PATH) if TRACE_LOG_PATH else None)
+recorder: EventRecorder | None = EventRecorder(Path(RECORD_PATH)) if RECORD_PATH else None
+loop_monitor: LoopLagMonitor | None = (
+    LoopLagMonitor(interval_sec=LOOP_LAG_INTERVAL_SEC, threshold_sec=LOOP_LAG_THRESHOLD_SEC)
+    if LOOP_LAG_INTERVAL_SEC > 0 and LOOP_LAG_THRESHOLD_SEC > 0
+    else None
+)
+
+COMPONENT_STATS = REGISTRY.gauge(
+    "svitlo_component_stat", "Counters and sizes reported by in-process caches and channels.", ("component", "stat")
+)
+UDP_SILENCE_SECONDS = REGISTRY.gauge("svitlo_udp_silence_seconds", "Seconds since the last UDP heartbeat packet.")
+
+
+def _collect_component_stats() -> None:
+    components: dict[str, dict[str, Any]] = {
+        "command_answers": command_answers.stats(),
+        "schedule_messages": schedule_messages.stats(),
+        "chat_admins": chat_admins.stats(),
+        "power_debouncer": power_debouncer.stats(),
+        "yasno_breaker": yasno.breaker.stats(),
+        "admin_audit": {"recorded_total": admin_audit.recorded_total, "digests_sent": admin_audit.digests_sent},
+    }
+    if screenshot_cache is not None:
+        components["screenshot_cache"] = screenshot_cache.stats()
+    if event_channel is not None:
+        components["event_channel"] = event_channel.stats()
+    for component, stats in components.items():
+        for stat, value in stats.items():
+            # bool теж int, тож прапорці (наприклад, pending) потрапляють як 0/1
+            if isinstance(value, (int, float)):
+                COMPONENT_STATS.set(value, component=component, stat=stat)
+    UDP_SILENCE_SECONDS.set(listener.seconds_since_last_packet())
+
+
+REGISTRY.add_collector(_collect_component_stats)
+
 # ───────────────── helpers ─────────────────
 def _is_chat_blocked(chat_id: int, thread_id: int | None) -> bool:
-    if not BLOCKED_CHAT_TARGETS:
-        return False
-    for blocked_chat_id, blocked_thread_id in BLOCKED_CHAT_TARGETS:
-        if blocked_chat_id != chat_id:
-            continue
-        if blocked_thread_id is None:
-            if thread_id is None:
-                return True
-            continue
-        if blocked_thread_id == thread_id:
-            return True
-    return False
+    return (chat_id, thread_id) in BLOCKED_CHAT_SET
 
 
 def _is_chat_silent(chat_id: int, thread_id: int | None) -> bool:
     """Перевіряє, чи всі повідомлення (крім адмінів) мають видалятися у цьому чаті."""
-    if not SILENT_CHAT_TARGETS:
-        return False
-    for silent_chat_id, silent_thread_id in SILENT_CHAT_TARGETS:
-        if silent_chat_id != chat_id:
-            continue
-        if silent_thread_id is None:
-            if thread_id is None:
-                return True
-            continue
-        if silent_thread_id == thread_id:
-            return True
-    return False
+    return (chat_id, thread_id) in SILENT_CHAT_SET
 
 
 async def _is_user_admin(bot: Bot, chat_id: int, user_id: int) -> bool:
-    """Перевіряє, чи є користувач адміністратором чату."""
-    try:
-        member = await bot.get_chat_member(chat_id, user_id)
-        return member.status in ("creator", "administrator")
-    except Exception:
-        return False
+    """Перевіряє, чи є користувач адміністратором чату (з кешу, без запиту на кожне повідомлення)."""
+    return await chat_admins.is_admin(bot, chat_id, user_id)
 
 
 async def _skip_if_blocked(message: Message) -> bool:
@@ -243,6 +424,14 @@ def build_today_signature(outages_info: dict) -> tuple:
     return date_iso, status, slots_signature
 
 
+# Текст /today і /tomorrow, який монітори графіка оновлюють на кожному опитуванні
+schedule_messages = ScheduleMessageCache(
+    max_age_sec=SCHEDULE_POLL_INTERVAL_SEC * 3,
+    signature=build_today_signature,
+    formatter=build_today_message,
+)
+
+
 @dataclass(frozen=True)
 class ReminderEvent:
     kind: Literal["outage", "restore"]
@@ -257,11 +446,51 @@ class ReminderEvent:
         return max(1, int(round(seconds / 60)))
 
 
-def _load_schedule_bundle() -> tuple[dict, dict]:
-    data = yasno.fetch()
-    today = yasno.get_today_outages(data)
-    tomorrow = yasno.get_tomorrow_outages(data)
-    return today, tomorrow
+async def _schedule_data() -> tuple[dict, float]:
+    """
+    Дані Yasno для відповідей і сповіщень, без очікування на повільний апстрім:
+    остання вдала відповідь — одразу (застаріла оновлюється у фоні); якщо її ще
+    немає — свіжий запит не довше YASNO_WAIT_SEC, а коли Yasno недоступний —
+    збережені в БД графіки. Так само з БД, якщо остання відповідь лишилась із
+    минулої доби. Повертає (дані, вік у секундах).
+    """
+    today = clock.now(TZ).date()
+    try:
+        data, age = await asyncio.to_thread(yasno.fetch_cached, YASNO_WAIT_SEC)
+    except Exception as error:
+        upstream_error = error
+    else:
+        snapshot_date = yasno.snapshot_date(data)
+        if snapshot_date is None or snapshot_date >= today:
+            return data, age
+        upstream_error = RuntimeError(f"остання відповідь Yasno за {snapshot_date.isoformat()}")
+    days = await db.get_schedules(today, today + timedelta(days=1), TZ)
+    data = yasno.snapshot_from_schedules(days, today)
+    if data is None:
+        raise upstream_error
+    logging.warning("Yasno недоступний (%s), графік зі збережених у БД", upstream_error)
+    return data, max(0.0, clock.time() - max(day["updated_at"] for day in days))
+
+
+def _stale_schedule_note(age_sec: float) -> str:
+    if age_sec <= YASNO_STALE_NOTE_SEC:
+        return ""
+    return f"\n\n🕓 Дані {schedule_link('графіка')} оновлено {fmt_duration(age_sec)} тому: Yasno зараз не відповідає."
+
+
+async def _load_schedule_bundle() -> tuple[dict, dict]:
+    """
+    Графіки на сьогодні й завтра для нагадувань. Монітори графіка зберігають кожну
+    зміну в БД, тож зазвичай це локальне читання; до Yasno — лише поки на сьогодні
+    запису ще немає (перший старт).
+    """
+    today = clock.now(TZ).date()
+    tomorrow = today + timedelta(days=1)
+    days = {day["date"]: day for day in await db.get_schedules(today, tomorrow, TZ)}
+    if today in days:
+        return days[today], days.get(tomorrow, {})
+    data, _age = await _schedule_data()
+    return yasno.get_today_outages(data), yasno.get_tomorrow_outages(data)
 
 
 def _extract_plan_segments(*day_infos: dict) -> list[tuple[datetime, datetime]]:
@@ -322,12 +551,192 @@ def _format_lead_label(minutes: int) -> str:
     return f"{minutes} хв"
 
 
-WEEKDAY_NAMES_UA = ("Понеділок", "Вівторок", "Середа", "Четвер", "Пʼятниця", "Субота", "Неділя")
+async def _day_actual_outages(outages_info: dict) -> list[dict[str, Any]]:
+    day_start_ts = datetime.combine(outages_info["date"], datetime.min.time(), tzinfo=TZ).timestamp()
+    return await db.get_outages_since(day_start_ts)
 
 
-async def create_schedule_screenshot(_outages_info: dict, scope: Literal["today", "tomorrow"]) -> Path | None:
+def _screenshot_cache_key(
+    outages_info: dict,
+    scope: Literal["today", "tomorrow"],
+    actual_rows: list[dict[str, Any]],
+) -> str:
+    if TIMELINE_SCREENSHOT_BACKEND == "native":
+        variant: tuple = ("native", RENDERER_VERSION, NATIVE_TIMELINE_WIDTH)
+    else:
+        variant = ("playwright", TIMELINE_SCREENSHOT_BASE_URL)
+    actual = tuple((row["start_ts"], row.get("end_ts")) for row in actual_rows)
+    now_bucket = int(time.time() // max(1, SCREENSHOT_CACHE_TODAY_TTL_SEC)) if scope == "today" else 0
+    return ScreenshotCache.make_key(scope, build_today_signature(outages_info), variant, actual, now_bucket)
+
+
+async def _render_native(
+    outages_info: dict,
+    scope: Literal["today", "tomorrow"],
+    rows: list[dict[str, Any]],
+    output_path: Path,
+) -> bool:
+    """Малює таймлайн без браузера. Повертає False, якщо рендер не вдався (тоді працює Playwright)."""
+    try:
+        started = time.perf_counter()
+        png = await asyncio.to_thread(render_snake_timeline, outages_info, rows, scope, TZ)
+    except Exception:
+        logging.exception("Нативний рендер таймлайну не вдався (%s)", scope)
+        return False
+    logging.info("Нативний рендер (%s): %.0f мс, %s байт", scope, (time.perf_counter() - started) * 1000, len(png))
+    await asyncio.to_thread(output_path.write_bytes, png)
+    return True
+
+
+async def _render_via_worker(scope: Literal["today", "tomorrow"], output_path: Path) -> bool:
+    """Запитує PNG у постійного воркера рендеру. Повертає False, якщо воркер недоступний."""
+    if not TIMELINE_RENDER_WORKER:
+        return False
+
+    async def _request() -> bytes:
+        if ":" in TIMELINE_RENDER_WORKER and not TIMELINE_RENDER_WORKER.startswith(("/", ".")):
+            host, port = TIMELINE_RENDER_WORKER.rsplit(":", 1)
+            reader, writer = await asyncio.open_connection(host, int(port))
+        else:
+            reader, writer = await asyncio.open_unix_connection(TIMELINE_RENDER_WORKER)
+        try:
+            writer.write(json.dumps({"scope": scope}).encode("utf-8") + b"\n")
+            await writer.drain()
+            header = json.loads(await reader.readline() or b"{}")
+            if not header.get("ok"):
+                raise RuntimeError(header.get("error") or "порожня відповідь")
+            png = await reader.readexactly(int(header["size"]))
+            logging.info("Воркер рендеру (%s): %s мс, %s байт", scope, header.get("render_ms"), len(png))
+            return png
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    try:
+        png = await asyncio.wait_for(_request(), timeout=TIMELINE_RENDER_WORKER_TIMEOUT_SEC)
+    except Exception as error:
+        logging.warning("Воркер рендеру недоступний (%s), використовую скрипт: %s", scope, error)
+        return False
+    await asyncio.to_thread(output_path.write_bytes, png)
+    return True
+
+
+async def create_schedule_screenshot(outages_info: dict, scope: Literal["today", "tomorrow"]) -> Path | None:
     if not TIMELINE_SCREENSHOT_ENABLED:
         return None
+    started = time.perf_counter()
+    path: Path | None = None
+    try:
+        path = await _produce_schedule_screenshot(outages_info, scope)
+        return path
+    finally:
+        SCREENSHOT_SECONDS.observe(time.perf_counter() - started, scope=scope, result="ok" if path else "none")
+
+
+async def _produce_schedule_screenshot(outages_info: dict, scope: Literal["today", "tomorrow"]) -> Path | None:
+
+    try:
+        actual_rows = await _day_actual_outages(outages_info)
+    except Exception:
+        logging.exception("Не вдалося прочитати фактичні відключення для скріншоту")
+        actual_rows = []
+
+    cache_key = None
+    if screenshot_cache is not None:
+        cache_key = _screenshot_cache_key(outages_info, scope, actual_rows)
+        cached_path = await asyncio.to_thread(screenshot_cache.get, cache_key)
+        if cached_path is not None:
+            logging.info("Скріншот %s взято з кешу: %s", scope, cached_path.name)
+            await asyncio.to_thread(_publish_thumbnail, cached_path, scope, _thumbnail_version(outages_info))
+            return cached_path
+
+    output_path = await _render_schedule_screenshot(outages_info, scope, actual_rows)
+    if output_path is None:
+        return None
+    await asyncio.to_thread(_compact_screenshot, output_path, scope)
+    await asyncio.to_thread(_publish_thumbnail, output_path, scope, _thumbnail_version(outages_info))
+    if cache_key is None:
+        return output_path
+    try:
+        cached_path = await asyncio.to_thread(screenshot_cache.put, cache_key, output_path)
+    except OSError:
+        logging.exception("Не вдалося зберегти скріншот у кеш")
+        return output_path
+    thumbnail_sources[scope] = cached_path.name
+    _cleanup_temp_file(output_path)
+    return cached_path
+
+
+def _compact_screenshot(path: Path, scope: str) -> None:
+    """Переписує скріншот палітровим PNG у межах SCREENSHOT_BYTE_BUDGET_KB."""
+    if SCREENSHOT_BYTE_BUDGET_KB <= 0:
+        return
+    try:
+        result = compact_png(path.read_bytes(), int(SCREENSHOT_BYTE_BUDGET_KB * 1024))
+    except ImportError:
+        logging.debug("Pillow не встановлено — скріншот не стискається")
+        return
+    except Exception:
+        logging.exception("Не вдалося стиснути скріншот (%s)", scope)
+        return
+    if result.size < result.original_size:
+        path.write_bytes(result.data)
+    logging.info("Скріншот %s: %s", scope, result.describe())
+
+
+def _publish_thumbnail(path: Path, scope: str, version: str) -> None:
+    """Оновлює <scope>.webp, яку web-app віддає як картинку push-сповіщення про графік."""
+    if not SCREENSHOT_THUMBNAIL_DIR:
+        return
+    if thumbnail_sources.get(scope) == path.name:
+        thumbnail_versions[scope] = version
+        return
+    try:
+        result = make_thumbnail(path.read_bytes(), SCREENSHOT_THUMBNAIL_WIDTH, int(SCREENSHOT_THUMBNAIL_BUDGET_KB * 1024))
+        target = Path(SCREENSHOT_THUMBNAIL_DIR) / f"{scope}.webp"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        tmp.write_bytes(result.data)
+        os.replace(tmp, target)
+    except ImportError:
+        return
+    except Exception:
+        logging.exception("Не вдалося створити мініатюру (%s)", scope)
+        return
+    thumbnail_sources[scope] = path.name
+    thumbnail_versions[scope] = version
+    logging.info("Мініатюра %s: %s", scope, result.describe())
+
+
+def _thumbnail_version(outages_info: dict) -> str:
+    return ScreenshotCache.make_key(build_today_signature(outages_info))[:12]
+
+
+def _thumbnail_url(outages_info: dict, scope: str) -> str | None:
+    """
+    Шлях до мініатюри для push; v змінюється разом із графіком, щоб браузер не брав стару з кешу.
+    None, поки <scope>.webp для саме цього графіка ще не записано.
+    """
+    if not (TIMELINE_SCREENSHOT_ENABLED and SCREENSHOT_THUMBNAIL_DIR):
+        return None
+    version = _thumbnail_version(outages_info)
+    if thumbnail_versions.get(scope) != version:
+        return None
+    return f"/api/schedules/thumbnail?scope={scope}&v={version}"
+
+
+async def _render_schedule_screenshot(
+    outages_info: dict,
+    scope: Literal["today", "tomorrow"],
+    actual_rows: list[dict[str, Any]],
+) -> Path | None:
+    output_dir = Path(tempfile.gettempdir())
+    output_path = output_dir / f"timeline-{scope}-{time.time_ns()}.png"
+    if TIMELINE_SCREENSHOT_BACKEND == "native" and await _render_native(outages_info, scope, actual_rows, output_path):
+        return output_path
+    if await _render_via_worker(scope, output_path):
+        return output_path
 
     script_path = TIMELINE_SCREENSHOT_SCRIPT
     if not script_path or not script_path.exists():
@@ -339,8 +748,6 @@ async def create_schedule_screenshot(_outages_info: dict, scope: Literal["today"
         logging.error("Інтерпретатор для скріншоту не знайдено: %s", python_exec)
         return None
 
-    output_dir = Path(tempfile.gettempdir())
-    output_path = output_dir / f"timeline-{scope}-{int(time.time())}.png"
     cmd = [
         str(python_exec),
         str(script_path),
@@ -361,7 +768,13 @@ async def create_schedule_screenshot(_outages_info: dict, scope: Literal["today"
         logging.exception("Не вдалося запустити скрипт скріншотів.")
         return None
 
-    stdout, stderr = await process.communicate()
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        # Попередній рендер скасовано новішим графіком — не лишаємо браузер висіти
+        with contextlib.suppress(ProcessLookupError):
+            process.kill()
+        raise
     if process.returncode != 0:
         logging.error(
             "Скрипт скріншотів завершився з помилкою (scope=%s, code=%s): %s",
@@ -385,11 +798,72 @@ async def create_schedule_screenshot(_outages_info: dict, scope: Literal["today"
 def _cleanup_temp_file(path: Path | None):
     if not path:
         return
+    if screenshot_cache is not None and screenshot_cache.owns(path):
+        return
     with contextlib.suppress(Exception):
         path.unlink()
 
 
+def _cleanup_prerender_result(task: asyncio.Task) -> None:
+    if task.cancelled() or task.exception() is not None:
+        return
+    _cleanup_temp_file(task.result())
+
+
+def prerender_schedule_screenshot(outages_info: dict, scope: Literal["today", "tomorrow"]) -> None:
+    """
+    Запускає рендер у фоні, щойно з'явилась нова сигнатура графіка, щоб сповіщення
+    не чекало на скріншот. Повторний виклик з тим самим графіком нічого не робить.
+    """
+    if not TIMELINE_SCREENSHOT_ENABLED:
+        return
+    signature = build_today_signature(outages_info)
+    current = screenshot_prerenders.get(scope)
+    if current is not None and current.signature == signature:
+        return
+    if current is not None and not current.taken:
+        current.task.cancel()
+        current.task.add_done_callback(_cleanup_prerender_result)
+    task = asyncio.create_task(create_schedule_screenshot(outages_info, scope))
+    screenshot_prerenders[scope] = ScreenshotPrerender(signature, task)
+    logging.info("Попередній рендер скріншоту (%s) запущено: %s", scope, signature[:2])
+
+
+def prerender_pending_tomorrow(outages_info: dict) -> None:
+    """
+    Графік на завтра часто з'являється як WaitingForSchedule вже зі слотами — малюємо його
+    наперед так, ніби він уже діє. Лише для нативного рендеру: сторінка web-app показала б «очікування».
+    """
+    if TIMELINE_SCREENSHOT_BACKEND != "native":
+        return
+    if outages_info.get("status") != "WaitingForSchedule" or not outages_info.get("raw_slots"):
+        return
+    prerender_schedule_screenshot(yasno.as_applied(outages_info), "tomorrow")
+
+
+async def take_schedule_screenshot(outages_info: dict, scope: Literal["today", "tomorrow"]) -> Path | None:
+    """Повертає готовий (або майже готовий) скріншот; після таймауту — None, і сповіщення йде без картинки."""
+    prerender_schedule_screenshot(outages_info, scope)
+    entry = screenshot_prerenders.get(scope)
+    if entry is None or entry.taken:
+        return None
+    entry.taken = True
+    try:
+        return await asyncio.wait_for(asyncio.shield(entry.task), timeout=SCREENSHOT_ATTACH_TIMEOUT_SEC)
+    except asyncio.TimeoutError:
+        logging.warning("Скріншот (%s) не встиг за %.0f с, надсилаю без нього", scope, SCREENSHOT_ATTACH_TIMEOUT_SEC)
+        entry.task.add_done_callback(_cleanup_prerender_result)
+    except Exception:
+        logging.exception("Помилка при генерації скріншоту (%s).", scope)
+    return None
+
+
 async def notify(bot: Bot, text: str, photo_path: str | None = None):
+    with FANOUT_SECONDS.time(channel="telegram"):
+        await _notify_chats(bot, text, photo_path)
+
+
+async def _notify_chats(bot: Bot, text: str, photo_path: str | None):
     if not ALERT_CHAT_TARGETS:
         return
     photo_candidate: Path | None = None
@@ -400,14 +874,18 @@ async def notify(bot: Bot, text: str, photo_path: str | None = None):
         else:
             logging.warning("Файл для вкладення не знайдено: %s", photo_path)
 
+    # Файл вантажимо в Telegram один раз, решті чатів надсилаємо його file_id
+    photo_file_id: str | None = None
     for chat_id, thread_id in ALERT_CHAT_TARGETS:
         try:
             if photo_candidate:
-                file_input = types.FSInputFile(str(photo_candidate))
+                file_input = photo_file_id or types.FSInputFile(str(photo_candidate))
                 if thread_id is None:
-                    await bot.send_photo(chat_id, file_input, caption=text)
+                    sent = await bot.send_photo(chat_id, file_input, caption=text)
                 else:
-                    await bot.send_photo(chat_id, file_input, caption=text, message_thread_id=thread_id)
+                    sent = await bot.send_photo(chat_id, file_input, caption=text, message_thread_id=thread_id)
+                if photo_file_id is None and sent.photo:
+                    photo_file_id = sent.photo[-1].file_id
             else:
                 if thread_id is None:
                     await bot.send_message(chat_id, text)
@@ -417,30 +895,62 @@ async def notify(bot: Bot, text: str, photo_path: str | None = None):
         except Exception as e:
             logging.error("send_message failed (%s): %s", chat_id, e)
 
+def _web_event(payload: dict) -> dict | None:
+    """Готує подію для outbox (або None, якщо WEB-сповіщення не налаштовані)."""
+    if web_outbox is None and event_channel is None:
+        return None
+    return _sanitize_web_payload(payload)
+
+
+def _start_power_trace(name: str, transition: PowerTransition, now: float) -> Trace:
+    """Трасування сповіщення про світло: від останнього пакета до доставки в Telegram і веб."""
+    trace = tracer.start(name, started_ts=now, flapping=transition.flapping)
+    if listener.last_packet_time:
+        trace.mark("last_udp_packet", listener.last_packet_time)
+    trace.mark("transition_since", transition.since)
+    trace.mark("detected", now)
+    return trace
+
+
+def _traced_web_event(payload: dict, trace: Trace) -> dict | None:
+    event = _web_event(payload)
+    if event is not None and tracer.enabled:
+        event["data"]["traceId"] = trace.trace_id
+        trace.expect("web_accepted")
+    return event
+
+
+def _on_web_delivered(payload: dict, delivered_ts: float) -> None:
+    data = payload.get("data")
+    if isinstance(data, dict) and data.get("traceId"):
+        tracer.resolve(str(data["traceId"]), "web_accepted", delivered_ts)
+
+
+def _wake_web_outbox():
+    if web_outbox is not None:
+        web_outbox.wake()
+    if event_channel is not None:
+        event_channel.wake()
+
+
 async def web_notify(payload: dict):
     """
-    Надсилає серверу веб-додатка подію, яка:
+    Ставить у чергу (outbox) подію для веб-додатка, яка:
       - очищає відповідний кеш
       - розсилає SSE у відкриті вкладки
       - надсилає PWA push-нотифікацію
+    Доставку з повторами виконує WebOutboxWorker (або EventChannelServer).
     """
-    if not WEB_NOTIFY_URL or not NOTIFY_BOT_TOKEN:
+    event = _web_event(payload)
+    if event is None:
         return
-    sanitized_payload = _sanitize_web_payload(payload)
-    body = json.dumps(sanitized_payload).encode("utf-8")
-    req = urllib.request.Request(
-        WEB_NOTIFY_URL,
-        data=body,
-        headers={"Content-Type": "application/json", "x-bot-token": NOTIFY_BOT_TOKEN},
-        method="POST",
-    )
-    def _do():
-        try:
-            with urllib.request.urlopen(req, timeout=2.5) as _:
-                return
-        except urllib.error.URLError:
-            return
-    await asyncio.to_thread(_do)
+    try:
+        with FANOUT_SECONDS.time(channel="web_enqueue"):
+            await db.enqueue_web_event(event)
+    except Exception:
+        logging.exception("Не вдалося додати подію в web outbox")
+        return
+    _wake_web_outbox()
 
 # ───────────────── Telegram handlers ─────────────────
 @router.message(Command("start"))
@@ -466,7 +976,7 @@ async def cmd_notifyweb(m: Message, command: CommandObject):
     # Дозволяємо лише з адмін-чату
     if m.chat.id != ADMIN_LOG_CHAT_ID:
         return
-    if not WEB_NOTIFY_URL or not NOTIFY_BOT_TOKEN:
+    if web_outbox is None and event_channel is None:
         await m.answer("⚠️ WEB-сповіщення не налаштовано (перевір WEB_NOTIFY_URL/NOTIFY_BOT_TOKEN).")
         return
 
@@ -515,12 +1025,45 @@ async def cmd_subcount(m: Message):
         logging.error("cmd_subcount error: %s", e)
         await m.answer("❌ Не вдалося отримати кількість підписок")
 
-@router.message(Command("status"))
-async def cmd_status(m: Message):
+@router.message(Command("outbox"))
+async def cmd_outbox(m: Message):
     if await _skip_if_blocked(m):
         return
-    print("status chat_id: " + str(m.chat.id))
-    thread_id = m.message_thread_id
+    # Доступ лише з адмін-чату
+    if m.chat.id != ADMIN_LOG_CHAT_ID:
+        return
+    if event_channel is not None:
+        channel_stats = event_channel.stats()
+        await m.answer(
+            "📡 Event channel\n"
+            f"Підписників: {channel_stats['subscribers']}, останній seq: {channel_stats['last_seq']}\n"
+            f"Відправлено подій: {channel_stats['events_sent_total']}, підключень: {channel_stats['connections_total']}"
+        )
+        return
+    if web_outbox is None:
+        await m.answer("⚠️ WEB-сповіщення не налаштовано (перевір WEB_NOTIFY_URL/NOTIFY_BOT_TOKEN).")
+        return
+    try:
+        stats = await web_outbox.stats()
+    except Exception as e:
+        logging.error("cmd_outbox error: %s", e)
+        await m.answer("❌ Не вдалося отримати стан outbox")
+        return
+
+    def _fmt_latency(value: float | None) -> str:
+        return f"{value:.2f}s" if value is not None else "—"
+
+    await m.answer(
+        "📤 Web outbox\n"
+        f"У черзі: {stats['backlog']} (найстаріша: {fmt_duration(stats['backlog_oldest_age_sec'])})\n"
+        f"Доставлено: {stats['delivered_total']}, невдалих спроб: {stats['failed_attempts_total']}, "
+        f"відкинуто: {stats['dropped_total']}\n"
+        f"Затримка доставки: остання {_fmt_latency(stats['last_delivery_latency_sec'])}, "
+        f"середня {_fmt_latency(stats['avg_delivery_latency_sec'])}, "
+        f"макс {_fmt_latency(stats['max_delivery_latency_sec'])}"
+    )
+
+def _audit_command(m: Message, command: str):
     username = None
     if m.from_user:
         if getattr(m.from_user, "username", None):
@@ -529,25 +1072,31 @@ async def cmd_status(m: Message):
             first = getattr(m.from_user, "first_name", "") or ""
             last = getattr(m.from_user, "last_name", "") or ""
             username = (first + " " + last).strip() or None
-    if ADMIN_LOG_CHAT_ID:
-        log_text = f"📮 status від chat={m.chat.id}"
-        if username:
-            log_text += f", login={username}"
-        if thread_id is not None:
-            log_text += f", thread={thread_id}"
-        try:
-            await m.bot.send_message(ADMIN_LOG_CHAT_ID, log_text, disable_notification=True)
-        except Exception as e:
-            logging.error("Failed to send status log: %s", e)
-    now = datetime.now(TZ)
-    def _fetch_schedule_messages(moment: datetime):
-        data = yasno.fetch()
-        outage_msg = yasno.get_nearest_outage_message(now=moment, data_override=data)
-        restore_msg = yasno.get_nearest_restore_message(now=moment, data_override=data)
-        return outage_msg, restore_msg
+    admin_audit.record(
+        command,
+        m.chat.id,
+        m.from_user.id if m.from_user else None,
+        username,
+        m.message_thread_id,
+    )
 
+@router.message(Command("status"))
+async def cmd_status(m: Message):
+    if await _skip_if_blocked(m):
+        return
+    _audit_command(m, "status")
+    text = await command_answers.run("status", _build_status_text, ttl=COMMAND_COALESCE_SEC)
+    await m.answer(text)
+
+
+async def _build_status_text() -> str:
+    now = datetime.now(TZ)
+    stale_note = ""
     try:
-        outage_text, restore_text = await asyncio.to_thread(_fetch_schedule_messages, now)
+        data, age = await _schedule_data()
+        outage_text = yasno.get_nearest_outage_message(now=now, data_override=data)
+        restore_text = yasno.get_nearest_restore_message(now=now, data_override=data)
+        stale_note = _stale_schedule_note(age)
     except Exception as e:
         logging.error("cmd_status schedule fetch error: %s", e)
         outage_text = f"⚠️ Не вдалося отримати {schedule_link('графік')}"
@@ -557,67 +1106,44 @@ async def cmd_status(m: Message):
     power_down = secs > threshold_sec
     state = "❌ світла немає" if power_down else "✅ світло є"
     schedule_text = restore_text if power_down else outage_text
-
-    await m.answer(f"{state}\n{schedule_text}")
+    return f"{state}\n{schedule_text}{stale_note}"
 
 @router.message(Command("today"))
 async def cmd_today(m: Message):
     if await _skip_if_blocked(m):
         return
-    try:
-        outages_info = await asyncio.to_thread(yasno.get_today_outages)
-        message = build_today_message(outages_info)
-        await m.answer(message)
-    except Exception as e:
-        logging.error("cmd_today error: %s", e)
-        await m.answer(f"❌ Помилка при завантаженні {schedule_link('графіку')}")
+    _audit_command(m, "today")
+    await _answer_schedule(m, "today")
 
 @router.message(Command("tomorrow"))
 async def cmd_tomorrow(m: Message):
     if await _skip_if_blocked(m):
         return
+    _audit_command(m, "tomorrow")
+    await _answer_schedule(m, "tomorrow")
+
+
+async def _answer_schedule(m: Message, scope: Literal["today", "tomorrow"]):
+    async def _build() -> str:
+        expected_date = datetime.now(TZ).date() + timedelta(days=1 if scope == "tomorrow" else 0)
+        message = schedule_messages.lookup(scope, expected_date)
+        if message is not None:
+            return message
+        data, age = await _schedule_data()
+        outages_info = yasno.get_today_outages(data) if scope == "today" else yasno.get_tomorrow_outages(data)
+        stale_note = _stale_schedule_note(age)
+        if stale_note:
+            # Застарілий графік не кладемо в кеш, щоб наступні відповіді не втратили позначку
+            return build_today_message(outages_info) + stale_note
+        return schedule_messages.render(scope, outages_info)
+
     try:
-        outages_info = await asyncio.to_thread(yasno.get_tomorrow_outages)
-        date_str = outages_info["date"].strftime("%d.%m.%Y")
-        status = outages_info["status"]
-        outages = outages_info["outages"]
-        
-        if status != "ScheduleApplies":
-            if status == "EmergencyShutdowns":
-                await m.answer(
-                    f"📅 Розклад на {date_str}\n"
-                    f"🚨 {schedule_link('Графік')} не діє. Діють екстрені відключення."
-                )
-            elif status == "WaitingForSchedule":
-                await m.answer(
-                    f"📅 Розклад на {date_str}\n"
-                    f"⌛ Очікуємо оновлення"
-                )
-            else:
-                await m.answer(
-                    f"📅 Розклад на {date_str}\n"
-                    f"⚠️ Статус: {status}"
-                )
-            return
-        
-        if not outages:
-            await m.answer(
-                f"📅 Розклад на {date_str}\n"
-                f"✅ Відключень не передбачено"
-            )
-            return
-        
-        message = f"📅 Розклад на {date_str}\n\n"
-        for idx, outage in enumerate(outages, 1):
-            start_str = outage["start"].strftime("%H:%M")
-            end_str = outage["end"].strftime("%H:%M")
-            duration_label = format_duration(outage["start"], outage["end"])
-            message += f"{idx}. {start_str} – {end_str} ({duration_label})\n"
-        
-        await m.answer(message)
+        message = await command_answers.run(f"schedule:{scope}", _build, ttl=COMMAND_COALESCE_SEC)
     except Exception as e:
-        logging.error("cmd_tomorrow error: %s", e)
+        logging.error("cmd_%s error: %s", scope, e)
         await m.answer(f"❌ Помилка при завантаженні {schedule_link('графіку')}")
+        return
+    await m.answer(message)
 
 
 @router.message(Command("testscreenshot"))
@@ -644,7 +1170,7 @@ async def cmd_testscreenshot(m: Message, command: CommandObject):
         await m.answer(f"❌ Не вдалося отримати {schedule_link('графік')} на {scope_label}.")
         return
 
-    message_body = build_today_message(outages_info)
+    message_body = schedule_messages.render(scope, outages_info)
     screenshot_path: Path | None = None
     try:
         screenshot_path = await create_schedule_screenshot(outages_info, scope=scope)
@@ -664,6 +1190,12 @@ async def cmd_testscreenshot(m: Message, command: CommandObject):
         _cleanup_temp_file(screenshot_path)
 
 
+@router.chat_member()
+async def handle_chat_member_update(event: types.ChatMemberUpdated):
+    """Тримає кеш адміністраторів актуальним без повторного get_chat_administrators."""
+    chat_admins.apply_member_update(event)
+
+
 @router.message()
 async def handle_silent_chat_messages(m: Message):
     """Видаляє всі повідомлення у silent чатах (крім адміністраторів та адмін-чату/юзера)."""
@@ -689,13 +1221,59 @@ async def handle_silent_chat_messages(m: Message):
         logging.warning("Не вдалося видалити повідомлення у silent chat=%s thread=%s: %s", chat.id, thread_id, e)
 
 
+# ───────────────── стан моніторів між рестартами ─────────────────
+def _restore_schedule_state(value: Any) -> tuple[date | None, tuple | None]:
+    """{"date": ISO, "signature": [status, [[start, end, type], ...]]} → (date, сигнатура-кортеж)."""
+    try:
+        status, slots = value["signature"]
+        return date.fromisoformat(value["date"]), (status, tuple(tuple(slot) for slot in slots))
+    except (KeyError, TypeError, ValueError):
+        return None, None
+
+
+async def restore_monitor_state():
+    """
+    Відновлює базові точки моніторів одним читанням з БД. Без цього перший опит після
+    рестарту лише записує нову базу (зміна графіка під час простою губиться), нагадування
+    з вікна спрацювання надсилаються вдруге, а відключення без жодного пакета після
+    старту отримує початок у момент старту.
+    """
+    global last_today_date, last_today_signature, last_tomorrow_date, last_tomorrow_status
+    global restored_last_packet_ts
+    try:
+        state = await db.get_monitor_state()
+    except Exception:
+        logging.exception("Не вдалося прочитати збережений стан моніторів")
+        return
+    if "schedule_today" in state:
+        last_today_date, last_today_signature = _restore_schedule_state(state["schedule_today"])
+    if "schedule_tomorrow" in state:
+        last_tomorrow_date, last_tomorrow_status = _restore_schedule_state(state["schedule_tomorrow"])
+    history = state.get("reminder_history")
+    if isinstance(history, dict):
+        reminder_history.update({str(key): float(ts) for key, ts in history.items()})
+        _prune_reminder_history(clock.time())
+    with contextlib.suppress(TypeError, ValueError):
+        restored_last_packet_ts = float(state.get("last_packet_ts") or 0.0)
+    logging.info(
+        "Restored monitor state: today=%s tomorrow=%s reminders=%s last_packet=%s",
+        last_today_date,
+        last_tomorrow_date,
+        len(reminder_history),
+        fmt_dt(restored_last_packet_ts) if restored_last_packet_ts else "—",
+    )
+
+
 # ───────────────── background monitor ─────────────────
 async def schedule_monitor(bot: Bot):
     global last_today_signature, last_today_date
 
     while True:
         try:
+            iteration_started = time.perf_counter()
             outages_info = await asyncio.to_thread(yasno.get_today_outages)
+            _publish_schedule("today", outages_info)
+            schedule_messages.render("today", outages_info)
             today_date = outages_info.get("date")
             status = outages_info.get("status")
             raw_slots = outages_info.get("raw_slots") or []
@@ -717,16 +1295,29 @@ async def schedule_monitor(bot: Bot):
             elif current_signature != last_today_signature:
                 last_today_signature = current_signature
                 persist_required = True
-                message_body = build_today_message(outages_info)
+                message_body = schedule_messages.render("today", outages_info)
 
+            if message_body and TIMELINE_SCREENSHOT_BACKEND == "native":
+                # Нативний рендер малює з outages_info, тож може стартувати до запису в БД;
+                # сторінка web-app читає графік із БД — її рендер запуститься після upsert
+                prerender_schedule_screenshot(outages_info, "today")
             if persist_required:
-                await db.upsert_schedule(today_date, status, outages_info.get("outages"), raw_slots)
+                await db.upsert_schedule(
+                    today_date, status, outages_info.get("outages"), raw_slots,
+                    monitor_state={"schedule_today": {"date": today_date, "signature": last_today_signature}},
+                )
+                if status_snapshot is not None:
+                    status_snapshot.update_schedule("today", (today_date, last_today_signature))
             if message_body:
-                screenshot_path: Path | None = None
-                try:
-                    screenshot_path = await create_schedule_screenshot(outages_info, scope="today")
-                except Exception:
-                    logging.exception("Помилка при генерації скріншоту (today).")
+                screenshot_path = await take_schedule_screenshot(outages_info, "today")
+                # Подію для веба ставимо після скріншоту: картинка в push лише тоді, коли мініатюра вже на диску
+                await web_notify({
+                    "type": "schedule_updated",
+                    "category": "schedule_change",
+                    "title": "🔔 Графік на сьогодні оновлено!",
+                    "body": message_body,
+                    "data": {"image": _thumbnail_url(outages_info, "today")},
+                })
                 try:
                     await notify(
                         bot,
@@ -736,26 +1327,23 @@ async def schedule_monitor(bot: Bot):
                 finally:
                     _cleanup_temp_file(screenshot_path)
 
-                asyncio.create_task(web_notify({
-                    "type": "schedule_updated",
-                    "category": "schedule_change",
-                    "title": "🔔 Графік на сьогодні оновлено!",
-                    "body": message_body,
-                }))
-
-            await asyncio.sleep(SCHEDULE_POLL_INTERVAL_SEC)
+            LOOP_ITERATION_SECONDS.observe(time.perf_counter() - iteration_started, loop="schedule_today")
+            await clock.sleep(SCHEDULE_POLL_INTERVAL_SEC)
         except asyncio.CancelledError:
             break
         except Exception:
             logging.exception("Schedule monitor error")
-            await asyncio.sleep(SCHEDULE_POLL_INTERVAL_SEC)
+            await clock.sleep(SCHEDULE_POLL_INTERVAL_SEC)
 
 async def schedule_monitor_tomorrow(bot: Bot):
     global last_tomorrow_status, last_tomorrow_date
 
     while True:
         try:
+            iteration_started = time.perf_counter()
             outages_info = await asyncio.to_thread(yasno.get_tomorrow_outages)
+            _publish_schedule("tomorrow", outages_info)
+            schedule_messages.render("tomorrow", outages_info)
             tomorrow_date = outages_info.get("date")
             current_status = outages_info.get("status", "")
             raw_slots = outages_info.get("raw_slots") or []
@@ -779,20 +1367,33 @@ async def schedule_monitor_tomorrow(bot: Bot):
                     # Розклад став доступний
                     last_tomorrow_status = (current_status, slots_signature)
                     persist_required = True
-                    message_body = build_today_message(outages_info)
+                    message_body = schedule_messages.render("tomorrow", outages_info)
                 elif current_status != old_status or slots_signature != old_slots:
                     # Щось інше змінилось (але не при переходу дня без змін)
                     last_tomorrow_status = (current_status, slots_signature)
                     persist_required = True
 
+            if message_body and TIMELINE_SCREENSHOT_BACKEND == "native":
+                # Див. schedule_monitor: до upsert — лише нативний рендер
+                prerender_schedule_screenshot(outages_info, "tomorrow")
+            elif not message_body:
+                prerender_pending_tomorrow(outages_info)
             if persist_required:
-                await db.upsert_schedule(tomorrow_date, current_status, outages_info.get("outages"), raw_slots)
+                await db.upsert_schedule(
+                    tomorrow_date, current_status, outages_info.get("outages"), raw_slots,
+                    monitor_state={"schedule_tomorrow": {"date": tomorrow_date, "signature": last_tomorrow_status}},
+                )
+                if status_snapshot is not None:
+                    status_snapshot.update_schedule("tomorrow", (tomorrow_date, last_tomorrow_status))
             if message_body:
-                screenshot_path: Path | None = None
-                try:
-                    screenshot_path = await create_schedule_screenshot(outages_info, scope="tomorrow")
-                except Exception:
-                    logging.exception("Помилка при генерації скріншоту (tomorrow).")
+                screenshot_path = await take_schedule_screenshot(outages_info, "tomorrow")
+                await web_notify({
+                    "type": "schedule_updated",
+                    "category": "schedule_change",
+                    "title": "🔔 З'явився графік на завтра!",
+                    "body": message_body,
+                    "data": {"image": _thumbnail_url(outages_info, "tomorrow")},
+                })
                 try:
                     await notify(
                         bot,
@@ -802,42 +1403,40 @@ async def schedule_monitor_tomorrow(bot: Bot):
                 finally:
                     _cleanup_temp_file(screenshot_path)
 
-                asyncio.create_task(web_notify({
-                    "type": "schedule_updated",
-                    "category": "schedule_change",
-                    "title": "🔔 З'явився графік на завтра!",
-                    "body": message_body,
-                }))
-
-            await asyncio.sleep(SCHEDULE_POLL_INTERVAL_SEC + 1)
+            LOOP_ITERATION_SECONDS.observe(time.perf_counter() - iteration_started, loop="schedule_tomorrow")
+            await clock.sleep(SCHEDULE_POLL_INTERVAL_SEC + 1)
         except asyncio.CancelledError:
             break
         except Exception:
             logging.exception("Schedule monitor tomorrow error")
-            await asyncio.sleep(SCHEDULE_POLL_INTERVAL_SEC)
+            await clock.sleep(SCHEDULE_POLL_INTERVAL_SEC)
 
 
 async def reminder_scheduler(bot: Bot):
     while True:
         try:
-            now = datetime.now(TZ)
+            iteration_started = time.perf_counter()
+            now = clock.now(TZ)
             now_ts = now.timestamp()
             power_down = listener.seconds_since_last_packet() > threshold_sec
 
             try:
-                today_info, tomorrow_info = await asyncio.to_thread(_load_schedule_bundle)
+                today_info, tomorrow_info = await _load_schedule_bundle()
             except Exception as fetch_error:
                 logging.error("Reminder scheduler fetch error: %s", fetch_error)
-                await asyncio.sleep(20.0)
+                LOOP_ITERATION_SECONDS.observe(time.perf_counter() - iteration_started, loop="reminders")
+                await clock.sleep(20.0)
                 continue
 
             segments = _extract_plan_segments(today_info, tomorrow_info)
             if not segments:
                 _prune_reminder_history(now_ts)
-                await asyncio.sleep(30.0)
+                LOOP_ITERATION_SECONDS.observe(time.perf_counter() - iteration_started, loop="reminders")
+                await clock.sleep(30.0)
                 continue
 
             events = _build_reminder_events(segments, now)
+            history_changed = False
             for event in events:
                 key = f"{event.kind}:{event.start.isoformat()}:{event.lead_minutes}"
                 if key in reminder_history:
@@ -845,6 +1444,7 @@ async def reminder_scheduler(bot: Bot):
                 delta = (now - event.trigger_at).total_seconds()
                 if delta < 0 or delta > REMINDER_TRIGGER_WINDOW_SEC:
                     continue
+                history_changed = True
                 if (event.kind == "outage" and power_down) or (event.kind == "restore" and not power_down):
                     reminder_history[key] = now_ts
                     continue
@@ -853,12 +1453,16 @@ async def reminder_scheduler(bot: Bot):
                 reminder_history[key] = now_ts
 
             _prune_reminder_history(now_ts)
-            await asyncio.sleep(20.0)
+            if history_changed:
+                # Рестарт у межах REMINDER_TRIGGER_WINDOW_SEC інакше надіслав би те саме нагадування вдруге
+                await db.save_monitor_state({"reminder_history": reminder_history})
+            LOOP_ITERATION_SECONDS.observe(time.perf_counter() - iteration_started, loop="reminders")
+            await clock.sleep(20.0)
         except asyncio.CancelledError:
             break
         except Exception:
             logging.exception("Reminder scheduler error")
-            await asyncio.sleep(20.0)
+            await clock.sleep(20.0)
 
 
 async def send_plan_reminder(event: ReminderEvent, power_down: bool):
@@ -898,42 +1502,109 @@ def _prune_reminder_history(now_ts: float):
         reminder_history.pop(key, None)
 
 
+def _flap_summary(transition: PowerTransition) -> str:
+    if transition.suppressed_flaps <= 0:
+        return ""
+    return f"⚡ Живлення нестабільне: {transition.suppressed_flaps} коротких перемикань згорнуто в це сповіщення."
+
+
+def _publish_power_state(active_outage: dict | None, since_ts: float):
+    """Оновлює live-стан живлення для status_snapshot і status_api."""
+    power_on: bool | None = active_outage is None
+    if active_outage is None and not listener.last_packet_time:
+        # Після старту пакетів ще не було, а відкритого відключення немає — стан невідомий
+        power_on = None
+    if status_snapshot is not None:
+        try:
+            status_snapshot.update_power(power_on, since_ts, listener.last_packet_time)
+        except Exception:
+            logging.exception("Не вдалося оновити status snapshot")
+    if status_api is not None:
+        status_api.publish("status", {
+            "power": "unknown" if power_on is None else ("on" if power_on else "off"),
+            "since_ts": since_ts or None,
+            "last_packet_ts": listener.last_packet_time or None,
+            "threshold_sec": threshold_sec,
+            "active_outage": (
+                {"start_ts": float(active_outage["start_ts"])} if active_outage is not None else None
+            ),
+        })
+
+
+def _publish_schedule(scope: Literal["today", "tomorrow"], outages_info: dict):
+    if status_api is not None:
+        status_api.publish(f"schedule:{scope}", day_info_to_json(outages_info))
+
+
 async def power_monitor(bot: Bot):
     """
     Періодично перевіряє відсутність/наявність UDP-пакетів і шле сповіщення.
+    Сирий стан проходить через power_debouncer, тож короткі флепи не розсилаються.
     """
-    await asyncio.sleep(1.0)  # трохи часу, щоб встигли зробити /start
+    await clock.sleep(1.0)  # трохи часу, щоб встигли зробити /start
+
+    # Для status_snapshot: з якого моменту діє поточний підтверджений стан
+    power_since_ts = 0.0
+    with contextlib.suppress(Exception):
+        last_outage = await db.get_last_outage()
+        if last_outage:
+            power_since_ts = float(last_outage["end_ts"] or last_outage["start_ts"])
+    checkpoint_packet_ts = restored_last_packet_ts
 
     while True:
         try:
+            iteration_started = time.perf_counter()
             secs = listener.seconds_since_last_packet()
-            now = time.time()
+            now = clock.time()
+            if listener.last_packet_time - checkpoint_packet_ts >= LAST_PACKET_CHECKPOINT_SEC:
+                checkpoint_packet_ts = listener.last_packet_time
+                await db.save_monitor_state({"last_packet_ts": checkpoint_packet_ts})
 
-            outage_detected = False
-            outage_start_candidate = None
+            # None — стан ще невідомий (після старту пакетів не було, але поріг не минув)
+            raw_down: bool | None = None
+            raw_since = now
 
             if secs == float("inf"):
                 if (now - startup_ts) > threshold_sec:
-                    outage_detected = True
-                    outage_start_candidate = startup_ts
+                    raw_down = True
+                    raw_since = restored_last_packet_ts or startup_ts
             elif secs > threshold_sec:
-                outage_detected = True
-                outage_start_candidate = now - secs
+                raw_down = True
+                raw_since = now - secs
+            else:
+                raw_down = False
+                raw_since = now - secs
 
             active_outage = await db.get_active_outage()
+            transition = None
+            if raw_down is not None:
+                transition = power_debouncer.observe(raw_down, active_outage is not None, now, since=raw_since)
+            if transition is not None:
+                logging.info(
+                    "Power transition: down=%s since=%s suppressed_flaps=%s flapping=%s",
+                    transition.down,
+                    fmt_dt(transition.since),
+                    transition.suppressed_flaps,
+                    transition.flapping,
+                )
+            flap_line = _flap_summary(transition) if transition is not None else ""
 
-            if outage_detected:
-                if active_outage is None:
-                    start_ts = outage_start_candidate if outage_start_candidate is not None else now
-                    await db.log_outage_start(start_ts)
+            if transition is not None and transition.down:
+                start_ts = transition.since
+                trace = _start_power_trace("power_outage_started", transition, now)
+                try:
+                    restore_msg = None
                     try:
                         now_dt = datetime.fromtimestamp(now, tz=TZ)
-                        restore_msg = await asyncio.to_thread(yasno.get_nearest_restore_message, now_dt)
-                        await notify(
-                            bot,
-                            f"🔔⚠️ Світло ЗНИКЛО.\n{restore_msg}"
-                        )
-                        asyncio.create_task(web_notify({
+                        with trace.span("restore_message"):
+                            data, _age = await _schedule_data()
+                            restore_msg = yasno.get_nearest_restore_message(now_dt, data_override=data)
+                    except Exception as e:
+                        logging.error("Failed to get restore message: %s", e)
+
+                    if restore_msg is not None:
+                        message_text = f"🔔⚠️ Світло ЗНИКЛО.\n{restore_msg}"
+                        web_payload = {
                             "type": "power_outage_started",
                             "category": "actual",
                             "title": "⚠️ Світло зникло",
@@ -943,11 +1614,10 @@ async def power_monitor(bot: Bot):
                                 "tag": "power-status",
                                 "planMessage": restore_msg,
                             },
-                        }))
-                    except Exception as e:
-                        logging.error("Failed to get restore message: %s", e)
-                        await notify(bot, "⚠️ Світло ЗНИКЛО.")
-                        asyncio.create_task(web_notify({
+                        }
+                    else:
+                        message_text = "⚠️ Світло ЗНИКЛО."
+                        web_payload = {
                             "type": "power_outage_started",
                             "category": "actual",
                             "title": "Світло зникло",
@@ -956,16 +1626,38 @@ async def power_monitor(bot: Bot):
                                 "networkState": "off",
                                 "tag": "power-status",
                             },
-                        }))
-            else:
-                if active_outage is not None and secs != float("inf"):
-                    start_ts = await db.log_outage_end(now)
-                    effective_start = start_ts if start_ts is not None else now
-                    downtime = max(0.0, now - effective_start)
+                        }
+                    if flap_line:
+                        message_text += f"\n{flap_line}"
+                        web_payload["body"] = "\n".join(part for part in (web_payload["body"], flap_line) if part)
+                        web_payload["data"]["suppressedFlaps"] = transition.suppressed_flaps
+                    web_event = _traced_web_event(web_payload, trace)
+                    # Запис відключення і подія для веба — в одній транзакції
+                    with trace.span("db_log_outage_start"):
+                        await db.log_outage_start(start_ts, web_event=web_event)
+                    _wake_web_outbox()
+                    active_outage = {"start_ts": start_ts}
+                    power_since_ts = start_ts
+                    if status_api is not None:
+                        status_api.record_outage(start_ts, None)
+                    _publish_power_state(active_outage, power_since_ts)
+                    with trace.span("telegram_fanout", chats=len(ALERT_CHAT_TARGETS)):
+                        await notify(bot, message_text)
+                finally:
+                    # Навіть якщо сповіщення впало — трасування має потрапити в журнал
+                    trace.finish()
+            elif transition is not None and active_outage is not None:
+                end_ts = transition.since
+                effective_start = float(active_outage["start_ts"])
+                downtime = max(0.0, end_ts - effective_start)
+                trace = _start_power_trace("power_restored", transition, now)
+                try:
                     nearest_msg = ""
                     try:
                         now_dt = datetime.fromtimestamp(now, tz=TZ)
-                        nearest_msg = await asyncio.to_thread(yasno.get_nearest_outage_message, now_dt)
+                        with trace.span("nearest_outage_message"):
+                            data, _age = await _schedule_data()
+                            nearest_msg = yasno.get_nearest_outage_message(now_dt, data_override=data)
                     except Exception as e:
                         logging.error("Failed to get nearest outage message: %s", e)
                     body_lines = [
@@ -974,26 +1666,48 @@ async def power_monitor(bot: Bot):
                     ]
                     if nearest_msg:
                         body_lines.append(nearest_msg)
+                    if flap_line:
+                        body_lines.append(flap_line)
                     message_text = "\n".join(body_lines)
-                    await notify(bot, message_text)
-                    asyncio.create_task(web_notify({
+                    web_payload = {
                         "type": "power_restored",
                         "category": "actual",
                         "title": "✅ Світло ВІДНОВЛЕНО.",
-                        "body": "\n".join(body_lines[1:]) if nearest_msg else body_lines[1],
+                        "body": "\n".join(body_lines[1:]),
                         "data": {
                             "networkState": "on",
                             "tag": "power-status",
                             "downtimeSeconds": downtime,
                             "planMessage": nearest_msg,
                         },
-                    }))
-            await asyncio.sleep(1.0)
+                    }
+                    if flap_line:
+                        web_payload["data"]["suppressedFlaps"] = transition.suppressed_flaps
+                    web_event = _traced_web_event(web_payload, trace)
+                    with trace.span("db_log_outage_end"):
+                        await db.log_outage_end(end_ts, web_event=web_event)
+                    _wake_web_outbox()
+                    active_outage = None
+                    power_since_ts = end_ts
+                    if status_api is not None:
+                        status_api.record_outage(end_ts, end_ts)
+                    _publish_power_state(active_outage, power_since_ts)
+                    with trace.span("telegram_fanout", chats=len(ALERT_CHAT_TARGETS)):
+                        await notify(bot, message_text)
+                finally:
+                    # Навіть якщо сповіщення впало — трасування має потрапити в журнал
+                    trace.finish()
+            elif active_outage is not None:
+                power_since_ts = float(active_outage["start_ts"])
+            # heartbeat стану (у т.ч. вік останнього пакета)
+            _publish_power_state(active_outage, power_since_ts)
+            LOOP_ITERATION_SECONDS.observe(time.perf_counter() - iteration_started, loop="power")
+            await clock.sleep(1.0)
         except asyncio.CancelledError:
             break
         except Exception:
             logging.exception("Monitor error")
-            await asyncio.sleep(1.0)
+            await clock.sleep(1.0)
 
 # ───────────────── lifecycle hooks (aiogram v3) ─────────────────
 # У v3 хендлери startup/shutdown реєструються через dp.startup.register / dp.shutdown.register,
@@ -1001,13 +1715,22 @@ async def power_monitor(bot: Bot):
 # Див. офіційну документацію Dispatcher/Long-polling/DI. :contentReference[oaicite:1]{index=1}
 async def on_startup(dispatcher: Dispatcher, bot: Bot):
     global startup_ts
-    startup_ts = time.time()
+    startup_ts = clock.time()
+    await restore_monitor_state()
+    if recorder is not None:
+        try:
+            recorder.open(group=YASNO_GROUP, threshold_sec=threshold_sec, settle_sec=POWER_SETTLE_SEC)
+            yasno.on_fetch = recorder.record_yasno
+        except OSError:
+            logging.exception("Не вдалося відкрити запис подій %s", RECORD_PATH)
     # стартуємо UDP-лісенер
     listener.start()
 
     # простий лог кожного пакета (можна прибрати)
     def _on_packet(msg, addr):
         print(f"[UDP] From {addr}: {msg}")
+        if recorder is not None:
+            recorder.record_packet(msg, addr)
     listener.on_packet = _on_packet
 
     # запускаємо фоновий монітор і кладемо task у workflow_data диспетчера
@@ -1021,6 +1744,41 @@ async def on_startup(dispatcher: Dispatcher, bot: Bot):
     dispatcher.workflow_data["schedule_tomorrow_task"] = schedule_tomorrow_task
     reminder_task = asyncio.create_task(reminder_scheduler(bot))
     dispatcher.workflow_data["reminder_task"] = reminder_task
+    if SILENT_CHAT_SET:
+        asyncio.create_task(chat_admins.warm(bot, {chat_id for chat_id, _ in SILENT_CHAT_SET}))
+    admin_audit.start(bot)
+    if loop_monitor is not None:
+        loop_monitor.start()
+    if status_snapshot is not None:
+        try:
+            status_snapshot.open()
+            # Версія графіка — з відновлених сигнатур: перший опит їх уже не перезаписує
+            if last_today_signature is not None:
+                status_snapshot.update_schedule("today", (last_today_date, last_today_signature))
+            if last_tomorrow_status is not None:
+                status_snapshot.update_schedule("tomorrow", (last_tomorrow_date, last_tomorrow_status))
+        except OSError:
+            logging.exception("Не вдалося відкрити status snapshot %s", STATUS_SNAPSHOT_PATH)
+    if web_outbox is not None:
+        web_outbox.on_delivered = _on_web_delivered
+        web_outbox.start()
+    if status_api is not None:
+        try:
+            status_api.set_outages(await db.get_outages_since(time.time() - status_api.OUTAGES_KEEP_SEC))
+            await status_api.start()
+        except Exception:
+            logging.exception("Не вдалося запустити status API")
+    if metrics_server is not None:
+        try:
+            await metrics_server.start()
+        except Exception:
+            logging.exception("Не вдалося запустити metrics endpoint")
+    if event_channel is not None:
+        event_channel.on_delivered = _on_web_delivered
+        try:
+            await event_channel.start()
+        except OSError:
+            logging.exception("Не вдалося запустити event channel")
     print("[startup] UDP listener started, monitor and schedule tasks running")
 
 async def on_shutdown(dispatcher: Dispatcher, bot: Bot):
@@ -1029,9 +1787,28 @@ async def on_shutdown(dispatcher: Dispatcher, bot: Bot):
         task = dispatcher.workflow_data.get(key)
         if task:
             task.cancel()
-            with contextlib.suppress(Exception):
+            with contextlib.suppress(Exception, asyncio.CancelledError):
                 await task
+    await admin_audit.stop()
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    await tracer.stop()
+    if recorder is not None:
+        recorder.close()
+    if web_outbox is not None:
+        await web_outbox.stop()
+    if event_channel is not None:
+        await event_channel.stop()
+    if status_api is not None:
+        await status_api.stop()
+    if metrics_server is not None:
+        await metrics_server.stop()
     listener.stop()
+    if listener.last_packet_time:
+        with contextlib.suppress(Exception):
+            await db.save_monitor_state({"last_packet_ts": listener.last_packet_time})
+    if status_snapshot is not None:
+        status_snapshot.close()
     db.close()
     print("[shutdown] Clean exit")
 
@@ -1041,23 +1818,61 @@ async def main():
     if not BOT_TOKEN:
         raise SystemExit("⚠️ Не знайдено BOT_TOKEN. Додай у .env або в код.")
 
+    session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_BASE)) if TELEGRAM_API_BASE else None
     bot = Bot(
         BOT_TOKEN,
+        session=session,
         default=DefaultBotProperties(
             parse_mode="HTML",
             link_preview_is_disabled=True,
         ),
     )
     dp = Dispatcher()
+    dp.message.middleware(CommandThrottleMiddleware(
+        command_answers,
+        commands={
+            "status": lambda _m: "status",
+            "today": lambda _m: "schedule:today",
+            "tomorrow": lambda _m: "schedule:tomorrow",
+        },
+        user_rate=COMMAND_RATE_USER,
+        chat_rate=COMMAND_RATE_CHAT,
+        answer_max_age=COMMAND_THROTTLED_ANSWER_MAX_AGE_SEC,
+        # У заблокованих чатах хендлер сам видаляє команду — не відповідаємо туди з кешу
+        exempt=lambda message: _is_chat_blocked(message.chat.id, message.message_thread_id),
+    ))
     dp.include_router(router)
 
     # Реєструємо lifecycle-хендлери (v3-стиль)
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
 
+    # chat_member не входить у типові оновлення Telegram — просимо явно всі, які обробляємо
+    allowed_updates = dp.resolve_used_update_types()
+
     # Контекстне керування клієнтом бота
     async with bot:
-        await dp.start_polling(bot, allowed_updates=None)
+        if WEBHOOK_URL:
+            dp.update.outer_middleware(ConcurrencyLimitMiddleware(BOT_UPDATE_CONCURRENCY))
+            await run_webhook(
+                dp,
+                bot,
+                public_url=WEBHOOK_URL,
+                path=WEBHOOK_PATH,
+                host=WEBHOOK_HOST,
+                port=WEBHOOK_PORT,
+                secret=WEBHOOK_SECRET,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=allowed_updates,
+            )
+        else:
+            # Якщо раніше був встановлений вебхук, Telegram не віддасть оновлення через getUpdates
+            await bot.delete_webhook(drop_pending_updates=False)
+            await dp.start_polling(
+                bot,
+                allowed_updates=allowed_updates,
+                tasks_concurrency_limit=BOT_UPDATE_CONCURRENCY,
+            )
 
 if __name__ == "__main__":
     try:
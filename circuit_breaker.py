@@ -0,0 +1,82 @@
+import threading
+
+from clock import Clock
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Запит не виконувався: апстрім вважається недоступним."""
+
+
+class CircuitBreaker:
+    """
+    Запобіжник для нестабільного апстріму.
+
+    Після failure_threshold помилок поспіль переходить у стан open і
+    reset_timeout_sec відхиляє запити одразу, не чекаючи мережевого таймауту.
+    Потім пропускає одну пробну спробу (half_open): успіх замикає ланцюг,
+    помилка — знову відкриває його на reset_timeout_sec.
+    Викликається з потоків to_thread, тож стан змінюється під блокуванням.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout_sec: float = 60.0, clock: Clock | None = None) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_sec = reset_timeout_sec
+        self.clock = clock or Clock()
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_inflight = False
+
+        # метрики
+        self.opened_total = 0
+        self.rejected_total = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == STATE_OPEN and self.clock.time() - self._opened_at >= self.reset_timeout_sec:
+                return STATE_HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Чи можна зараз іти в апстрім. У half_open дозволяє лише одну спробу."""
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_OPEN and self.clock.time() - self._opened_at >= self.reset_timeout_sec:
+                self._state = STATE_HALF_OPEN
+                self._probe_inflight = False
+            if self._state == STATE_HALF_OPEN and not self._probe_inflight:
+                self._probe_inflight = True
+                return True
+            self.rejected_total += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._probe_inflight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_inflight = False
+            if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != STATE_OPEN:
+                    self.opened_total += 1
+                self._state = STATE_OPEN
+                self._opened_at = self.clock.time()
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+        }
@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime, tzinfo
+
+
+class Clock:
+    """
+    Джерело часу для фонових циклів бота. За замовчуванням — системний годинник;
+    у replay підміняється на VirtualClock, щоб прогнати добу за секунди.
+    """
+
+    def time(self) -> float:
+        return time.time()
+
+    def now(self, tz: tzinfo) -> datetime:
+        return datetime.fromtimestamp(self.time(), tz=tz)
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """
+    Дискретно-подієвий годинник: sleep() не чекає реального часу. Час
+    перемотується на найближче пробудження, щойно всі корутини, що
+    користуються цим годинником, заснули на ньому (або завершились).
+    Поки хоч одна з них чекає на щось інше (потік SQLite, мережу), час стоїть —
+    тож порядок подій не залежить від швидкості машини.
+    """
+
+    def __init__(self, start_ts: float) -> None:
+        self._now = float(start_ts)
+        self._sleepers: list[tuple[float, int, asyncio.Future, asyncio.Task | None]] = []
+        self._seq = itertools.count()
+        self._participants: set[asyncio.Task] = set()
+        self._sleeping: set[asyncio.Task] = set()
+        self._changed = asyncio.Event()
+
+        # метрики
+        self.wakeups = 0
+
+    def time(self) -> float:
+        return self._now
+
+    def attach(self, task: asyncio.Task) -> None:
+        """
+        Реєструє задачу, на яку годинник чекатиме перед кожним кроком часу.
+        Задачі, що викликали sleep(), реєструються самі; явна реєстрація потрібна,
+        щоб час не пішов уперед, поки задача ще не дійшла до першого sleep().
+        """
+        if task not in self._participants:
+            self._participants.add(task)
+            task.add_done_callback(self._on_task_done)
+
+    async def sleep(self, seconds: float) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self.attach(task)
+            self._sleeping.add(task)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self._now + max(0.0, seconds), next(self._seq), future, task))
+        self._changed.set()
+        try:
+            await future
+        finally:
+            if task is not None:
+                self._sleeping.discard(task)
+                self._changed.set()
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._participants.discard(task)
+        self._sleeping.discard(task)
+        self._changed.set()
+
+    async def _wait_quiescent(self) -> None:
+        while not self._participants or not self._participants <= self._sleeping:
+            self._changed.clear()
+            await self._changed.wait()
+
+    async def run_until(self, end_ts: float) -> None:
+        """Крутить віртуальний час до end_ts (викликати з окремої задачі-драйвера)."""
+        while True:
+            await self._wait_quiescent()
+            while self._sleepers and self._sleepers[0][2].done():
+                heapq.heappop(self._sleepers)  # скасовані sleep()
+            if not self._sleepers or self._sleepers[0][0] > end_ts:
+                self._now = max(self._now, end_ts)
+                return
+            deadline = self._sleepers[0][0]
+            self._now = max(self._now, deadline)
+            # Будимо всіх, чий час настав, у порядку постановки. Розбуджена задача
+            # одразу перестає вважатися сплячою, тож наступний крок дочекається її
+            while self._sleepers and self._sleepers[0][0] <= self._now:
+                _, _, future, task = heapq.heappop(self._sleepers)
+                if not future.done():
+                    future.set_result(None)
+                    self.wakeups += 1
+                    if task is not None:
+                        self._sleeping.discard(task)
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject
+
+
+class RequestCoalescer:
+    """
+    Об'єднує однакові одночасні запити: поки відповідь для ключа обчислюється,
+    інші виклики чекають на той самий результат, а ще ttl секунд після цього
+    отримують його з пам'яті.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._results: dict[str, tuple[float, Any]] = {}
+
+        # метрики
+        self.computed = 0
+        self.coalesced = 0
+        self.cached = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        cached = self._results.get(key)
+        if cached is not None and time.monotonic() - cached[0] <= ttl:
+            self.cached += 1
+            return cached[1]
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # Щоб не було «Future exception was never retrieved», якщо ніхто не чекав
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self._results[key] = (time.monotonic(), result)
+            self.computed += 1
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def peek(self, key: str, max_age: float) -> Any | None:
+        """Останній обчислений результат, не старший за max_age секунд (для відповіді при тротлінгу)."""
+        cached = self._results.get(key)
+        if cached is None or time.monotonic() - cached[0] > max_age:
+            return None
+        return cached[1]
+
+    def stats(self) -> dict[str, int]:
+        return {"computed": self.computed, "coalesced": self.coalesced, "cached": self.cached}
+
+
+class _TokenBuckets:
+    def __init__(self, burst: int, per_sec: float, max_keys: int = 10000) -> None:
+        self.burst = burst
+        self.per_sec = per_sec
+        self.max_keys = max_keys
+        self._buckets: dict[Any, tuple[float, float]] = {}
+
+    def take(self, key: Any, now: float) -> bool:
+        tokens, last = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.per_sec)
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._prune(now)
+        return allowed
+
+    def _prune(self, now: float) -> None:
+        # Повні відра нічим не відрізняються від відсутніх — їх можна забути
+        refill_sec = self.burst / self.per_sec if self.per_sec > 0 else float("inf")
+        self._buckets = {key: value for key, value in self._buckets.items() if now - value[1] < refill_sec}
+
+
+def parse_rate(raw: str, default: tuple[int, float]) -> tuple[int, float]:
+    """'3/30' → (3, 0.1): до трьох запитів одразу, далі один на 10 с."""
+    try:
+        count, _, period = raw.partition("/")
+        burst = int(count)
+        seconds = float(period or 1)
+        if burst <= 0 or seconds <= 0:
+            raise ValueError(raw)
+        return burst, burst / seconds
+    except ValueError:
+        logging.warning("Некоректний ліміт '%s', використовую %s", raw, default)
+        return default
+
+
+class CommandThrottleMiddleware(BaseMiddleware):
+    """
+    Обмежує частоту команд на користувача і на чат (token bucket).
+    Якщо ліміт вичерпано, хендлер не викликається: користувач отримує останню
+    обчислену відповідь з коалесера, не старшу за answer_max_age секунд
+    (або нічого, якщо свіжої немає — застарілий графік чи статус гірший за мовчання).
+    """
+
+    def __init__(
+        self,
+        coalescer: RequestCoalescer,
+        commands: dict[str, Callable[[Message], str]],
+        user_rate: tuple[int, float],
+        chat_rate: tuple[int, float],
+        answer_max_age: float,
+        exempt: Callable[[Message], bool] | None = None,
+    ) -> None:
+        self.coalescer = coalescer
+        # команда → функція, що повертає ключ коалесера для цього повідомлення
+        self.commands = commands
+        self.user_buckets = _TokenBuckets(*user_rate)
+        self.chat_buckets = _TokenBuckets(*chat_rate)
+        self.answer_max_age = answer_max_age
+        self.exempt = exempt
+        self.throttled = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Message) or not event.text or not event.text.startswith("/"):
+            return await handler(event, data)
+        command = event.text.split(maxsplit=1)[0][1:].split("@", 1)[0].lower()
+        key_for = self.commands.get(command)
+        if key_for is None or (self.exempt is not None and self.exempt(event)):
+            return await handler(event, data)
+
+        now = time.monotonic()
+        user_id = event.from_user.id if event.from_user else None
+        # Обидва відра списуємо завжди, щоб спам з одного акаунта не обходив ліміт чату
+        user_ok = user_id is None or self.user_buckets.take(user_id, now)
+        chat_ok = self.chat_buckets.take((event.chat.id, event.message_thread_id), now)
+        if user_ok and chat_ok:
+            return await handler(event, data)
+
+        self.throttled += 1
+        cached = self.coalescer.peek(key_for(event), self.answer_max_age)
+        if cached is not None:
+            await event.answer(cached)
+        return None
@@ -0,0 +1,217 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from storage import Database
+
+
+class EventChannelServer:
+    """
+    Постійний локальний канал подій для веб-додатка (NDJSON поверх Unix-сокета або TCP 127.0.0.1).
+
+    Протокол:
+      клієнт → {"token": "...", "since": 123}\\n   (since — останній отриманий seq, 0 якщо вперше)
+      сервер → {"seq": 124, "type": "...", ...}\\n  (пропущені події з outbox, далі — живі)
+      сервер → {"ping": 1700000000.0, "seq": 124}\\n (heartbeat, seq — останній відомий номер)
+
+    Номер події (seq) — це id у таблиці web_outbox, тож після перепідключення
+    клієнт отримує все, що пропустив, у тому самому порядку. Клієнт без історії
+    (since = 0) починає з поточного кінця outbox. Під час replay відправляються
+    всі події після since, молодші за max_age_sec, незалежно від статусу: подію,
+    записану в обірваний сокет, клієнт міг так і не обробити (дублікати він
+    відкидає сам за збереженим seq).
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        token: str,
+        socket_path: Path | None = None,
+        host: str = "127.0.0.1",
+        port: int | None = None,
+        heartbeat_sec: float = 15.0,
+        mark_delivered: bool = True,
+        retention_sec: float = 24 * 3600,
+        max_age_sec: float = 6 * 3600,
+    ) -> None:
+        if socket_path is None and port is None:
+            raise ValueError("Потрібно задати socket_path або port")
+        self.db = database
+        self.token = token
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.heartbeat_sec = heartbeat_sec
+        # Позначати подію доставленою в outbox, щойно її записано хоча б одному клієнту
+        self.mark_delivered = mark_delivered
+        # Скільки зберігати доставлені події (вікно, в межах якого клієнт може відновитися)
+        self.retention_sec = retention_sec
+        # Старіші за це події під час replay не відправляються (як у web_outbox_worker)
+        self.max_age_sec = max_age_sec
+        self._last_prune_ts = 0.0
+
+        self._server: asyncio.AbstractServer | None = None
+        self._pump_task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._last_seq = 0
+        self._subscribers: set[asyncio.Queue] = set()
+        # Викликається з (payload, delivered_ts), коли подію вперше записано клієнту
+        self.on_delivered: Callable[[dict[str, Any], float], None] | None = None
+
+        # метрики
+        self.events_sent_total = 0
+        self.connections_total = 0
+
+    @property
+    def subscribers_count(self) -> int:
+        return len(self._subscribers)
+
+    # ---------- керування ----------
+    async def start(self) -> None:
+        self._last_seq = await self.db.get_last_web_event_seq()
+        if self.socket_path is not None:
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            with contextlib.suppress(FileNotFoundError):
+                self.socket_path.unlink()
+            self._server = await asyncio.start_unix_server(self._handle_client, path=str(self.socket_path))
+            with contextlib.suppress(OSError):
+                os.chmod(self.socket_path, 0o660)
+            where = str(self.socket_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, host=self.host, port=self.port)
+            where = f"{self.host}:{self.port}"
+        self._pump_task = asyncio.create_task(self._pump())
+        logging.info("Event channel listening on %s (seq=%s)", where, self._last_seq)
+
+    async def stop(self) -> None:
+        if self._pump_task:
+            self._pump_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._pump_task
+            self._pump_task = None
+        # Сигнал клієнтським обробникам завершитись (None — маркер зупинки)
+        for queue in list(self._subscribers):
+            queue.put_nowait(None)
+        await asyncio.sleep(0)
+        if self._server:
+            self._server.close()
+            with contextlib.suppress(Exception):
+                await self._server.wait_closed()
+            self._server = None
+        if self.socket_path is not None:
+            with contextlib.suppress(FileNotFoundError):
+                self.socket_path.unlink()
+
+    def wake(self) -> None:
+        """Будить канал після додавання нової події в outbox."""
+        self._wakeup.set()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "subscribers": self.subscribers_count,
+            "last_seq": self._last_seq,
+            "events_sent_total": self.events_sent_total,
+            "connections_total": self.connections_total,
+        }
+
+    # ---------- розсилка ----------
+    async def _pump(self) -> None:
+        while True:
+            try:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while True:
+                    events = await self.db.get_web_events_since(self._last_seq)
+                    if not events:
+                        break
+                    for event in events:
+                        self._last_seq = int(event["id"])
+                        for queue in self._subscribers:
+                            queue.put_nowait(event)
+                await self._maybe_prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("Event channel pump error")
+                await asyncio.sleep(1.0)
+
+    async def _maybe_prune(self) -> None:
+        now = time.time()
+        if now - self._last_prune_ts < 3600:
+            return
+        self._last_prune_ts = now
+        await self.db.prune_web_outbox(now - self.retention_sec)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        try:
+            try:
+                hello_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+                hello = json.loads(hello_line or b"{}")
+            except (asyncio.TimeoutError, ValueError):
+                return
+            if not isinstance(hello, dict) or not self.token or hello.get("token") != self.token:
+                writer.write(b'{"error":"forbidden"}\n')
+                await writer.drain()
+                return
+
+            self.connections_total += 1
+            # Реєструємось ДО читання історії, щоб не загубити подій між replay і live
+            self._subscribers.add(queue)
+            sent_seq = int(hello.get("since") or 0)
+            if sent_seq <= 0:
+                # Клієнт без історії: уся збережена історія йому не потрібна
+                sent_seq = await self.db.get_last_web_event_seq()
+            while True:
+                backlog = await self.db.get_web_events_since(sent_seq)
+                if not backlog:
+                    break
+                min_created = time.time() - self.max_age_sec
+                for event in backlog:
+                    if float(event.get("created_at") or 0) < min_created:
+                        sent_seq = int(event["id"])
+                        continue
+                    sent_seq = await self._send_event(writer, event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=self.heartbeat_sec)
+                except asyncio.TimeoutError:
+                    writer.write(json.dumps({"ping": time.time(), "seq": sent_seq}).encode("utf-8") + b"\n")
+                    await writer.drain()
+                    continue
+                if event is None:
+                    break
+                if int(event["id"]) <= sent_seq:
+                    continue
+                sent_seq = await self._send_event(writer, event)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logging.exception("Event channel client error")
+        finally:
+            self._subscribers.discard(queue)
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def _send_event(self, writer: asyncio.StreamWriter, event: dict[str, Any]) -> int:
+        seq = int(event["id"])
+        line = json.dumps({**event["payload"], "seq": seq}, ensure_ascii=False)
+        writer.write(line.encode("utf-8") + b"\n")
+        await writer.drain()
+        self.events_sent_total += 1
+        if event.get("status") == "pending":
+            delivered_ts = time.time()
+            # Подія з _pump спільна для всіх клієнтів — фіксуємо доставку лише раз
+            event["status"] = "delivered"
+            if self.mark_delivered:
+                await self.db.mark_web_event_delivered(seq, delivered_ts)
+            if self.on_delivered is not None:
+                self.on_delivered(event["payload"], delivered_ts)
+        return seq
@@ -0,0 +1,73 @@
+import io
+import logging
+from dataclasses import dataclass
+
+# Палітри, які пробуємо по черзі, поки PNG не вкладеться в бюджет
+PALETTE_STEPS = (256, 128, 64, 32)
+# Якості WebP для мініатюри, від кращої до меншої
+THUMBNAIL_QUALITY_STEPS = (70, 55, 40, 25)
+
+
+@dataclass(frozen=True)
+class CompactResult:
+    data: bytes
+    original_size: int
+    detail: str
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def describe(self) -> str:
+        ratio = self.size / self.original_size * 100 if self.original_size else 100.0
+        return f"{self.original_size} → {self.size} байт ({ratio:.0f}%, {self.detail})"
+
+
+def compact_png(png: bytes, budget_bytes: int) -> CompactResult:
+    """
+    Перетворює повнокольоровий PNG у палітровий. Таймлайн складається з плоских
+    кольорів і градієнтів, тож 256 (а часто й 64) кольорів візуально не відрізняються.
+    Зменшує палітру, доки файл не вкладеться в budget_bytes; оригінал повертається,
+    якщо він і так менший.
+    """
+    from PIL import Image
+
+    original_size = len(png)
+    if original_size <= budget_bytes // 2:
+        return CompactResult(png, original_size, "без змін")
+
+    with Image.open(io.BytesIO(png)) as source:
+        image = source.convert("RGB")
+
+    best = CompactResult(png, original_size, "оригінал")
+    for colors in PALETTE_STEPS:
+        quantized = image.quantize(colors=colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+        buffer = io.BytesIO()
+        quantized.save(buffer, format="PNG", optimize=True)
+        if buffer.tell() < best.size:
+            best = CompactResult(buffer.getvalue(), original_size, f"{colors} кольорів")
+        if best.size <= budget_bytes:
+            break
+    if best.size > budget_bytes:
+        logging.warning("Скріншот не вклався в бюджет %s байт: %s", budget_bytes, best.describe())
+    return best
+
+
+def make_thumbnail(png: bytes, width: int, budget_bytes: int) -> CompactResult:
+    """Невелика WebP-мініатюра для push-сповіщень (поле image у showNotification)."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(png)) as source:
+        image = source.convert("RGB")
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+    result = None
+    for quality in THUMBNAIL_QUALITY_STEPS:
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+        result = CompactResult(buffer.getvalue(), len(png), f"webp q{quality}, {image.width}px")
+        if result.size <= budget_bytes:
+            break
+    return result
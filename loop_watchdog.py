@@ -0,0 +1,101 @@
+import asyncio
+import contextlib
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from metrics import LOOP_LAG_QUANTILE, LOOP_LAG_SECONDS, LOOP_STALLS, REGISTRY
+
+
+class LoopLagMonitor:
+    """
+    Вимірює затримку планування циклу asyncio і ловить блокуючі виклики.
+
+    Корутина-семплер спить interval_sec і фіксує, наскільки пізніше її розбудили —
+    це і є лаг циклу. Окремий потік-сторож стежить за «серцебиттям» семплера: якщо
+    цикл не встиг прокинутись довше ніж на threshold_sec, сторож знімає стек потоку
+    циклу (що саме зараз блокує) і пише його в лог — один раз на кожну зупинку.
+    """
+
+    def __init__(self, interval_sec: float = 0.5, threshold_sec: float = 0.25, window: int = 600) -> None:
+        self.interval_sec = interval_sec
+        self.threshold_sec = threshold_sec
+        self._samples: deque[float] = deque(maxlen=window)
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._loop_thread_id: int | None = None
+        self._heartbeat = time.monotonic()
+        self._stall_reported = False
+
+        # метрики
+        self.stalls_total = 0
+        self.max_lag_sec = 0.0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        REGISTRY.add_collector(self._collect)
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join, 2.0)
+            self._thread = None
+
+    def percentiles(self) -> dict[str, float]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {}
+        result = {name: samples[min(len(samples) - 1, int(q * len(samples)))] for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))}
+        result["max"] = samples[-1]
+        return result
+
+    # ---------- семплер (потік циклу) ----------
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval_sec
+            self._heartbeat = expected
+            await asyncio.sleep(self.interval_sec)
+            lag = max(0.0, time.monotonic() - expected)
+            self._samples.append(lag)
+            self.max_lag_sec = max(self.max_lag_sec, lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.threshold_sec:
+                logging.warning("Event loop lag %.0f ms", lag * 1000)
+
+    def _collect(self) -> None:
+        for quantile, value in self.percentiles().items():
+            LOOP_LAG_QUANTILE.set(value, quantile=quantile)
+
+    # ---------- сторож (окремий потік) ----------
+    def _watch(self) -> None:
+        check_every = max(0.05, self.threshold_sec / 2)
+        while not self._stop.wait(check_every):
+            # _heartbeat — момент, коли семплер мав прокинутись
+            overdue = time.monotonic() - self._heartbeat
+            if overdue < self.threshold_sec:
+                self._stall_reported = False
+                continue
+            if self._stall_reported:
+                continue
+            self._stall_reported = True
+            self.stalls_total += 1
+            LOOP_STALLS.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(стек недоступний)\n"
+            logging.warning("Event loop blocked for %.0f ms, loop thread stack:\n%s", overdue * 1000, stack.rstrip())
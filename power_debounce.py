@@ -0,0 +1,107 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class PowerTransition:
+    down: bool
+    since: float            # коли сирий сигнал уперше показав новий стан
+    suppressed_flaps: int   # скільки коротких перемикань згорнуто з часу попереднього сповіщення
+    flapping: bool          # перехід підтверджено у режимі нестабільного живлення
+
+
+class PowerDebouncer:
+    """
+    Стабілізує сирий сигнал «є/немає світла» перед розсилкою сповіщень.
+
+    Новий стан має протриматися settle_sec, інакше перехід вважається флепом
+    і лише рахується. Якщо за flap_window_sec сирих перемикань набралося
+    flap_threshold і більше — вмикається режим нестабільного живлення, де
+    вікно стабілізації збільшується до flap_settle_sec, а всі проміжні
+    перемикання згортаються в одну підсумкову подію.
+    """
+
+    def __init__(
+        self,
+        settle_sec: float = 10.0,
+        flap_window_sec: float = 900.0,
+        flap_threshold: int = 4,
+        flap_settle_sec: float = 180.0,
+    ) -> None:
+        self.settle_sec = settle_sec
+        self.flap_window_sec = flap_window_sec
+        self.flap_threshold = flap_threshold
+        self.flap_settle_sec = flap_settle_sec
+
+        self._pending_down: bool | None = None
+        self._pending_since = 0.0
+        self._pending_detected_at = 0.0
+        self._flips: deque[float] = deque()
+        self._suppressed_since_notify = 0
+
+        # лічильники
+        self.suppressed_total = 0
+        self.confirmed_total = 0
+
+    def is_flapping(self, now: float) -> bool:
+        self._prune(now)
+        return len(self._flips) >= self.flap_threshold
+
+    def current_settle_sec(self, now: float) -> float:
+        return self.flap_settle_sec if self.is_flapping(now) else self.settle_sec
+
+    def observe(
+        self,
+        raw_down: bool,
+        confirmed_down: bool,
+        now: float,
+        since: float | None = None,
+    ) -> PowerTransition | None:
+        """
+        raw_down — поточний сирий стан, confirmed_down — останній підтверджений
+        (той, про який уже сповістили). Повертає PowerTransition, коли новий стан
+        протримався достатньо довго, інакше None.
+        """
+        if raw_down == confirmed_down:
+            if self._pending_down is not None:
+                # Перехід не втримався — це флеп, сповіщати не треба
+                self._pending_down = None
+                self._flips.append(now)
+                self._suppressed_since_notify += 1
+                self.suppressed_total += 1
+            return None
+
+        if self._pending_down != raw_down:
+            self._pending_down = raw_down
+            self._pending_since = since if since is not None else now
+            self._pending_detected_at = now
+            self._flips.append(now)
+
+        if now - self._pending_detected_at < self.current_settle_sec(now):
+            return None
+
+        transition = PowerTransition(
+            down=raw_down,
+            since=self._pending_since,
+            suppressed_flaps=self._suppressed_since_notify,
+            flapping=self.is_flapping(now),
+        )
+        self._pending_down = None
+        self._suppressed_since_notify = 0
+        self.confirmed_total += 1
+        return transition
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "suppressed_total": self.suppressed_total,
+            "confirmed_total": self.confirmed_total,
+            "pending": self._pending_down is not None,
+            "suppressed_since_notify": self._suppressed_since_notify,
+            "recent_flips": len(self._flips),
+        }
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.flap_window_sec
+        while self._flips and self._flips[0] < cutoff:
+            self._flips.popleft()
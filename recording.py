@@ -0,0 +1,84 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any
+
+from clock import Clock
+
+
+class EventRecorder:
+    """
+    Пише вхідні події бота у JSONL для подальшого детермінованого replay:
+      {"t": ..., "kind": "meta", ...}               — параметри запуску (перший рядок)
+      {"t": ..., "kind": "yasno", "data": {...}}    — відповідь Yasno (лише коли змінилась)
+      {"t": ..., "kind": "yasno_error", "error": ""}
+      {"t": ..., "kind": "packet", "msg": "", "addr": ""}
+
+    Викликається з потоку UDP-лісенера та з потоків to_thread, тому пише під блокуванням.
+    """
+
+    def __init__(self, path: Path, clock: Clock | None = None) -> None:
+        self.path = path
+        self.clock = clock or Clock()
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_yasno: str | None = None
+
+        # метрики
+        self.records_total = 0
+
+    def open(self, **meta: Any) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self._write({"kind": "meta", **meta})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def record_yasno(self, data: dict[str, Any] | None, error: BaseException | None) -> None:
+        if error is not None:
+            self._last_yasno = None
+            self._write({"kind": "yasno_error", "error": f"{type(error).__name__}: {error}"})
+            return
+        encoded = json.dumps(data, ensure_ascii=False, sort_keys=True)
+        # Yasno опитується кілька разів на хвилину, а змінюється кілька разів на день
+        if encoded == self._last_yasno:
+            return
+        self._last_yasno = encoded
+        self._write({"kind": "yasno", "data": data})
+
+    def record_packet(self, msg: str, addr: Any) -> None:
+        host = addr[0] if isinstance(addr, tuple) else str(addr)
+        self._write({"kind": "packet", "msg": msg, "addr": host})
+
+    def _write(self, record: dict[str, Any]) -> None:
+        line = json.dumps({"t": round(self.clock.time(), 3), **record}, ensure_ascii=False)
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(line + "\n")
+                self.records_total += 1
+            except OSError:
+                logging.exception("Не вдалося записати подію у %s", self.path)
+
+
+def read_recording(path: Path) -> list[dict[str, Any]]:
+    """Читає записані події по порядку часу (рядки, що не розбираються, пропускає)."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logging.warning("%s:%s: пошкоджений рядок пропущено", path, line_no)
+    # Потоки пишуть незалежно, тож у файлі можливі дрібні перестановки
+    records.sort(key=lambda record: record.get("t", 0.0))
+    return records
@@ -0,0 +1,48 @@
+import time
+from typing import Any, Callable
+
+
+class ScheduleMessageCache:
+    """
+    Готовий HTML-текст розкладу для кожного scope, ключований сигнатурою графіка.
+    Монітори графіка оновлюють його на кожному опитуванні, тож /today і /tomorrow
+    зазвичай лише беруть рядок зі словника.
+
+    signature(outages_info) має повертати кортеж, перший елемент якого — дата
+    у форматі ISO; formatter(outages_info) будує сам текст.
+    """
+
+    def __init__(
+        self,
+        max_age_sec: float,
+        signature: Callable[[dict[str, Any]], tuple],
+        formatter: Callable[[dict[str, Any]], str],
+    ) -> None:
+        self.max_age_sec = max_age_sec
+        self.signature = signature
+        self.formatter = formatter
+        self._entries: dict[str, tuple[tuple, str, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, scope: str, outages_info: dict[str, Any]) -> str:
+        """Повертає текст для знімка графіка, форматуючи його лише при зміні сигнатури."""
+        signature = self.signature(outages_info)
+        entry = self._entries.get(scope)
+        if entry is not None and entry[0] == signature:
+            self._entries[scope] = (signature, entry[1], time.monotonic())
+            return entry[1]
+        text = self.formatter(outages_info)
+        self._entries[scope] = (signature, text, time.monotonic())
+        return text
+
+    def lookup(self, scope: str, expected_date) -> str | None:
+        entry = self._entries.get(scope)
+        if entry is None or time.monotonic() - entry[2] > self.max_age_sec or entry[0][0] != expected_date.isoformat():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,19 @@
+import datetime as dt
+from dataclasses import dataclass
+from zoneinfo import ZoneInfo
+
+
+@dataclass(frozen=True)
+class Slot:
+    start_min: int
+    end_min: int     # невключно
+    type: str        # "Definite", "Possible", "NotPlanned", ...
+
+    def as_time_range(self, date: dt.date, tz: ZoneInfo) -> tuple[dt.datetime, dt.datetime]:
+        start = dt.datetime.combine(date, dt.time.min, tzinfo=tz) + dt.timedelta(minutes=self.start_min)
+        end = dt.datetime.combine(date, dt.time.min, tzinfo=tz) + dt.timedelta(minutes=self.end_min)
+        return start, end
+
+    @property
+    def is_outage(self) -> bool:
+        return self.type != "NotPlanned"
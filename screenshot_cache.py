@@ -0,0 +1,119 @@
+import contextlib
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+
+class ScreenshotCache:
+    """
+    Дисковий кеш скріншотів, адресований вмістом: ім'я файлу — хеш ключа
+    (scope, сигнатура графіка, бекенд/тема, viewport ...). Повторний рендер
+    незміненого графіка — це лише пошук файлу, і кеш переживає перезапуск бота.
+
+    Розмір обмежено max_bytes; при переповненні видаляються найдавніше
+    використані файли (LRU за часом останнього звернення, mtime на диску).
+    """
+
+    SUFFIX = ".png"
+
+    def __init__(self, directory: Path, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+
+        # метрики
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def owns(self, path: Path | None) -> bool:
+        """True, якщо файл належить кешу (його не можна видаляти після відправки)."""
+        return path is not None and path.parent == self.directory
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(self.SUFFIX):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[: -len(self.SUFFIX)], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._loaded = True
+        self._evict()
+
+    def get(self, key: str) -> Path | None:
+        with self._lock:
+            self._load()
+            path = self.path_for(key)
+            if key not in self._entries or not path.exists():
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            with contextlib.suppress(OSError):
+                os.utime(path)
+            self.hits += 1
+            return path
+
+    def put(self, key: str, source: Path) -> Path:
+        """Переносить щойно відрендерений файл у кеш і повертає шлях до кешованої копії."""
+        with self._lock:
+            self._load()
+            target = self.path_for(key)
+            tmp = target.with_suffix(".tmp")
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, target)
+            self._forget(key)
+            size = target.stat().st_size
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict(keep=key)
+            return target
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            self._load()
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _forget(self, key: str) -> None:
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self, keep: str | None = None) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            self._forget(key)
+            with contextlib.suppress(OSError):
+                self.path_for(key).unlink()
+            self.evictions += 1
+            logging.debug("Screenshot cache evicted %s", key)
+
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Відтворювані мікробенчмарки розрахунку графіків і SQLite-сховища.
+
+Дані синтетичні (фіксований seed), тож результати між запусками порівнювані.
+Кожен кейс калібрується до ~--min-time секунд на раунд і повторюється --rounds
+разів; у звіт потрапляють min/median/mean часу одного виклику (мкс). Регресії
+рахуються за min — він найменш чутливий до шуму сусідніх процесів.
+
+Запуск (з кореня репозиторію):
+  python scripts/benchmark.py                              # вивести результати
+  python scripts/benchmark.py --save-baseline              # записати benchmarks/baseline.json
+  python scripts/benchmark.py --compare --fail-on-regression
+  python scripts/benchmark.py -k nearest --rounds 9
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import atexit
+import datetime as dt
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from harness_common import bot_env, make_payload
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+GROUP_ID = "3.1"
+
+# Модуль bot читає конфіг з оточення під час імпорту — ізолюємо його від робочих data/
+_TMP = Path(tempfile.mkdtemp(prefix="svitlo-bench-"))
+atexit.register(shutil.rmtree, _TMP, ignore_errors=True)
+os.environ.update(bot_env(_TMP, "0:benchmark", YASNO_GROUP=GROUP_ID, SCREENSHOT_CACHE_DIR="", SCREENSHOT_THUMBNAIL_DIR=""))
+sys.path.insert(0, str(ROOT))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарки розрахунку графіків і сховища.")
+    parser.add_argument("-k", dest="select", help="Запускати лише кейси, що містять цей підрядок.")
+    parser.add_argument("--rounds", type=int, default=5, help="Кількість раундів на кейс.")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Мінімальна тривалість раунду (сек).")
+    parser.add_argument("--seed", type=int, default=20240601, help="Seed генератора синтетичних графіків.")
+    parser.add_argument("--output", type=Path, help="Куди записати результати (JSON).")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Файл базових результатів.")
+    parser.add_argument("--save-baseline", action="store_true", help="Перезаписати базові результати.")
+    parser.add_argument("--compare", action="store_true", help="Порівняти з базовими результатами.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Допустиме сповільнення min (0.25 = +25%%).")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Код виходу 1, якщо є регресії.")
+    return parser.parse_args()
+
+
+# ───────────────── вимірювання ─────────────────
+def measure(func: Callable[[], Any], rounds: int, min_time: float) -> dict[str, Any]:
+    func()  # прогрів (кеші, ліниві імпорти)
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 4 or loops >= 1 << 20:
+            break
+        loops *= 2
+    loops = max(1, int(loops * (min_time / max(elapsed, 1e-9))))
+
+    per_call: list[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        per_call.append((time.perf_counter() - started) / loops * 1e6)
+    return {
+        "loops": loops,
+        "rounds": rounds,
+        "min_us": round(min(per_call), 3),
+        "median_us": round(statistics.median(per_call), 3),
+        "mean_us": round(statistics.fmean(per_call), 3),
+        "stdev_us": round(statistics.stdev(per_call), 3) if len(per_call) > 1 else 0.0,
+    }
+
+
+def build_cases(seed: int) -> dict[str, Callable[[], Any]]:
+    import bot
+    from storage import Database
+
+    rng = random.Random(seed)
+    tz = bot.TZ
+    now = dt.datetime(2024, 6, 1, 17, 40, tzinfo=tz)
+    payload = make_payload(rng, now.date(), GROUP_ID)
+    yasno = bot.yasno
+    today_block = payload[GROUP_ID]["today"]
+    today = yasno._day_outages(today_block)
+    tomorrow = yasno._day_outages(payload[GROUP_ID]["tomorrow"])
+    segments = bot._extract_plan_segments(today, tomorrow)
+
+    loop = asyncio.new_event_loop()
+    database = Database(_TMP / "bench.db")
+    # Реалістичний обсяг історії: ~3 відключення на день за пів року
+    history_start = now.timestamp() - 180 * 86400
+    database._conn.executemany(
+        "INSERT INTO outages(start_ts, end_ts, created_at, updated_at) VALUES (?, ?, ?, ?);",
+        [(ts, ts + 7200, ts, ts + 7200) for ts in (history_start + i * 28800 for i in range(540))],
+    )
+    schedule_dates = [now.date() + dt.timedelta(days=i) for i in range(16)]
+    for day in schedule_dates:
+        loop.run_until_complete(database.upsert_schedule(day, today["status"], today["outages"], today["raw_slots"]))
+    counter = iter(range(1 << 62))
+
+    def db_upsert_schedule() -> None:
+        day = schedule_dates[next(counter) % len(schedule_dates)]
+        loop.run_until_complete(
+            database.upsert_schedule(day, today["status"], today["outages"], today["raw_slots"])
+        )
+
+    def db_upsert_schedule_with_event() -> None:
+        event = {"type": "schedule_updated", "title": "Графік", "body": "", "data": {"scope": "today"}}
+        loop.run_until_complete(
+            database.upsert_schedule(now.date(), today["status"], today["outages"], today["raw_slots"], web_event=event)
+        )
+
+    return {
+        "yasno.day_outages": lambda: yasno._day_outages(today_block),
+        "yasno.nearest_outage_message": lambda: yasno.get_nearest_outage_message(now=now, data_override=payload),
+        "yasno.nearest_restore_message": lambda: yasno.get_nearest_restore_message(now=now, data_override=payload),
+        "bot.build_reminder_events": lambda: bot._build_reminder_events(segments, now),
+        "bot.build_today_message": lambda: bot.build_today_message(today),
+        "db.upsert_schedule": db_upsert_schedule,
+        "db.upsert_schedule_with_event": db_upsert_schedule_with_event,
+        "db.get_active_outage": lambda: loop.run_until_complete(database.get_active_outage()),
+        "db.get_outages_since": lambda: loop.run_until_complete(database.get_outages_since(now.timestamp() - 7 * 86400)),
+        "db.get_schedule": lambda: loop.run_until_complete(database.get_schedule(now.date(), tz)),
+        "db.get_schedules": lambda: loop.run_until_complete(database.get_schedules(schedule_dates[0], schedule_dates[1], tz)),
+    }
+
+
+# ───────────────── звіт і порівняння ─────────────────
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    regressions = []
+    print(f"\n{'case (min per call)':<34} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, current in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            print(f"{name:<34} {'—':>12} {current['min_us']:>10.1f}us {'new':>9}")
+            continue
+        change = current["min_us"] / base["min_us"] - 1 if base["min_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<34} {base['min_us']:>10.1f}us {current['min_us']:>10.1f}us {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    args = parse_args()
+    cases = build_cases(args.seed)
+    if args.select:
+        cases = {name: func for name, func in cases.items() if args.select in name}
+
+    results: dict[str, Any] = {
+        "created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "seed": args.seed,
+        "cases": {},
+    }
+    for name, func in cases.items():
+        stats = measure(func, args.rounds, args.min_time)
+        results["cases"][name] = stats
+        print(f"{name:<34} median {stats['median_us']:>10.1f}us  min {stats['min_us']:>10.1f}us  ({stats['loops']} loops)")
+
+    text = json.dumps(results, ensure_ascii=False, indent=2) + "\n"
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text, encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(text, encoding="utf-8")
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"\nBaseline {args.baseline} not found (run with --save-baseline first)")
+            return 1
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Мінімальний фейковий Bot API сервер для локальної перевірки webhook-режиму бота.
+
+Відповідає на виклики бота (getMe, setWebhook, sendMessage, ...) і, якщо задано
+--updates, після реєстрації вебхука надсилає на нього N оновлень з командою
+та міряє час від POST оновлення до відповіді бота (sendMessage/sendPhoto у той чат).
+getUpdates віддає оновлення з черги (enqueue_update) для перевірки в режимі polling;
+--retry-after-rate змушує частину sendMessage/sendPhoto відповідати 429 (RetryAfter).
+Клас FakeTelegram використовує також scripts/load_test.py.
+
+Запуск:
+  python scripts/fake_telegram_server.py --port 8081 --updates 200 --text /status
+  TELEGRAM_API_BASE=http://127.0.0.1:8081 WEBHOOK_URL=http://127.0.0.1:8080/telegram/webhook \\
+      WEBHOOK_SECRET=test python bot.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import random
+import statistics
+import time
+from typing import Any, Callable
+
+from aiohttp import ClientSession, web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Фейковий Telegram Bot API для перевірки webhook-режиму.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--updates", type=int, default=0, help="Скільки оновлень надіслати після setWebhook.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Скільки оновлень надсилати паралельно.")
+    parser.add_argument("--text", default="/status", help="Текст повідомлення в оновленнях.")
+    parser.add_argument("--chat-id", type=int, default=-1001, help="Базовий chat_id (кожне оновлення — свій чат).")
+    parser.add_argument("--reply-timeout", type=float, default=15.0, help="Скільки чекати на відповідь бота (сек).")
+    parser.add_argument("--retry-after-rate", type=float, default=0.0, help="Частка надсилань, що отримують 429 (0..1).")
+    parser.add_argument("--retry-after-sec", type=int, default=1, help="retry_after у відповіді 429 (сек).")
+    parser.add_argument("--seed", type=int, default=1, help="Seed для випадкових 429.")
+    return parser.parse_args(argv)
+
+
+class FakeTelegram:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.webhook_url: str | None = None
+        self.webhook_secret: str | None = None
+        self.webhook_ready = asyncio.Event()
+        self.calls: dict[str, int] = {}
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._waiters: dict[int, asyncio.Future] = {}
+        self._rng = random.Random(args.seed)
+        self._updates: list[dict] = []
+        self._updates_ready = asyncio.Event()
+        # Встановлюється на першому getUpdates — бот запустив polling
+        self.polling = asyncio.Event()
+        # Усі успішні sendMessage/sendPhoto: ts (perf_counter), chat_id, text
+        self.sent: list[dict[str, Any]] = []
+        self.on_send: Callable[[dict[str, Any]], None] | None = None
+        self.retry_after_injected = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post()) if request.can_read_body else {}
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if method in ("sendMessage", "sendPhoto") and self._rng.random() < self.args.retry_after_rate:
+            self.retry_after_injected += 1
+            retry_after = self.args.retry_after_sec
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                },
+                status=429,
+            )
+        result = await self._dispatch(method, params)
+        return web.json_response({"ok": True, "result": result})
+
+    def enqueue_update(self, update: dict) -> None:
+        """Кладе оновлення в чергу, яку бот забирає через getUpdates."""
+        self._updates.append(update)
+        self._updates_ready.set()
+
+    async def _dispatch(self, method: str, params: dict) -> object:
+        if method == "getMe":
+            return BOT_USER
+        if method == "setWebhook":
+            self.webhook_url = str(params.get("url"))
+            self.webhook_secret = params.get("secret_token")
+            self.webhook_ready.set()
+            logging.info("setWebhook %s", self.webhook_url)
+            return True
+        if method == "getUpdates":
+            self.polling.set()
+            offset = int(params.get("offset") or 0)
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]
+            if not self._updates:
+                self._updates_ready.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._updates_ready.wait(), timeout=min(float(params.get("timeout") or 1), 10.0))
+            return self._updates[:100]
+        if method == "getChatAdministrators":
+            return []
+        if method in ("sendMessage", "sendPhoto"):
+            chat_id = int(params.get("chat_id", 0))
+            record = {"ts": time.perf_counter(), "chat_id": chat_id, "text": str(params.get("text") or params.get("caption") or "")}
+            self.sent.append(record)
+            if self.on_send is not None:
+                self.on_send(record)
+            waiter = self._waiters.pop(chat_id, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(time.perf_counter())
+            message = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "supergroup"},
+                "from": BOT_USER,
+            }
+            if method == "sendPhoto":
+                message["photo"] = [{"file_id": "fake-photo", "file_unique_id": "fake", "width": 1, "height": 1}]
+            else:
+                message["text"] = str(params.get("text", ""))
+            return message
+        return True
+
+    def make_update(self, chat_id: int, text: str | None = None) -> dict:
+        text = text or self.args.text
+        update_id = next(self._update_ids)
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "supergroup"},
+                "from": {"id": 1000 + update_id, "is_bot": False, "first_name": f"user{update_id}"},
+                "text": text,
+                "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}],
+            },
+        }
+
+    async def drive(self) -> None:
+        await self.webhook_ready.wait()
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret} if self.webhook_secret else {}
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        latencies: list[float] = []
+        failures = 0
+
+        async with ClientSession() as session:
+
+            async def _one(index: int) -> None:
+                nonlocal failures
+                chat_id = self.args.chat_id - index
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters[chat_id] = waiter
+                async with semaphore:
+                    started = time.perf_counter()
+                    async with session.post(self.webhook_url, json=self.make_update(chat_id), headers=headers) as response:
+                        if response.status != 200:
+                            failures += 1
+                            return
+                    try:
+                        replied = await asyncio.wait_for(waiter, timeout=self.args.reply_timeout)
+                    except asyncio.TimeoutError:
+                        failures += 1
+                        return
+                    latencies.append((replied - started) * 1000)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(_one(i) for i in range(self.args.updates)))
+            elapsed = time.perf_counter() - started
+
+        report = {"updates": self.args.updates, "replied": len(latencies), "failed": failures, "elapsed_sec": round(elapsed, 3)}
+        if self.retry_after_injected:
+            report["retry_after_injected"] = self.retry_after_injected
+        if latencies:
+            latencies.sort()
+            report.update({
+                "reply_ms_p50": round(statistics.median(latencies), 1),
+                "reply_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1 if len(latencies) > 1 else 0], 1),
+                "reply_ms_max": round(latencies[-1], 1),
+                "throughput_per_sec": round(len(latencies) / elapsed, 1),
+            })
+        print(json.dumps(report, ensure_ascii=False))
+        logging.info("API calls: %s", self.calls)
+
+
+async def run() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [fake-telegram] %(message)s")
+    args = parse_args()
+    fake = FakeTelegram(args)
+    app = web.Application()
+    app.router.add_route("*", "/bot{token}/{method}", fake.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    logging.info("Fake Bot API on http://%s:%s", args.host, args.port)
+    try:
+        if args.updates:
+            await fake.drive()
+        else:
+            await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    with contextlib.suppress(KeyboardInterrupt):
+        raise SystemExit(asyncio.run(run()))
@@ -0,0 +1,83 @@
+"""
+Спільне для скриптів, що запускають бота на синтетичних даних
+(benchmark.py, load_test.py, startup_profile.py): вільні порти, день у форматі
+Yasno і оточення, яке ізолює бота від робочих data/.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import random
+import socket
+from pathlib import Path
+from typing import Any
+
+# Частоти типів слотів за замовчуванням (benchmark.py; load_test.py обходиться без Possible)
+DAY_SLOT_WEIGHTS = {"NotPlanned": 5, "Definite": 4, "Possible": 1}
+
+
+def free_port(kind: int = socket.SOCK_STREAM) -> int:
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_day(
+    rng: random.Random,
+    day: dt.date,
+    status: str = "ScheduleApplies",
+    weights: dict[str, int] = DAY_SLOT_WEIGHTS,
+) -> dict[str, Any]:
+    """День у форматі Yasno: суцільні слоти по 30 хв, сусідні однакові — злиті."""
+    kinds, kind_weights = tuple(weights), tuple(weights.values())
+    slots: list[dict[str, Any]] = []
+    for start in range(0, 24 * 60, 30):
+        kind = rng.choices(kinds, weights=kind_weights)[0]
+        if slots and slots[-1]["type"] == kind:
+            slots[-1]["end"] = start + 30
+        else:
+            slots.append({"start": start, "end": start + 30, "type": kind})
+    return {"date": f"{day.isoformat()}T00:00:00+03:00", "status": status, "slots": slots}
+
+
+def make_payload(
+    rng: random.Random,
+    today: dt.date,
+    group_id: str,
+    weights: dict[str, int] = DAY_SLOT_WEIGHTS,
+) -> dict[str, Any]:
+    """Відповідь Yasno для однієї групи: сьогодні й завтра."""
+    return {
+        group_id: {
+            "today": make_day(rng, today, weights=weights),
+            "tomorrow": make_day(rng, today + dt.timedelta(days=1), weights=weights),
+        }
+    }
+
+
+def bot_env(workdir: Path, token: str, **extra: str) -> dict[str, str]:
+    """
+    Оточення для bot.py з базою в workdir/data: без скріншотів, веб-сповіщень,
+    метрик і журналів (extra може їх увімкнути), з випадковим UDP-портом.
+    """
+    data = workdir / "data"
+    return {
+        **os.environ,
+        "BOT_TOKEN": token,
+        "DB_PATH": str(data / "svitlo.db"),
+        "ALERT_CHAT_ID": "-1",
+        "ADMIN_LOG_CHAT_ID": "0",
+        "UDP_PORT": str(free_port(socket.SOCK_DGRAM)),
+        "SCREENSHOT_CACHE_DIR": str(data / "screenshots"),
+        "SCREENSHOT_THUMBNAIL_DIR": str(data / "thumbnails"),
+        "ADMIN_AUDIT_LOG_PATH": "",
+        "TRACE_LOG_PATH": "",
+        "STATUS_SNAPSHOT_PATH": "",
+        "RECORD_PATH": "",
+        "TIMELINE_SCREENSHOT_ENABLED": "0",
+        "WEB_NOTIFY_URL": "",
+        "METRICS_PORT": "0",
+        "PYTHONUNBUFFERED": "1",
+        **extra,
+    }
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Локальний навантажувальний стенд для bot.py без доступу до мережі.
+
+Піднімає підставні сервіси і запускає справжній bot.py проти них:
+  - фейковий Yasno (записаний JSON через --yasno-payload або синтетичний графік,
+    за --mutate-every періодично змінює один слот — бот бачить «новий графік»);
+  - фейковий Telegram Bot API (scripts/fake_telegram_server.py) у режимі polling,
+    записує всі надсилання і може відповідати 429 (RetryAfter);
+  - генератор UDP-пакетів від кількох «пристроїв».
+
+Сценарій: прогрів → потік команд від користувачів → --cycles разів «світло зникає»
+(UDP замовкає) і «повертається». Вимірюється пропускна здатність і затримка
+відповідей на команди, затримка виявлення відключення/відновлення (від останнього
+/першого пакета до першого сповіщення) і час розсилки по всіх --alert-chats.
+
+Приклад:
+  python scripts/load_test.py --devices 5 --alert-chats 50 --command-rate 30 \\
+      --cycles 2 --retry-after-rate 0.05 --output load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import copy
+import datetime as dt
+import json
+import logging
+import random
+import signal
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+from fake_telegram_server import FakeTelegram, parse_args as parse_fake_telegram_args
+from harness_common import bot_env, free_port, make_payload
+
+ROOT = Path(__file__).resolve().parent.parent
+GROUP_ID = "6.2"
+OUTAGE_MARKER = "ЗНИКЛО"
+RESTORE_MARKER = "ВІДНОВЛЕНО"
+ALERT_CHAT_BASE = -1000000
+COMMAND_CHAT_BASE = -2000000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Навантажувальний стенд: фейкові Yasno, Telegram і UDP-пристрої.")
+    parser.add_argument("--devices", type=int, default=3, help="Кількість UDP-пристроїв.")
+    parser.add_argument("--udp-rate", type=float, default=1.0, help="Пакетів на секунду від кожного пристрою.")
+    parser.add_argument("--threshold", type=float, default=3.0, help="THRESHOLD_SEC бота.")
+    parser.add_argument("--settle", type=float, default=0.0, help="POWER_SETTLE_SEC бота.")
+    parser.add_argument("--cycles", type=int, default=2, help="Скільки циклів «зникло/відновлено».")
+    parser.add_argument("--alert-chats", type=int, default=20, help="Кількість чатів для сповіщень (ALERT_CHAT_ID).")
+    parser.add_argument("--command-rate", type=float, default=10.0, help="Команд на секунду від користувачів.")
+    parser.add_argument("--command-chats", type=int, default=100, help="По скількох чатах розкидати команди.")
+    parser.add_argument("--commands", default="/status,/today,/tomorrow", help="Команди через кому.")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Прогрів перед першим циклом (сек).")
+    parser.add_argument("--retry-after-rate", type=float, default=0.0, help="Частка надсилань, що отримують 429.")
+    parser.add_argument("--retry-after-sec", type=int, default=1, help="retry_after у відповіді 429.")
+    parser.add_argument("--yasno-payload", type=Path, help="Записана відповідь Yasno (JSON) замість синтетичної.")
+    parser.add_argument("--mutate-every", type=float, default=0.0, help="Змінювати графік кожні N сек (0 — ні).")
+    parser.add_argument("--schedule-poll", type=int, default=5, help="SCHEDULE_POLL_INTERVAL_SEC бота.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Скільки чекати на кожне сповіщення (сек).")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Куди записати звіт (JSON).")
+    parser.add_argument("--bot-log", type=Path, help="Куди писати stdout/stderr бота (default — тимчасова тека).")
+    parser.add_argument("--bot-env", action="append", default=[], metavar="KEY=VALUE", help="Додаткове оточення бота.")
+    return parser.parse_args()
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _summary(values: list[float]) -> dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50_ms": round(statistics.median(values) * 1000, 1),
+        "p95_ms": round(_percentile(values, 0.95) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+
+# ───────────────── фейковий Yasno ─────────────────
+# Лише певні відключення: «можливі» не додають сповіщень, тільки шум
+SLOT_WEIGHTS = {"NotPlanned": 3, "Definite": 2}
+
+
+class FakeYasno:
+    def __init__(self, payload: dict[str, Any], rng: random.Random) -> None:
+        self.payload = payload
+        self.rng = rng
+        self.requests = 0
+        self.mutations = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        return web.json_response(self.payload)
+
+    def mutate(self) -> None:
+        """Перемикає тип випадкового слоту «сьогодні» — для бота це оновлений графік."""
+        payload = copy.deepcopy(self.payload)
+        for group in payload.values():
+            slots = group.get("today", {}).get("slots") or []
+            if slots:
+                slot = self.rng.choice(slots)
+                slot["type"] = "NotPlanned" if slot["type"] != "NotPlanned" else "Definite"
+        self.payload = payload
+        self.mutations += 1
+
+
+# ───────────────── UDP-пристрої ─────────────────
+class UdpDevices:
+    def __init__(self, port: int, devices: int, rate: float) -> None:
+        self.port = port
+        self.devices = devices
+        self.interval = 1.0 / rate if rate > 0 else 1.0
+        self.powered = True
+        self.sent = 0
+        self.last_packet_ts = 0.0
+        self.first_packet_after_resume_ts = 0.0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def set_power(self, powered: bool) -> None:
+        if powered and not self.powered:
+            self.first_packet_after_resume_ts = 0.0
+        self.powered = powered
+
+    async def run(self) -> None:
+        await asyncio.gather(*(self._device(index) for index in range(self.devices)))
+
+    async def _device(self, index: int) -> None:
+        # Розносимо пристрої в межах інтервалу, як реальні ESP32 з різним часом старту
+        await asyncio.sleep(self.interval * index / max(1, self.devices))
+        while True:
+            if self.powered:
+                self._sock.sendto(f"esp{index} alive {self.sent}".encode(), ("127.0.0.1", self.port))
+                self.sent += 1
+                self.last_packet_ts = time.perf_counter()
+                if not self.first_packet_after_resume_ts:
+                    self.first_packet_after_resume_ts = self.last_packet_ts
+            await asyncio.sleep(self.interval)
+
+
+# ───────────────── стенд ─────────────────
+class LoadTest:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.workdir = Path(tempfile.mkdtemp(prefix="svitlo-load-"))
+        self.telegram = FakeTelegram(
+            parse_fake_telegram_args([
+                "--retry-after-rate", str(args.retry_after_rate),
+                "--retry-after-sec", str(args.retry_after_sec),
+                "--seed", str(args.seed),
+            ])
+        )
+        self.telegram.on_send = self._on_send
+        self.yasno = FakeYasno(self._initial_payload(), self.rng)
+        self.udp = UdpDevices(free_port(socket.SOCK_DGRAM), args.devices, args.udp_rate)
+        self.alert_chats = {ALERT_CHAT_BASE - i for i in range(args.alert_chats)}
+        self.commands = [command.strip() for command in args.commands.split(",") if command.strip()]
+
+        self._alerts: dict[str, list[float]] = {OUTAGE_MARKER: [], RESTORE_MARKER: []}
+        self._pending_commands: dict[int, list[float]] = {}
+        self.command_latencies: list[float] = []
+        self.commands_sent = 0
+        self.command_replies = 0
+        self.commands_unanswered = 0
+
+    def _initial_payload(self) -> dict[str, Any]:
+        if self.args.yasno_payload:
+            return json.loads(self.args.yasno_payload.read_text(encoding="utf-8"))
+        today = dt.datetime.now(dt.timezone(dt.timedelta(hours=3))).date()
+        return make_payload(self.rng, today, GROUP_ID, weights=SLOT_WEIGHTS)
+
+    def _on_send(self, record: dict[str, Any]) -> None:
+        chat_id = record["chat_id"]
+        if chat_id in self.alert_chats:
+            for marker, stamps in self._alerts.items():
+                if marker in record["text"]:
+                    stamps.append(record["ts"])
+            return
+        pending = self._pending_commands.get(chat_id)
+        if pending:
+            # Бот не повторює надсилання після 429, тож старіші команди цього чату вважаємо без відповіді
+            self.command_latencies.append(record["ts"] - pending[-1])
+            self.commands_unanswered += len(pending) - 1
+            pending.clear()
+            self.command_replies += 1
+
+    # ---------- запуск ----------
+    async def _start_servers(self) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self.telegram.handle)
+        app.router.add_get(
+            "/api/blackout-service/public/shutdowns/regions/{region}/dsos/{dso}/planned-outages",
+            self.yasno.handle,
+        )
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        self.http_port = free_port()
+        await web.TCPSite(runner, "127.0.0.1", self.http_port).start()
+        return runner
+
+    def _bot_env(self) -> dict[str, str]:
+        data = self.workdir / "data"
+        base = f"http://127.0.0.1:{self.http_port}"
+        env = bot_env(
+            self.workdir,
+            "0:load-test",
+            TELEGRAM_API_BASE=base,
+            YASNO_API_BASE=base,
+            YASNO_GROUP=next(iter(self.yasno.payload), GROUP_ID),
+            UDP_PORT=str(self.udp.port),
+            THRESHOLD_SEC=str(self.args.threshold),
+            POWER_SETTLE_SEC=str(self.args.settle),
+            SCHEDULE_POLL_INTERVAL_SEC=str(self.args.schedule_poll),
+            ALERT_CHAT_ID=",".join(str(chat_id) for chat_id in sorted(self.alert_chats)),
+            ADMIN_AUDIT_LOG_PATH=str(data / "command_audit.jsonl"),
+            TRACE_LOG_PATH=str(data / "traces.jsonl"),
+            STATUS_SNAPSHOT_PATH=str(data / "status.bin"),
+        )
+        for item in self.args.bot_env:
+            key, _, value = item.partition("=")
+            env[key] = value
+        return env
+
+    async def _start_bot(self) -> asyncio.subprocess.Process:
+        log_path = self.args.bot_log or self.workdir / "bot.log"
+        self.bot_log_path = log_path
+        log_file = open(log_path, "wb")
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            str(ROOT / "bot.py"),
+            cwd=str(self.workdir),
+            env=self._bot_env(),
+            stdout=log_file,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        log_file.close()
+        return process
+
+    # ---------- навантаження ----------
+    async def _command_load(self) -> None:
+        if self.args.command_rate <= 0:
+            return
+        interval = 1.0 / self.args.command_rate
+        index = 0
+        while True:
+            chat_id = COMMAND_CHAT_BASE - (index % self.args.command_chats)
+            command = self.commands[index % len(self.commands)]
+            self._pending_commands.setdefault(chat_id, []).append(time.perf_counter())
+            self.telegram.enqueue_update(self.telegram.make_update(chat_id, command))
+            self.commands_sent += 1
+            index += 1
+            await asyncio.sleep(interval)
+
+    async def _mutator(self) -> None:
+        if self.args.mutate_every <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.args.mutate_every)
+            self.yasno.mutate()
+
+    async def _wait_alert(self, marker: str) -> dict[str, Any] | None:
+        """Чекає перше сповіщення, далі — поки його отримають усі чати або розсилка затихне."""
+        stamps = self._alerts[marker] = []
+        deadline = time.perf_counter() + self.args.timeout
+        while not stamps and time.perf_counter() < deadline:
+            await asyncio.sleep(0.02)
+        if not stamps:
+            return None
+        # Після 429 бот може дослати повідомлення пізніше — тиша довша за retry_after означає кінець
+        quiet_sec = max(3.0, self.args.retry_after_sec + 2.0)
+        while len(stamps) < len(self.alert_chats) and time.perf_counter() - stamps[-1] < quiet_sec:
+            await asyncio.sleep(0.05)
+        return {"first": stamps[0], "last": stamps[-1], "chats": len(stamps)}
+
+    async def _power_cycle(self) -> dict[str, Any]:
+        cycle: dict[str, Any] = {}
+        self.udp.set_power(False)
+        await asyncio.sleep(0)
+        last_packet = self.udp.last_packet_ts
+        outage = await self._wait_alert(OUTAGE_MARKER)
+        if outage:
+            cycle["outage_detect_sec"] = round(outage["first"] - last_packet, 3)
+            cycle["outage_fanout_sec"] = round(outage["last"] - outage["first"], 3)
+            cycle["outage_chats"] = outage["chats"]
+            cycle["outage_lost"] = len(self.alert_chats) - outage["chats"]
+        else:
+            cycle["outage_missed"] = True
+
+        self.udp.set_power(True)
+        restored = await self._wait_alert(RESTORE_MARKER)
+        if restored:
+            cycle["restore_detect_sec"] = round(restored["first"] - self.udp.first_packet_after_resume_ts, 3)
+            cycle["restore_fanout_sec"] = round(restored["last"] - restored["first"], 3)
+            cycle["restore_chats"] = restored["chats"]
+            cycle["restore_lost"] = len(self.alert_chats) - restored["chats"]
+        else:
+            cycle["restore_missed"] = True
+        return cycle
+
+    async def run(self) -> dict[str, Any]:
+        runner = await self._start_servers()
+        background = [asyncio.create_task(self.udp.run())]
+        bot = await self._start_bot()
+        report: dict[str, Any] = {"config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(self.args).items()}}
+        try:
+            await asyncio.wait_for(self.telegram.polling.wait(), timeout=30.0)
+            started = time.perf_counter()
+            background.append(asyncio.create_task(self._command_load()))
+            background.append(asyncio.create_task(self._mutator()))
+            await asyncio.sleep(self.args.warmup)
+            cycles = [await self._power_cycle() for _ in range(self.args.cycles)]
+            # Даємо відповісти на команди, надіслані наприкінці
+            await asyncio.sleep(2.0)
+            elapsed = time.perf_counter() - started
+        except asyncio.TimeoutError:
+            report["error"] = "bot did not start polling within 30 s"
+            cycles, elapsed = [], 0.0
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            if bot.returncode is None:
+                bot.send_signal(signal.SIGINT)
+                try:
+                    await asyncio.wait_for(bot.wait(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    bot.kill()
+                    await bot.wait()
+            await runner.cleanup()
+
+        detect = {
+            "outage": _summary([c["outage_detect_sec"] for c in cycles if "outage_detect_sec" in c]),
+            "restore": _summary([c["restore_detect_sec"] for c in cycles if "restore_detect_sec" in c]),
+        }
+        fanout = _summary(
+            [c[key] for c in cycles for key in ("outage_fanout_sec", "restore_fanout_sec") if key in c]
+        )
+        report.update({
+            "elapsed_sec": round(elapsed, 2),
+            "commands": {
+                "sent": self.commands_sent,
+                "replied": self.command_replies,
+                "unanswered": self.commands_unanswered + sum(len(p) for p in self._pending_commands.values()),
+                "throughput_per_sec": round(self.command_replies / elapsed, 2) if elapsed else 0.0,
+                "reply_latency": _summary(self.command_latencies),
+            },
+            "detection_latency": detect,
+            "fanout": {**fanout, "alert_chats": len(self.alert_chats)},
+            "cycles": cycles,
+            "udp_packets_sent": self.udp.sent,
+            "yasno": {"requests": self.yasno.requests, "mutations": self.yasno.mutations},
+            "telegram": {
+                "calls": dict(sorted(self.telegram.calls.items())),
+                "retry_after_injected": self.telegram.retry_after_injected,
+            },
+            "bot_exit_code": bot.returncode,
+            "bot_log": str(self.bot_log_path),
+        })
+        return report
+
+
+async def run() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [load-test] %(message)s")
+    args = parse_args()
+    report = await LoadTest(args).run()
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    missed = any("outage_missed" in c or "restore_missed" in c for c in report.get("cycles", []))
+    return 1 if report.get("error") or missed else 0
+
+
+if __name__ == "__main__":
+    with contextlib.suppress(KeyboardInterrupt):
+        raise SystemExit(asyncio.run(run()))
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Детермінований replay записаних подій (RECORD_PATH) на віртуальному годиннику.
+
+Справжні фонові цикли bot.py (power_monitor, обидва schedule_monitor,
+reminder_scheduler) працюють проти записаних відповідей Yasno і UDP-пакетів,
+але час у них віртуальний: доба проганяється за секунди, а результат
+(надіслані повідомлення і вебподії) однаковий від запуску до запуску.
+
+Запуск (з кореня репозиторію):
+  RECORD_PATH=data/recording.jsonl python bot.py          # записати
+  python scripts/replay_recording.py data/recording.jsonl --output replay.jsonl
+  python scripts/replay_recording.py rec.jsonl --hours 6 --threshold 10
+
+Звіт: віртуальний проміжок, реальний і процесорний час, CPU на вхідну подію.
+Два прогони можна порівняти через diff їхніх --output.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+_TMP = Path(tempfile.mkdtemp(prefix="svitlo-replay-"))
+atexit.register(shutil.rmtree, _TMP, ignore_errors=True)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay записаних подій бота на віртуальному годиннику.")
+    parser.add_argument("recording", type=Path, help="JSONL, записаний ботом з RECORD_PATH.")
+    parser.add_argument("--hours", type=float, help="Обмежити replay першими N годинами запису.")
+    parser.add_argument("--threshold", type=float, help="THRESHOLD_SEC (default — з meta запису або env).")
+    parser.add_argument("--settle", type=float, help="POWER_SETTLE_SEC (default — з meta запису або env).")
+    parser.add_argument("--output", type=Path, help="Куди записати вихідні повідомлення і вебподії (JSONL).")
+    parser.add_argument("--quiet", action="store_true", help="Не друкувати вихідні повідомлення.")
+    return parser.parse_args()
+
+
+def _configure_env(meta: dict[str, Any], args: argparse.Namespace) -> None:
+    # bot читає конфіг під час імпорту: ізолюємо БД і файли, вимикаємо зовнішні канали
+    os.environ.update({
+        "BOT_TOKEN": os.environ.get("BOT_TOKEN") or "0:replay",
+        "DB_PATH": str(_TMP / "replay.db"),
+        "ALERT_CHAT_ID": "-1",
+        "WEB_NOTIFY_URL": "",
+        "TIMELINE_SCREENSHOT_ENABLED": "0",
+        "SCREENSHOT_CACHE_DIR": "",
+        "SCREENSHOT_THUMBNAIL_DIR": "",
+        "STATUS_SNAPSHOT_PATH": "",
+        "ADMIN_AUDIT_LOG_PATH": "",
+        "TRACE_LOG_PATH": "",
+        "RECORD_PATH": "",
+        "METRICS_PORT": "0",
+    })
+    if meta.get("group"):
+        os.environ["YASNO_GROUP"] = str(meta["group"])
+    threshold = args.threshold if args.threshold is not None else meta.get("threshold_sec")
+    if threshold is not None:
+        os.environ["THRESHOLD_SEC"] = str(threshold)
+    settle = args.settle if args.settle is not None else meta.get("settle_sec")
+    if settle is not None:
+        os.environ["POWER_SETTLE_SEC"] = str(settle)
+
+
+class ReplayBot:
+    """Підміна aiogram.Bot: фіксує надсилання з віртуальним часом."""
+
+    def __init__(self, outputs: list[dict[str, Any]], clock: Any) -> None:
+        self._outputs = outputs
+        self._clock = clock
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any) -> None:
+        self._outputs.append({"t": round(self._clock.time(), 3), "kind": "telegram", "text": text})
+
+    async def send_photo(self, chat_id: int, photo: Any, caption: str | None = None, **kwargs: Any) -> None:
+        self._outputs.append({"t": round(self._clock.time(), 3), "kind": "telegram", "text": caption or ""})
+
+
+async def replay(args: argparse.Namespace) -> dict[str, Any]:
+    sys.path.insert(0, str(ROOT))
+    from recording import read_recording
+
+    records = read_recording(args.recording)
+    meta = next((record for record in records if record.get("kind") == "meta"), {})
+    events = [record for record in records if record.get("kind") in ("yasno", "yasno_error", "packet")]
+    if not events:
+        raise SystemExit(f"{args.recording}: немає подій для replay")
+    start_ts = float(meta.get("t", events[0]["t"]))
+    end_ts = float(events[-1]["t"])
+    if args.hours:
+        end_ts = min(end_ts, start_ts + args.hours * 3600)
+        events = [event for event in events if event["t"] <= end_ts]
+
+    _configure_env(meta, args)
+    import bot
+    from clock import VirtualClock
+
+    clock = VirtualClock(start_ts)
+    bot.clock = clock
+    bot.listener.clock = clock
+    bot.listener.on_packet = lambda msg, addr: None
+    bot.startup_ts = start_ts
+
+    outputs: list[dict[str, Any]] = []
+    fake_bot = ReplayBot(outputs, clock)
+
+    def _capture_web_event(payload: dict) -> None:
+        outputs.append({"t": round(clock.time(), 3), "kind": "web", "type": payload.get("type"), "title": payload.get("title")})
+        return None
+
+    bot._web_event = _capture_web_event
+
+    # Yasno віддає останню записану на поточний віртуальний момент відповідь. Перший запис
+    # з'являється вже після старту циклів (це відповідь на їхній же перший запит), тож ним і починаємо
+    first_fetch = next((event for event in events if event["kind"] in ("yasno", "yasno_error")), None)
+    state: dict[str, Any] = {"data": None, "error": "no Yasno response recorded"}
+    if first_fetch is not None and first_fetch["kind"] == "yasno":
+        state["data"] = first_fetch["data"]
+
+    def _fetch() -> dict:
+        if state["data"] is None:
+            raise RuntimeError(state["error"])
+        return state["data"]
+
+    bot.yasno.fetch = _fetch
+
+    async def _feed() -> None:
+        for event in events:
+            delay = float(event["t"]) - clock.time()
+            if delay > 0:
+                await clock.sleep(delay)
+            kind = event["kind"]
+            if kind == "packet":
+                bot.listener.handle_packet(event.get("msg", ""), (event.get("addr", ""), 0))
+            elif kind == "yasno":
+                state["data"], state["error"] = event["data"], None
+            else:
+                state["data"], state["error"] = None, event.get("error", "")
+
+    tasks = [
+        asyncio.create_task(_feed()),
+        asyncio.create_task(bot.power_monitor(fake_bot)),
+        asyncio.create_task(bot.schedule_monitor(fake_bot)),
+        asyncio.create_task(bot.schedule_monitor_tomorrow(fake_bot)),
+        asyncio.create_task(bot.reminder_scheduler(fake_bot)),
+    ]
+    for task in tasks:
+        clock.attach(task)
+
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    await clock.run_until(end_ts)
+    cpu_sec = time.process_time() - cpu_started
+    wall_sec = time.perf_counter() - wall_started
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    bot.db.close()
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(output, ensure_ascii=False) + "\n" for output in outputs)
+    if not args.quiet:
+        for output in outputs:
+            text = output.get("text") or f"[{output.get('type')}] {output.get('title')}"
+            stamp = datetime.fromtimestamp(output["t"], tz=bot.TZ).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"{stamp}  {text.splitlines()[0]}")
+
+    virtual_sec = end_ts - start_ts
+    return {
+        "recording": str(args.recording),
+        "virtual_hours": round(virtual_sec / 3600, 2),
+        "input_events": len(events),
+        "clock_wakeups": clock.wakeups,
+        "outputs": {
+            "telegram": sum(1 for output in outputs if output["kind"] == "telegram"),
+            "web": sum(1 for output in outputs if output["kind"] == "web"),
+        },
+        "wall_sec": round(wall_sec, 2),
+        "cpu_sec": round(cpu_sec, 2),
+        "speedup": round(virtual_sec / wall_sec, 1) if wall_sec else None,
+        "cpu_us_per_event": round(cpu_sec / len(events) * 1e6, 1),
+        "cpu_us_per_wakeup": round(cpu_sec / clock.wakeups * 1e6, 1) if clock.wakeups else None,
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    report = asyncio.run(replay(args))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Профіль холодного старту bot.py: час імпорту і час до першої відповіді.
+
+1. `python -X importtime -c "import bot"` в окремому процесі: загальний час
+   імпорту, власні модулі репозиторію і найважчі сторонні пакети. Майже весь
+   час — aiogram.types (model_rebuild сотень pydantic-моделей); відкласти його
+   не можна, бо хендлери реєструються на рівні модуля.
+2. Рестарт посеред відключення: у БД уже є відкрите відключення, у черзі
+   фейкового Telegram (scripts/fake_telegram_server.py) лежить /status.
+   Міряється час від запуску процесу до першого getUpdates і до відповіді.
+
+Запуск (з кореня репозиторію):
+  python scripts/startup_profile.py
+  python scripts/startup_profile.py --runs 5 --top 20 --output startup.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+from fake_telegram_server import FakeTelegram, parse_args as parse_fake_telegram_args
+from harness_common import bot_env, free_port
+
+ROOT = Path(__file__).resolve().parent.parent
+OWN_MODULES = {path.stem for path in ROOT.glob("*.py")}
+STATUS_CHAT_ID = -3000000
+BOT_TOKEN_PROFILE = "0:startup-profile"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Профіль імпорту і холодного старту бота.")
+    parser.add_argument("--runs", type=int, default=3, help="Скільки разів повторити кожен вимір.")
+    parser.add_argument("--top", type=int, default=15, help="Скільки сторонніх пакетів показати.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Скільки чекати на відповідь бота (сек).")
+    parser.add_argument("--output", type=Path, help="Куди записати звіт (JSON).")
+    return parser.parse_args()
+
+
+# ───────────────── імпорт ─────────────────
+def _parse_importtime(stderr: str) -> list[tuple[int, int, int, str]]:
+    """Рядки -X importtime як (self_us, cumulative_us, depth, module)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def profile_import(workdir: Path, top: int) -> dict[str, Any]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import bot"],
+        cwd=str(ROOT),
+        env=bot_env(workdir, BOT_TOKEN_PROFILE),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = _parse_importtime(result.stderr)
+    bot_index = next(index for index, row in enumerate(rows) if row[3] == "bot")
+    bot_row = rows[bot_index]
+    # Модулі, які bot імпортує напряму, йдуть у виводі перед ним з глибиною 1 — після
+    # попереднього модуля верхнього рівня (site і його залежностей)
+    first = max((index + 1 for index, row in enumerate(rows[:bot_index]) if row[2] == 0), default=0)
+    direct = [row for row in rows[first:bot_index] if row[2] == 1]
+    own = sorted((row for row in direct if row[3] in OWN_MODULES), key=lambda row: -row[1])
+    packages: dict[str, int] = {}
+    for row in direct:
+        if row[3] not in OWN_MODULES:
+            package = row[3].split(".")[0]
+            packages[package] = packages.get(package, 0) + row[1]
+    third_party = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return {
+        "total_ms": round(bot_row[1] / 1000, 1),
+        "bot_self_ms": round(bot_row[0] / 1000, 1),
+        "own_modules_ms": {row[3]: round(row[1] / 1000, 1) for row in own},
+        "third_party_ms": {name: round(us / 1000, 1) for name, us in third_party},
+        "requests_loaded": any(row[3] == "requests" for row in rows),
+        "aiohttp_web_loaded": any(row[3] == "aiohttp.web" for row in rows),
+    }
+
+
+# ───────────────── рестарт посеред відключення ─────────────────
+def _prepare_outage_db(workdir: Path) -> None:
+    """Відкрите відключення в БД — так, ніби бот упав посеред нього."""
+    sys.path.insert(0, str(ROOT))
+    from storage import Database
+
+    database = Database(workdir / "data" / "svitlo.db")
+    asyncio.run(database.log_outage_start(time.time() - 1800))
+    database.close()
+
+
+async def profile_restart(workdir: Path, timeout: float) -> dict[str, Any]:
+    telegram = FakeTelegram(parse_fake_telegram_args([]))
+    replied = asyncio.Event()
+    reply: dict[str, float] = {}
+
+    def _on_send(record: dict[str, Any]) -> None:
+        if record["chat_id"] == STATUS_CHAT_ID and not replied.is_set():
+            reply["ts"] = record["ts"]
+            replied.set()
+
+    telegram.on_send = _on_send
+    app = web.Application()
+    app.router.add_route("*", "/bot{token}/{method}", telegram.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    port = free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    base = f"http://127.0.0.1:{port}"
+
+    # Команда вже чекає в черзі: бот має відповісти на неї одразу після першого getUpdates
+    telegram.enqueue_update(telegram.make_update(STATUS_CHAT_ID, "/status"))
+    log_file = open(workdir / "bot.log", "wb")
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        str(ROOT / "bot.py"),
+        cwd=str(workdir),
+        # Yasno теж «лежить» (404 від фейкового сервера) — як буває під час відключень
+        env=bot_env(workdir, BOT_TOKEN_PROFILE, TELEGRAM_API_BASE=base, YASNO_API_BASE=base),
+        stdout=log_file,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    log_file.close()
+    try:
+        await asyncio.wait_for(telegram.polling.wait(), timeout)
+        polling_ts = time.perf_counter()
+        await asyncio.wait_for(replied.wait(), timeout)
+    finally:
+        with contextlib.suppress(ProcessLookupError):
+            process.terminate()
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(process.wait(), 10)
+        if process.returncode is None:
+            process.kill()
+        await runner.cleanup()
+    return {
+        "first_get_updates_ms": round((polling_ts - started) * 1000, 1),
+        "first_reply_ms": round((reply["ts"] - started) * 1000, 1),
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    imports: list[dict[str, Any]] = []
+    restarts: list[dict[str, Any]] = []
+    for _ in range(args.runs):
+        workdir = Path(tempfile.mkdtemp(prefix="svitlo-startup-"))
+        try:
+            imports.append(profile_import(workdir, args.top))
+            _prepare_outage_db(workdir)
+            restarts.append(asyncio.run(profile_restart(workdir, args.timeout)))
+        except (asyncio.TimeoutError, subprocess.CalledProcessError) as error:
+            print(f"Прогін не вдався ({type(error).__name__}), лог бота: {workdir / 'bot.log'}", file=sys.stderr)
+            return 1
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Деталізацію беремо з прогону з медіанним загальним часом
+    median_import = sorted(imports, key=lambda item: item["total_ms"])[len(imports) // 2]
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import": {
+            **median_import,
+            "total_ms_runs": [item["total_ms"] for item in imports],
+        },
+        "restart_during_outage": {
+            key: {
+                "median": round(statistics.median(run[key] for run in restarts), 1),
+                "runs": [run[key] for run in restarts],
+            }
+            for key in ("first_get_updates_ms", "first_reply_ms")
+        },
+    }
+    # Усе, що не імпорт: інтерпретатор, on_startup, getMe/deleteWebhook, обробка /status
+    restart = report["restart_during_outage"]
+    restart["besides_import_ms"] = round(restart["first_reply_ms"]["median"] - statistics.median(item["total_ms"] for item in imports), 1)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Довгоживучий воркер рендеру SnakeDayTimeline.
+
+Тримає запущений Chromium із пулом «теплих» сторінок і відповідає на запити
+бота через локальний сокет, тож скріншот не потребує запуску інтерпретатора
+і браузера щоразу. Браузер автоматично перезапускається після --recycle-after
+рендерів або якщо він впав.
+
+Протокол (один запит на рядок):
+  клієнт → {"scope": "today"}\\n
+  воркер → {"ok": true, "size": 12345, "render_ms": 210.5}\\n + 12345 байт PNG
+  воркер → {"ok": false, "error": "..."}\\n
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from render_timeline_screenshot import DEFAULT_BASE_URL, DEFAULT_SELECTOR, DEFAULT_VIEWPORT, build_target_url
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Постійний воркер скріншотів SnakeDayTimeline (Playwright).")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP-адреса для запитів бота.")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("TIMELINE_RENDER_WORKER_PORT", "8765")), help="TCP-порт.")
+    parser.add_argument("--socket", type=Path, help="Шлях до Unix-сокета (замість TCP).")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Базовий URL web-app.")
+    parser.add_argument("--bot-token", dest="bot_token", default=os.environ.get("NOTIFY_BOT_TOKEN"), help="Токен для ?botToken=...")
+    parser.add_argument("--pool-size", type=int, default=2, help="Кількість теплих сторінок (паралельних рендерів).")
+    parser.add_argument("--recycle-after", type=int, default=200, help="Перезапуск браузера після N рендерів.")
+    parser.add_argument("--timeout", type=float, default=15.0, help="Таймаут рендеру (сек).")
+    parser.add_argument("--selector", default=DEFAULT_SELECTOR, help="CSS-селектор контейнера для скріншоту.")
+    parser.add_argument("--viewport-width", type=int, default=DEFAULT_VIEWPORT[0], help="Ширина вікна браузера.")
+    parser.add_argument("--viewport-height", type=int, default=DEFAULT_VIEWPORT[1], help="Висота вікна браузера.")
+    parser.add_argument("--device-scale", type=float, default=2.0, help="deviceScaleFactor (щільність пікселів).")
+    parser.add_argument("--wait-ms", type=int, default=150, help="Додаткова пауза перед скріншотом (мс).")
+    return parser.parse_args()
+
+
+class TimelineRenderWorker:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self._playwright = None
+        self._browser = None
+        # (покоління браузера, сторінка): сторінки попереднього браузера в пул не повертаються
+        self._pages: asyncio.Queue = asyncio.Queue()
+        self._generation = 0
+        self._missing_pages = 0
+        self._recycle_lock = asyncio.Lock()
+        self._renders_since_launch = 0
+        self.renders_total = 0
+        self.recycles_total = 0
+
+    async def start(self) -> None:
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        await self._launch()
+
+    async def close(self) -> None:
+        await self._close_browser()
+        if self._playwright is not None:
+            with contextlib.suppress(Exception):
+                await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self) -> None:
+        self._browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=["--no-sandbox", "--disable-dev-shm-usage"],
+        )
+        for _ in range(max(1, self.args.pool_size)):
+            self._pages.put_nowait((self._generation, await self._new_page()))
+        self._renders_since_launch = 0
+        self._missing_pages = 0
+        logging.info("Браузер запущено, теплих сторінок: %s", self._pages.qsize())
+
+    async def _new_page(self):
+        viewport = {"width": self.args.viewport_width, "height": self.args.viewport_height}
+        return await self._browser.new_page(viewport=viewport, device_scale_factor=self.args.device_scale)
+
+    async def _close_browser(self) -> None:
+        # Сторінки, що зараз у рендері, належать цьому браузеру — після повернення їх буде закрито
+        self._generation += 1
+        while not self._pages.empty():
+            self._pages.get_nowait()
+        if self._browser is not None:
+            with contextlib.suppress(Exception):
+                await self._browser.close()
+            self._browser = None
+
+    async def _maybe_recycle(self) -> None:
+        if self._browser is not None and self._browser.is_connected() and self._renders_since_launch < self.args.recycle_after:
+            return
+        async with self._recycle_lock:
+            if self._browser is not None and self._browser.is_connected() and self._renders_since_launch < self.args.recycle_after:
+                return
+            # Чекаємо, поки всі сторінки повернуться з поточних рендерів
+            if self._browser is not None and self._browser.is_connected():
+                for _ in range(max(1, self.args.pool_size) - self._missing_pages):
+                    await self._pages.get()
+            await self._close_browser()
+            await self._launch()
+            self.recycles_total += 1
+
+    async def render(self, scope: str) -> bytes:
+        await self._maybe_recycle()
+        generation, page = await self._pages.get()
+        healthy = True
+        try:
+            target_url = build_target_url(self.args.base_url, self.args.bot_token, scope)
+            timeout_ms = int(self.args.timeout * 1000)
+            await page.goto(target_url, wait_until="domcontentloaded", timeout=timeout_ms)
+            element = await page.wait_for_selector(self.args.selector, timeout=timeout_ms)
+            if self.args.wait_ms > 0:
+                await page.wait_for_timeout(self.args.wait_ms)
+            if element is None:
+                raise RuntimeError(f"Не знайдено селектор {self.args.selector}")
+            return await element.screenshot(type="png")
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self._renders_since_launch += 1
+            self.renders_total += 1
+            await self._return_page(generation, page, healthy)
+
+    async def _return_page(self, generation: int, page, healthy: bool) -> None:
+        if generation != self._generation:
+            # Браузер уже перезапущено (падіння або recycle): новий пул заповнено свіжими сторінками
+            with contextlib.suppress(Exception):
+                await page.close()
+            return
+        if healthy:
+            self._pages.put_nowait((generation, page))
+            return
+        with contextlib.suppress(Exception):
+            await page.close()
+        try:
+            self._pages.put_nowait((generation, await self._new_page()))
+        except Exception:
+            # Браузер не дає нових сторінок: пул поменшав, наступний рендер перезапустить браузер
+            logging.exception("Не вдалося створити сторінку на заміну")
+            if generation == self._generation:
+                self._missing_pages += 1
+                self._renders_since_launch = self.args.recycle_after
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    scope = "tomorrow" if request.get("scope") == "tomorrow" else "today"
+                except (ValueError, AttributeError):
+                    writer.write(b'{"ok":false,"error":"bad_request"}\n')
+                    await writer.drain()
+                    continue
+                started = time.perf_counter()
+                try:
+                    png = await self.render(scope)
+                except Exception as error:
+                    logging.exception("Помилка рендеру (%s)", scope)
+                    writer.write(json.dumps({"ok": False, "error": str(error)}).encode("utf-8") + b"\n")
+                    await writer.drain()
+                    continue
+                render_ms = (time.perf_counter() - started) * 1000
+                header = {"ok": True, "size": len(png), "render_ms": round(render_ms, 1)}
+                writer.write(json.dumps(header).encode("utf-8") + b"\n")
+                writer.write(png)
+                await writer.drain()
+                logging.info("Рендер %s: %.0f мс, %s байт", scope, render_ms, len(png))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+
+async def run() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [render-worker] %(message)s")
+    args = parse_args()
+    worker = TimelineRenderWorker(args)
+    await worker.start()
+    if args.socket:
+        with contextlib.suppress(FileNotFoundError):
+            args.socket.unlink()
+        server = await asyncio.start_unix_server(worker.handle_client, path=str(args.socket))
+        logging.info("Слухаю %s", args.socket)
+    else:
+        server = await asyncio.start_server(worker.handle_client, host=args.host, port=args.port)
+        logging.info("Слухаю %s:%s", args.host, args.port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await worker.close()
+    return 0
+
+
+if __name__ == "__main__":
+    with contextlib.suppress(KeyboardInterrupt):
+        raise SystemExit(asyncio.run(run()))
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Any
+
+from aiohttp import web
+
+
+def day_info_to_json(outages_info: dict) -> dict[str, Any]:
+    """Перетворює результат YasnoOutages._day_outages у JSON-сумісний словник."""
+    date_value = outages_info.get("date")
+    return {
+        "date": date_value.isoformat() if hasattr(date_value, "isoformat") else date_value,
+        "status": outages_info.get("status"),
+        "outages": [
+            {
+                "start": outage["start"].isoformat(),
+                "end": outage["end"].isoformat(),
+                "type": outage.get("type"),
+            }
+            for outage in outages_info.get("outages") or []
+        ],
+        "slots": [
+            {"start_min": slot.start_min, "end_min": slot.end_min, "type": slot.type}
+            for slot in outages_info.get("raw_slots") or []
+        ],
+    }
+
+
+class _CachedBody:
+    __slots__ = ("body", "etag", "updated_ts")
+
+    def __init__(self, payload: Any) -> None:
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+        self.updated_ts = time.time()
+
+
+class StatusApiServer:
+    """
+    Легкий HTTP-сервер у циклі asyncio бота, що віддає найсвіжіший стан з пам'яті:
+      GET /status                      — стан живлення
+      GET /schedule/today|tomorrow     — останній знімок графіка YASNO
+      GET /outages?since=<unix_ts>     — фактичні відключення
+
+    Відповіді серіалізуються один раз при публікації (publish/set_outages),
+    запит лише повертає готові байти з ETag (і 304 на If-None-Match).
+    """
+
+    OUTAGES_KEEP_SEC = 31 * 24 * 3600
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081, token: str = "") -> None:
+        self.host = host
+        self.port = port
+        self.token = token
+        self._bodies: dict[str, _CachedBody] = {}
+        self._outages: list[dict[str, Any]] = []
+        self._outages_since_cache: dict[int, _CachedBody] = {}
+        self._runner: web.AppRunner | None = None
+
+        # метрики
+        self.requests_total = 0
+        self.not_modified_total = 0
+
+    # ---------- публікація даних ----------
+    def publish(self, key: str, payload: Any) -> None:
+        cached = _CachedBody(payload)
+        current = self._bodies.get(key)
+        if current is not None and current.etag == cached.etag:
+            return
+        self._bodies[key] = cached
+
+    def set_outages(self, rows: list[dict[str, Any]]) -> None:
+        self._outages = [
+            {"start_ts": float(row["start_ts"]), "end_ts": float(row["end_ts"]) if row.get("end_ts") is not None else None}
+            for row in sorted(rows, key=lambda r: float(r["start_ts"]))
+        ]
+        self._outages_changed()
+
+    def record_outage(self, start_ts: float, end_ts: float | None) -> None:
+        """Дзеркалить Database.log_outage_start/end: оновлює відкрите відключення або додає нове."""
+        open_row = next((row for row in reversed(self._outages) if row["end_ts"] is None), None)
+        if open_row is None:
+            self._outages.append({"start_ts": start_ts, "end_ts": end_ts})
+        elif end_ts is None:
+            open_row["start_ts"] = min(open_row["start_ts"], start_ts)
+        else:
+            open_row["end_ts"] = end_ts
+        cutoff = time.time() - self.OUTAGES_KEEP_SEC
+        self._outages = [row for row in self._outages if row["end_ts"] is None or row["end_ts"] >= cutoff]
+        self._outages_changed()
+
+    def _outages_changed(self) -> None:
+        self._outages_since_cache.clear()
+        self.publish("outages", {"outages": self._outages})
+
+    # ---------- керування ----------
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/status", self._handle_status)
+        app.router.add_get("/schedule/{scope}", self._handle_schedule)
+        app.router.add_get("/outages", self._handle_outages)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logging.info("Status API listening on http://%s:%s", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ---------- обробники ----------
+    def _authorized(self, request: web.Request) -> bool:
+        if not self.token:
+            return True
+        return request.headers.get("x-bot-token") == self.token or request.query.get("token") == self.token
+
+    def _respond(self, request: web.Request, cached: _CachedBody | None) -> web.Response:
+        self.requests_total += 1
+        if not self._authorized(request):
+            return web.json_response({"error": "forbidden"}, status=403)
+        if cached is None:
+            return web.json_response({"error": "not_ready"}, status=503)
+        headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+        if request.headers.get("If-None-Match") == cached.etag:
+            self.not_modified_total += 1
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=cached.body, content_type="application/json", charset="utf-8", headers=headers)
+
+    async def _handle_status(self, request: web.Request) -> web.Response:
+        return self._respond(request, self._bodies.get("status"))
+
+    async def _handle_schedule(self, request: web.Request) -> web.Response:
+        scope = request.match_info.get("scope")
+        if scope not in ("today", "tomorrow"):
+            return web.json_response({"error": "not_found"}, status=404)
+        return self._respond(request, self._bodies.get(f"schedule:{scope}"))
+
+    async def _handle_outages(self, request: web.Request) -> web.Response:
+        raw_since = request.query.get("since")
+        if not raw_since:
+            return self._respond(request, self._bodies.get("outages"))
+        if not self._authorized(request):
+            # Без токена не фільтруємо і не засмічуємо кеш — _respond одразу поверне 403
+            return self._respond(request, None)
+        try:
+            since = int(float(raw_since))
+        except (ValueError, OverflowError):
+            return web.json_response({"error": "bad_request"}, status=400)
+        cached = self._outages_since_cache.get(since)
+        if cached is None:
+            rows = [r for r in self._outages if r["end_ts"] is None or r["end_ts"] >= since]
+            cached = _CachedBody({"outages": rows})
+            if len(self._outages_since_cache) > 64:
+                self._outages_since_cache.clear()
+            self._outages_since_cache[since] = cached
+        return self._respond(request, cached)
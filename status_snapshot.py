@@ -0,0 +1,161 @@
+import mmap
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+# Фіксований формат запису (little-endian, 48 байт):
+#   0  4s  magic "SVLT"
+#   4  H   версія формату
+#   6  H   резерв
+#   8  I   seqlock-лічильник (непарний — запис триває, читач має повторити)
+#   12 B   стан: 0 — невідомо, 1 — світло є, 2 — світла немає
+#   13 3x  вирівнювання
+#   16 d   since_ts — з якого моменту діє поточний стан (unix time, 0 якщо невідомо)
+#   24 d   last_packet_ts — час останнього UDP-пакета (0 якщо ще не було)
+#   32 d   updated_ts — час останнього оновлення запису (heartbeat)
+#   40 I   schedule_version — CRC32 сигнатур графіків на сьогодні/завтра
+#   44 I   резерв
+STATUS_STRUCT = struct.Struct("<4sHHIB3xdddII")
+STATUS_MAGIC = b"SVLT"
+STATUS_LAYOUT_VERSION = 1
+_SEQ_STRUCT = struct.Struct("<I")
+_SEQ_OFFSET = 8
+
+STATE_UNKNOWN = 0
+STATE_ON = 1
+STATE_OFF = 2
+
+
+@dataclass(frozen=True)
+class StatusRecord:
+    state: int
+    since_ts: float
+    last_packet_ts: float
+    updated_ts: float
+    schedule_version: int
+
+    @property
+    def power_on(self) -> bool | None:
+        if self.state == STATE_ON:
+            return True
+        if self.state == STATE_OFF:
+            return False
+        return None
+
+    def last_packet_age(self, now: float | None = None) -> float:
+        if not self.last_packet_ts:
+            return float("inf")
+        return (now if now is not None else time.time()) - self.last_packet_ts
+
+
+class StatusSnapshotWriter:
+    """
+    Тримає актуальний стан живлення у невеликому memory-mapped файлі.
+    Будь-який локальний процес може прочитати його без SQLite та HTTP (див. read_status_snapshot).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = None
+        self._mm: mmap.mmap | None = None
+        self._seq = 0
+        self._state = STATE_UNKNOWN
+        self._since_ts = 0.0
+        self._last_packet_ts = 0.0
+        self._schedule_parts: dict[str, str] = {}
+        self._schedule_version = 0
+
+    def open(self) -> None:
+        if self._mm is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        mode = "r+b" if self.path.exists() else "w+b"
+        self._file = open(self.path, mode)
+        self._file.truncate(STATUS_STRUCT.size)
+        self._mm = mmap.mmap(self._file.fileno(), STATUS_STRUCT.size)
+        current = self._mm[_SEQ_OFFSET:_SEQ_OFFSET + _SEQ_STRUCT.size]
+        self._seq = _SEQ_STRUCT.unpack(current)[0] & ~1
+        self._flush()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def update_power(self, power_on: bool | None, since_ts: float, last_packet_ts: float) -> None:
+        """Викликається на кожному переході та heartbeat монітора живлення."""
+        if power_on is None:
+            self._state = STATE_UNKNOWN
+        else:
+            self._state = STATE_ON if power_on else STATE_OFF
+        self._since_ts = float(since_ts or 0.0)
+        self._last_packet_ts = float(last_packet_ts or 0.0)
+        self._flush()
+
+    def update_schedule(self, scope: str, signature: object) -> None:
+        """Оновлює версію графіка, коли змінюється сигнатура на сьогодні/завтра."""
+        self._schedule_parts[scope] = repr(signature)
+        joined = "|".join(f"{key}={value}" for key, value in sorted(self._schedule_parts.items()))
+        self._schedule_version = zlib.crc32(joined.encode("utf-8"))
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._mm is None:
+            return
+        # seqlock: непарне значення на час запису, парне — після
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        _SEQ_STRUCT.pack_into(self._mm, _SEQ_OFFSET, self._seq)
+        STATUS_STRUCT.pack_into(
+            self._mm,
+            0,
+            STATUS_MAGIC,
+            STATUS_LAYOUT_VERSION,
+            0,
+            self._seq,
+            self._state,
+            self._since_ts,
+            self._last_packet_ts,
+            time.time(),
+            self._schedule_version,
+            0,
+        )
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        _SEQ_STRUCT.pack_into(self._mm, _SEQ_OFFSET, self._seq)
+
+
+def read_status_snapshot(path: Path, retries: int = 5) -> StatusRecord | None:
+    """
+    Читає запис стану. Повертає None, якщо файлу немає, формат невідомий
+    або запис не вдалося прочитати узгоджено за кілька спроб.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), STATUS_STRUCT.size, access=mmap.ACCESS_READ) as mm:
+            for _ in range(retries):
+                raw = mm[:STATUS_STRUCT.size]
+                magic, version, _, seq, state, since_ts, last_packet_ts, updated_ts, schedule_version, _ = (
+                    STATUS_STRUCT.unpack(raw)
+                )
+                if magic != STATUS_MAGIC or version != STATUS_LAYOUT_VERSION:
+                    return None
+                seq_after = _SEQ_STRUCT.unpack(mm[_SEQ_OFFSET:_SEQ_OFFSET + _SEQ_STRUCT.size])[0]
+                if seq % 2 == 0 and seq == seq_after:
+                    return StatusRecord(state, since_ts, last_packet_ts, updated_ts, schedule_version)
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+if __name__ == "__main__":
+    import sys
+
+    snapshot_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data") / "status.bin"
+    record = read_status_snapshot(snapshot_path)
+    if record is None:
+        print(f"Стан недоступний: {snapshot_path}")
+    else:
+        print(record, f"last_packet_age={record.last_packet_age():.1f}s")
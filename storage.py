@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import datetime as dt
 import json
 import os
@@ -6,13 +7,23 @@ import sqlite3
 import threading
 import time
 from pathlib import Path
-from typing import Any, Iterable, Sequence
+from typing import Any, Callable, Iterable, Iterator, Sequence
+from zoneinfo import ZoneInfo
+
+from metrics import DB_LOCK_WAIT_SECONDS, DB_OP_SECONDS
+from schedule_slot import Slot
+
+# Версія схеми у PRAGMA user_version. Збільшувати при кожній зміні DDL у _init_schema,
+# інакше вже ініціалізовані бази міграцію не побачать.
+SCHEMA_VERSION = 2
 
 
 class Database:
     """
     Простий обгортковий клас над SQLite для логування відключень і графіків.
     Всі публічні методи асинхронні та виконують роботу в окремому потоці.
+    З'єднання відкривається (і схема перевіряється) при першому запиті, а не в
+    конструкторі — тож імпорт модуля і старт бота не чекають на диск.
     """
 
     def __init__(self, path: Path | None = None) -> None:
@@ -20,36 +31,26 @@ class Database:
         if path is None:
             path = Path(db_path_env) if db_path_env else Path("data") / "svitlo.db"
 
-        if not path.parent.exists():
-            path.parent.mkdir(parents=True, exist_ok=True)
-
         self._path = path
-        self._conn = sqlite3.connect(
-            str(self._path),
-            check_same_thread=False,
-            isolation_level=None,
-        )
-        self._conn.row_factory = sqlite3.Row
+        self._connection: sqlite3.Connection | None = None
         self._lock = threading.RLock()
-        with self._conn:
-            self._conn.execute("PRAGMA journal_mode=WAL;")
-            self._conn.execute("PRAGMA foreign_keys=ON;")
-        self._init_schema()
 
     # ---------- публічне API ----------
-    async def log_outage_start(self, start_ts: float) -> int:
+    async def log_outage_start(self, start_ts: float, web_event: dict[str, Any] | None = None) -> int:
         """
         Створює (або оновлює) запис про відключення.
+        Якщо передано web_event — додає його в outbox у тій самій транзакції.
         Повертає ідентифікатор запису про відключення.
         """
-        return await asyncio.to_thread(self._log_outage_start_sync, start_ts)
+        return await self._call(self._log_outage_start_sync, start_ts, web_event)
 
-    async def log_outage_end(self, end_ts: float) -> float | None:
+    async def log_outage_end(self, end_ts: float, web_event: dict[str, Any] | None = None) -> float | None:
         """
         Закриває останнє відключення (end_ts) і повертає start_ts,
         щоб можна було коректно розрахувати тривалість.
+        Якщо передано web_event — додає його в outbox у тій самій транзакції.
         """
-        return await asyncio.to_thread(self._log_outage_end_sync, end_ts)
+        return await self._call(self._log_outage_end_sync, end_ts, web_event)
 
     async def upsert_schedule(
         self,
@@ -57,40 +58,195 @@ class Database:
         status: str | None,
         outages: Sequence[dict[str, Any]] | None,
         raw_slots: Sequence[Any] | None,
+        web_event: dict[str, Any] | None = None,
+        monitor_state: dict[str, Any] | None = None,
     ) -> None:
         """
         Оновлює або створює поточний графік на конкретну дату.
+        Якщо передано web_event — додає його в outbox у тій самій транзакції;
+        monitor_state так само зберігається разом із графіком (див. save_monitor_state).
         """
-        await asyncio.to_thread(
+        await self._call(
             self._upsert_schedule_sync,
             date_value,
             status,
             outages,
             raw_slots,
+            web_event,
+            monitor_state,
         )
 
     async def get_active_outage(self) -> dict[str, Any] | None:
         """
         Повертає останнє відключення без end_ts або None.
         """
-        return await asyncio.to_thread(self._get_active_outage_sync)
+        return await self._call(self._get_active_outage_sync)
+
+    async def get_last_outage(self) -> dict[str, Any] | None:
+        """
+        Повертає останнє (за start_ts) відключення, незалежно від того, чи воно закрите.
+        """
+        return await self._call(self._get_last_outage_sync)
+
+    async def get_outages_since(self, since_ts: float) -> list[dict[str, Any]]:
+        """
+        Повертає відключення, що завершились після since_ts або ще тривають.
+        """
+        return await self._call(self._get_outages_since_sync, since_ts)
+
+    async def get_schedule(self, date_value: dt.date | dt.datetime | str, tz: ZoneInfo) -> dict[str, Any] | None:
+        """
+        Повертає збережений графік на дату у форматі YasnoOutages._day_outages
+        (date, status, outages, raw_slots зі Slot) плюс updated_at, або None.
+        Відключення будуються зі слотів у часовій зоні tz, як і в YasnoOutages.
+        """
+        rows = await self._call(self._get_schedules_sync, date_value, date_value, tz)
+        return rows[0] if rows else None
+
+    async def get_schedules(
+        self,
+        start: dt.date | dt.datetime | str,
+        end: dt.date | dt.datetime | str,
+        tz: ZoneInfo,
+    ) -> list[dict[str, Any]]:
+        """
+        Повертає збережені графіки з start по end включно, впорядковані за датою,
+        у тому ж форматі, що й get_schedule.
+        """
+        return await self._call(self._get_schedules_sync, start, end, tz)
 
     async def get_push_subscriptions_count(self) -> int:
         """
         Повертає кількість PWA підписок із окремої БД push_subs.db.
         Якщо БД/таблиці немає — повертає 0.
         """
-        return await asyncio.to_thread(self._get_push_subscriptions_count_sync)
+        return await self._call(self._get_push_subscriptions_count_sync)
+
+    async def enqueue_web_event(self, payload: dict[str, Any]) -> int:
+        """
+        Додає подію для веб-додатка в outbox. Повертає її порядковий номер.
+        """
+        return await self._call(self._enqueue_web_event_sync, payload)
+
+    async def get_pending_web_events(self, limit: int = 20) -> list[dict[str, Any]]:
+        """
+        Повертає недоставлені події outbox у порядку додавання.
+        """
+        return await self._call(self._get_pending_web_events_sync, limit)
+
+    async def get_web_events_since(self, seq: int, limit: int = 500) -> list[dict[str, Any]]:
+        """
+        Повертає події outbox з id > seq (незалежно від статусу доставки) у порядку додавання.
+        """
+        return await self._call(self._get_web_events_since_sync, seq, limit)
+
+    async def get_last_web_event_seq(self) -> int:
+        return await self._call(self._get_last_web_event_seq_sync)
+
+    async def mark_web_event_delivered(self, event_id: int, delivered_ts: float) -> None:
+        await self._call(self._mark_web_event_delivered_sync, event_id, delivered_ts)
+
+    async def mark_web_event_retry(self, event_id: int, error: str, next_attempt_ts: float) -> None:
+        await self._call(self._mark_web_event_retry_sync, event_id, error, next_attempt_ts)
+
+    async def drop_web_event(self, event_id: int, error: str) -> None:
+        """
+        Позначає подію як відкинуту (безповоротна помилка або застаріла подія).
+        """
+        await self._call(self._drop_web_event_sync, event_id, error)
+
+    async def get_web_outbox_stats(self) -> dict[str, Any]:
+        """
+        Повертає розмір черги outbox і вік найстарішої недоставленої події.
+        """
+        return await self._call(self._get_web_outbox_stats_sync)
+
+    async def prune_web_outbox(self, older_than_ts: float) -> int:
+        """
+        Видаляє доставлені/відкинуті події, старші за older_than_ts.
+        """
+        return await self._call(self._prune_web_outbox_sync, older_than_ts)
+
+    async def get_monitor_state(self) -> dict[str, Any]:
+        """
+        Повертає весь збережений стан моніторів одним запитом: {key: значення}.
+        """
+        return await self._call(self._get_monitor_state_sync)
+
+    async def save_monitor_state(self, values: dict[str, Any]) -> None:
+        """
+        Зберігає (перезаписує) значення за ключами; інші ключі не змінюються.
+        Значення мають бути JSON-сумісними (дати зберігаються як ISO-рядки).
+        """
+        await self._call(self._save_monitor_state_sync, values)
 
     def close(self) -> None:
         with self._lock:
-            self._conn.close()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
 
     # ---------- службові методи (тільки sync) ----------
-    def _init_schema(self) -> None:
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    self._connection = self._connect()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._path.parent.exists():
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self._path),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        conn.row_factory = sqlite3.Row
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA foreign_keys=ON;")
+        # DDL лише для нової або старішої бази: звичайний рестарт — один PRAGMA
+        # замість п'яти CREATE ... IF NOT EXISTS і пробного запису
+        if conn.execute("PRAGMA user_version;").fetchone()[0] < SCHEMA_VERSION:
+            self._init_schema(conn)
+        return conn
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Виконує sync-метод у потоці й записує тривалість (разом із переходом у потік)."""
+        started = time.perf_counter()
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            DB_OP_SECONDS.observe(time.perf_counter() - started, op=func.__name__.strip("_").removesuffix("_sync"))
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        started = time.perf_counter()
+        with self._lock:
+            DB_LOCK_WAIT_SECONDS.observe(time.perf_counter() - started)
+            yield
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Явна транзакція: з'єднання працює в autocommit (isolation_level=None),
+        тому кілька записів, які мають бути атомарними, обгортаємо BEGIN/COMMIT.
+        """
+        with self._locked():
+            self._conn.execute("BEGIN IMMEDIATE;")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK;")
+                raise
+            self._conn.execute("COMMIT;")
+
+    def _init_schema(self, conn: sqlite3.Connection) -> None:
         now = time.time()
-        with self._lock, self._conn:
-            self._conn.execute(
+        with conn:
+            conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS outages (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -101,7 +257,7 @@ class Database:
                 );
                 """
             )
-            self._conn.execute(
+            conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS schedules (
                     schedule_date TEXT PRIMARY KEY,
@@ -112,27 +268,62 @@ class Database:
                 );
                 """
             )
-            self._conn.execute(
+            conn.execute(
                 """
                 CREATE INDEX IF NOT EXISTS idx_outages_end_ts
                 ON outages(end_ts);
                 """
             )
+            # Outbox подій для веб-додатка: id — це монотонний порядковий номер події
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS web_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payload_json TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    delivered_at REAL
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_web_outbox_status
+                ON web_outbox(status, id);
+                """
+            )
+            # Стан фонових моніторів (базові сигнатури графіків, історія нагадувань,
+            # останній UDP-пакет) — щоб рестарт продовжував з того ж місця
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS monitor_state (
+                    key TEXT PRIMARY KEY,
+                    value_json TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                """
+            )
             # Записуємо часову мітку ініціалізації (для порожньої бази)
-            self._conn.execute(
+            conn.execute(
                 """
                 INSERT OR IGNORE INTO schedules (schedule_date, status, outages_json, slots_json, updated_at)
                 VALUES ('__init__', NULL, NULL, NULL, ?);
                 """,
                 (now,),
             )
-            self._conn.execute(
+            conn.execute(
                 "DELETE FROM schedules WHERE schedule_date = '__init__';"
             )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
 
-    def _log_outage_start_sync(self, start_ts: float) -> int:
+    def _log_outage_start_sync(self, start_ts: float, web_event: dict[str, Any] | None = None) -> int:
         now = time.time()
-        with self._lock, self._conn:
+        with self._transaction():
+            if web_event is not None:
+                self._insert_web_event(web_event, now)
             row = self._conn.execute(
                 """
                 SELECT id, start_ts FROM outages
@@ -174,9 +365,11 @@ class Database:
             )
             return int(cur.lastrowid)
 
-    def _log_outage_end_sync(self, end_ts: float) -> float | None:
+    def _log_outage_end_sync(self, end_ts: float, web_event: dict[str, Any] | None = None) -> float | None:
         now = time.time()
-        with self._lock, self._conn:
+        with self._transaction():
+            if web_event is not None:
+                self._insert_web_event(web_event, now)
             row = self._conn.execute(
                 """
                 SELECT id, start_ts FROM outages
@@ -216,8 +409,14 @@ class Database:
         status: str | None,
         outages: Sequence[dict[str, Any]] | None,
         raw_slots: Sequence[Any] | None,
+        web_event: dict[str, Any] | None = None,
+        monitor_state: dict[str, Any] | None = None,
     ) -> None:
         if date_value is None:
+            if web_event is not None:
+                self._enqueue_web_event_sync(web_event)
+            if monitor_state:
+                self._save_monitor_state_sync(monitor_state)
             return
 
         date_str = self._normalize_date(date_value)
@@ -225,7 +424,11 @@ class Database:
         slots_json = self._serialize_slots(raw_slots or [])
         now = time.time()
 
-        with self._lock, self._conn:
+        with self._transaction():
+            if web_event is not None:
+                self._insert_web_event(web_event, now)
+            if monitor_state:
+                self._upsert_monitor_state(monitor_state, now)
             self._conn.execute(
                 """
                 INSERT INTO schedules (schedule_date, status, outages_json, slots_json, updated_at)
@@ -240,7 +443,7 @@ class Database:
             )
 
     def _get_active_outage_sync(self) -> dict[str, Any] | None:
-        with self._lock, self._conn:
+        with self._locked(), self._conn:
             row = self._conn.execute(
                 """
                 SELECT id, start_ts, end_ts, created_at, updated_at
@@ -252,6 +455,229 @@ class Database:
             ).fetchone()
             return dict(row) if row else None
 
+    def _insert_web_event(self, payload: dict[str, Any], now: float) -> int:
+        cur = self._conn.execute(
+            """
+            INSERT INTO web_outbox (payload_json, status, attempts, next_attempt_at, created_at)
+            VALUES (?, 'pending', 0, ?, ?);
+            """,
+            (json.dumps(payload, ensure_ascii=False, default=str), now, now),
+        )
+        return int(cur.lastrowid)
+
+    def _enqueue_web_event_sync(self, payload: dict[str, Any]) -> int:
+        with self._transaction():
+            return self._insert_web_event(payload, time.time())
+
+    def _get_pending_web_events_sync(self, limit: int) -> list[dict[str, Any]]:
+        with self._locked(), self._conn:
+            rows = self._conn.execute(
+                """
+                SELECT id, payload_json, attempts, next_attempt_at, created_at
+                FROM web_outbox
+                WHERE status = 'pending'
+                ORDER BY id
+                LIMIT ?;
+                """,
+                (limit,),
+            ).fetchall()
+        events: list[dict[str, Any]] = []
+        for row in rows:
+            event = dict(row)
+            event["payload"] = json.loads(event.pop("payload_json"))
+            events.append(event)
+        return events
+
+    def _get_web_events_since_sync(self, seq: int, limit: int) -> list[dict[str, Any]]:
+        with self._locked(), self._conn:
+            rows = self._conn.execute(
+                """
+                SELECT id, payload_json, status, created_at
+                FROM web_outbox
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?;
+                """,
+                (seq, limit),
+            ).fetchall()
+        events: list[dict[str, Any]] = []
+        for row in rows:
+            event = dict(row)
+            event["payload"] = json.loads(event.pop("payload_json"))
+            events.append(event)
+        return events
+
+    def _get_last_web_event_seq_sync(self) -> int:
+        with self._locked(), self._conn:
+            row = self._conn.execute("SELECT MAX(id) FROM web_outbox;").fetchone()
+            return int(row[0]) if row and row[0] is not None else 0
+
+    def _mark_web_event_delivered_sync(self, event_id: int, delivered_ts: float) -> None:
+        with self._locked(), self._conn:
+            self._conn.execute(
+                """
+                UPDATE web_outbox
+                SET status = 'delivered', delivered_at = ?, attempts = attempts + 1, last_error = NULL
+                WHERE id = ? AND status = 'pending';
+                """,
+                (delivered_ts, event_id),
+            )
+
+    def _mark_web_event_retry_sync(self, event_id: int, error: str, next_attempt_ts: float) -> None:
+        with self._locked(), self._conn:
+            self._conn.execute(
+                """
+                UPDATE web_outbox
+                SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?
+                WHERE id = ?;
+                """,
+                (error, next_attempt_ts, event_id),
+            )
+
+    def _drop_web_event_sync(self, event_id: int, error: str) -> None:
+        with self._locked(), self._conn:
+            self._conn.execute(
+                """
+                UPDATE web_outbox
+                SET status = 'dropped', attempts = attempts + 1, last_error = ?
+                WHERE id = ?;
+                """,
+                (error, event_id),
+            )
+
+    def _get_web_outbox_stats_sync(self) -> dict[str, Any]:
+        with self._locked(), self._conn:
+            row = self._conn.execute(
+                """
+                SELECT COUNT(*) AS pending, MIN(created_at) AS oldest_created_at
+                FROM web_outbox
+                WHERE status = 'pending';
+                """
+            ).fetchone()
+            dropped = self._conn.execute(
+                "SELECT COUNT(*) FROM web_outbox WHERE status = 'dropped';"
+            ).fetchone()
+        return {
+            "pending": int(row["pending"] or 0),
+            "oldest_created_at": row["oldest_created_at"],
+            "dropped": int(dropped[0] or 0),
+        }
+
+    def _prune_web_outbox_sync(self, older_than_ts: float) -> int:
+        with self._locked(), self._conn:
+            cur = self._conn.execute(
+                """
+                DELETE FROM web_outbox
+                WHERE status != 'pending' AND created_at < ?;
+                """,
+                (older_than_ts,),
+            )
+            return int(cur.rowcount or 0)
+
+    def _upsert_monitor_state(self, values: dict[str, Any], now: float) -> None:
+        self._conn.executemany(
+            """
+            INSERT INTO monitor_state (key, value_json, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value_json = excluded.value_json,
+                updated_at = excluded.updated_at;
+            """,
+            [(key, json.dumps(value, ensure_ascii=False, default=str), now) for key, value in values.items()],
+        )
+
+    def _save_monitor_state_sync(self, values: dict[str, Any]) -> None:
+        with self._transaction():
+            self._upsert_monitor_state(values, time.time())
+
+    def _get_monitor_state_sync(self) -> dict[str, Any]:
+        with self._locked(), self._conn:
+            rows = self._conn.execute("SELECT key, value_json FROM monitor_state;").fetchall()
+        state: dict[str, Any] = {}
+        for row in rows:
+            try:
+                state[row["key"]] = json.loads(row["value_json"])
+            except ValueError:
+                continue
+        return state
+
+    def _get_schedules_sync(
+        self,
+        start: dt.date | dt.datetime | str,
+        end: dt.date | dt.datetime | str,
+        tz: ZoneInfo,
+    ) -> list[dict[str, Any]]:
+        with self._locked(), self._conn:
+            rows = self._conn.execute(
+                """
+                SELECT schedule_date, status, slots_json, updated_at
+                FROM schedules
+                WHERE schedule_date BETWEEN ? AND ?
+                ORDER BY schedule_date;
+                """,
+                (self._normalize_date(start), self._normalize_date(end)),
+            ).fetchall()
+        result = []
+        for row in rows:
+            try:
+                result.append(self._day_info_from_row(row, tz))
+            except (TypeError, ValueError):
+                continue
+        return result
+
+    @staticmethod
+    def _day_info_from_row(row: sqlite3.Row, tz: ZoneInfo) -> dict[str, Any]:
+        """
+        Зворотне до _serialize_slots: рядок schedules → день як у Yasno. Відключення
+        не беруться з outages_json: там фіксований зсув UTC на момент запису, що дає
+        неправильний місцевий час у день переходу на літній/зимовий час.
+        """
+        day_date = dt.date.fromisoformat(row["schedule_date"])
+        status = row["status"] or ""
+        raw_slots = [
+            Slot(int(slot["start_min"]), int(slot["end_min"]), slot.get("type") or "")
+            for slot in json.loads(row["slots_json"] or "[]")
+            if slot.get("start_min") is not None and slot.get("end_min") is not None
+        ]
+        outages = []
+        if status == "ScheduleApplies":
+            for slot in raw_slots:
+                if slot.is_outage:
+                    start, end = slot.as_time_range(day_date, tz)
+                    outages.append({"start": start, "end": end, "type": slot.type})
+        return {
+            "date": day_date,
+            "status": status,
+            "outages": outages,
+            "raw_slots": raw_slots,
+            "updated_at": float(row["updated_at"]),
+        }
+
+    def _get_last_outage_sync(self) -> dict[str, Any] | None:
+        with self._locked(), self._conn:
+            row = self._conn.execute(
+                """
+                SELECT id, start_ts, end_ts, created_at, updated_at
+                FROM outages
+                ORDER BY start_ts DESC
+                LIMIT 1;
+                """
+            ).fetchone()
+            return dict(row) if row else None
+
+    def _get_outages_since_sync(self, since_ts: float) -> list[dict[str, Any]]:
+        with self._locked(), self._conn:
+            rows = self._conn.execute(
+                """
+                SELECT start_ts, end_ts
+                FROM outages
+                WHERE end_ts IS NULL OR end_ts >= ?
+                ORDER BY start_ts;
+                """,
+                (since_ts,),
+            ).fetchall()
+            return [dict(row) for row in rows]
+
     @staticmethod
     def _normalize_date(value: dt.date | dt.datetime | str) -> str:
         if isinstance(value, dt.datetime):
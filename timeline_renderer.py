@@ -0,0 +1,378 @@
+"""
+Нативний (без браузера) рендер SnakeDayTimeline через Pillow.
+
+Малює ту саму «змійку» з 24 годинних комірок, що й web-app/app/components/SnakeDayTimeline.tsx,
+напряму з day info YasnoOutages (_day_outages) і фактичних рядків outages.
+Альтернатива scripts/render_timeline_screenshot.py: не потребує Chromium і Next.js.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import functools
+import io
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+WEEKDAY_NAMES_UA = ("Понеділок", "Вівторок", "Середа", "Четвер", "Пʼятниця", "Субота", "Неділя")
+
+# Збільшувати при зміні вигляду картки — старі скріншоти в кеші стануть неактуальними
+RENDERER_VERSION = 1
+
+TOTAL_DAY_HOURS = 24
+SLOTS_PER_ROW = 6
+BASE_WIDTH = 720
+
+# Кольори (попередньо змішані з темним тлом, щоб не потребувати альфа-композиції)
+BG_TOP = {"ok": (6, 46, 36), "outage": (76, 5, 25), "empty": (15, 23, 42)}
+BG_BOTTOM = (0, 0, 0)
+BORDER = {"ok": (20, 83, 62), "outage": (110, 44, 60), "empty": (30, 41, 59)}
+CELL_BG = (28, 33, 38)
+CELL_BORDER = (52, 58, 64)
+CELL_LIGHT_GLOW = (22, 78, 58)
+OUTAGE_FILL_START = (100, 116, 139)
+OUTAGE_FILL_END = (148, 163, 184)
+OUTAGE_BORDER = (160, 174, 192)
+TEXT_MAIN = (250, 250, 250)
+TEXT_MUTED = (161, 161, 170)
+TEXT_DIM = (190, 195, 200)
+NOW_LINE = (52, 211, 153)
+BADGE_POSITIVE = (16, 80, 60)
+BADGE_NEGATIVE = (50, 55, 62)
+STAT_BG = (20, 22, 26)
+DIFF_POSITIVE = (110, 231, 183)
+DIFF_NEGATIVE = (253, 164, 175)
+EMPTY_BORDER = (140, 120, 70)
+EMPTY_BG = (50, 40, 15)
+EMPTY_TEXT = (254, 243, 199)
+
+DEFAULT_FONT_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/DejaVuSans.ttf",
+    "C:/Windows/Fonts/segoeui.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+)
+DEFAULT_BOLD_FONT_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/DejaVuSans-Bold.ttf",
+    "C:/Windows/Fonts/segoeuib.ttf",
+    "C:/Windows/Fonts/arialbd.ttf",
+)
+
+
+@dataclass(frozen=True)
+class SnakeSlot:
+    index: int
+    start_hour: float
+    fill_start_ratio: float
+    fill_ratio: float
+
+
+# ---------- підготовка даних ----------
+def _hour_of(value: dt.datetime, day: dt.date, tz: dt.tzinfo) -> float:
+    local = value.astimezone(tz)
+    if local.date() < day:
+        return 0.0
+    if local.date() > day:
+        return 24.0
+    return local.hour + local.minute / 60 + local.second / 3600
+
+
+def plan_segments(outages_info: dict[str, Any], tz: dt.tzinfo) -> list[tuple[float, float]]:
+    """Планові відключення дня у годинах [start, end), злиті та відсортовані."""
+    day = outages_info.get("date")
+    segments: list[tuple[float, float]] = []
+    for outage in outages_info.get("outages") or []:
+        start = _hour_of(outage["start"], day, tz)
+        end = _hour_of(outage["end"], day, tz)
+        if end <= start:
+            end = 24.0
+        segments.append((start, end))
+    return _merge(segments)
+
+
+def actual_segments(
+    rows: Iterable[dict[str, Any]],
+    day: dt.date,
+    tz: dt.tzinfo,
+    now_ts: float,
+) -> list[tuple[float, float]]:
+    """Фактичні відключення (рядки outages з start_ts/end_ts), обрізані межами дня."""
+    day_start = dt.datetime.combine(day, dt.time.min, tzinfo=tz).timestamp()
+    day_end = day_start + 24 * 3600
+    segments: list[tuple[float, float]] = []
+    for row in rows:
+        start_ts = float(row["start_ts"])
+        end_ts = float(row["end_ts"]) if row.get("end_ts") is not None else now_ts
+        start_ts, end_ts = max(start_ts, day_start), min(end_ts, day_end)
+        if end_ts <= start_ts:
+            continue
+        segments.append(((start_ts - day_start) / 3600, (end_ts - day_start) / 3600))
+    return _merge(segments)
+
+
+def _merge(segments: Sequence[tuple[float, float]]) -> list[tuple[float, float]]:
+    merged: list[tuple[float, float]] = []
+    for start, end in sorted(segments):
+        if merged and start <= merged[-1][1] + 1 / 60:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_snake_slots(segments: Sequence[tuple[float, float]]) -> list[SnakeSlot]:
+    slots: list[SnakeSlot] = []
+    for index in range(TOTAL_DAY_HOURS):
+        start_hour, end_hour = float(index), float(index + 1)
+        overlaps = [
+            (max(start, start_hour), min(end, end_hour))
+            for start, end in segments
+            if min(end, end_hour) > max(start, start_hour)
+        ]
+        if not overlaps:
+            slots.append(SnakeSlot(index, start_hour, 0.0, 0.0))
+            continue
+        coverage_start = min(s for s, _ in overlaps) - start_hour
+        coverage_end = max(e for _, e in overlaps) - start_hour
+        slots.append(SnakeSlot(index, start_hour, coverage_start, coverage_end - coverage_start))
+    return slots
+
+
+def _format_clock(hours: float) -> str:
+    total = round(abs(hours) * 60)
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def _format_units(hours: float) -> str:
+    total = round(abs(hours) * 60)
+    return f"{total // 60} год. {total % 60} хв."
+
+
+def _slot_label(slot: SnakeSlot) -> str:
+    if slot.fill_ratio <= 0:
+        hour = slot.start_hour
+    elif slot.fill_start_ratio < 0.001 and slot.fill_ratio < 1:
+        hour = slot.start_hour + slot.fill_ratio
+    else:
+        hour = slot.start_hour + slot.fill_start_ratio
+    return _format_clock(hour)
+
+
+# ---------- малювання ----------
+@functools.lru_cache(maxsize=16)
+def _load_font(size: int, bold: bool = False):
+    from PIL import ImageFont
+
+    override = os.getenv("TIMELINE_FONT_BOLD_PATH" if bold else "TIMELINE_FONT_PATH")
+    candidates = ((override,) if override else ()) + (DEFAULT_BOLD_FONT_PATHS if bold else DEFAULT_FONT_PATHS)
+    for candidate in candidates:
+        if candidate and Path(candidate).exists():
+            return ImageFont.truetype(candidate, size)
+    return ImageFont.load_default(size)
+
+
+def _mix(a: tuple[int, int, int], b: tuple[int, int, int], t: float) -> tuple[int, int, int]:
+    return tuple(round(x + (y - x) * t) for x, y in zip(a, b))  # type: ignore[return-value]
+
+
+def render_snake_timeline(
+    outages_info: dict[str, Any],
+    actual_rows: Iterable[dict[str, Any]],
+    scope: str,
+    tz: dt.tzinfo,
+    now: dt.datetime | None = None,
+    scale: float = 2.0,
+) -> bytes:
+    """
+    Повертає PNG із SnakeDayTimeline для дня з outages_info (результат YasnoOutages._day_outages).
+    """
+    from PIL import Image, ImageDraw
+
+    now = (now or dt.datetime.now(tz)).astimezone(tz)
+    day: dt.date = outages_info.get("date") or now.date()
+    status = outages_info.get("status")
+    is_today = day == now.date()
+    is_future = day > now.date()
+    is_emergency = status == "EmergencyShutdowns"
+
+    plan = plan_segments(outages_info, tz)
+    actual = actual_segments(actual_rows, day, tz, now.timestamp())
+    slots = build_snake_slots(plan)
+    now_hour = now.hour + now.minute / 60 + now.second / 3600 if is_today else None
+
+    planned_hours = sum(end - start for start, end in plan)
+    actual_hours = sum(end - start for start, end in actual)
+    elapsed_hours = now_hour if is_today else 24.0
+    outage_hours = min(actual_hours, elapsed_hours or 0.0)
+    light_hours = max(0.0, (elapsed_hours or 0.0) - outage_hours)
+    diff_hours = planned_hours - actual_hours
+    has_plan = bool(plan)
+    planned_now = now_hour is not None and any(start <= now_hour < end for start, end in plan)
+    tone = ("outage" if planned_now else "ok") if has_plan else "empty"
+
+    def px(value: float) -> int:
+        return round(value * scale)
+
+    width = BASE_WIDTH
+    pad = 20
+    row_height = 56
+    row_gap = 8
+    header_height = 84
+    summary_height = 88
+    legend_height = 28
+    rows_count = TOTAL_DAY_HOURS // SLOTS_PER_ROW
+    height = pad + header_height + 16 + summary_height + 16 + rows_count * (row_height + row_gap) + legend_height + pad
+
+    # тло з вертикальним градієнтом: стовпчик шириною 1 px, розтягнутий на всю ширину
+    gradient = Image.new("RGB", (1, px(height)))
+    gradient.putdata([_mix(BG_TOP[tone], BG_BOTTOM, y / px(height)) for y in range(px(height))])
+    image = gradient.resize((px(width), px(height)), Image.Resampling.NEAREST)
+    draw = ImageDraw.Draw(image)
+    draw.rounded_rectangle([0, 0, px(width) - 1, px(height) - 1], radius=px(16), outline=BORDER[tone], width=px(1))
+
+    font_xs = _load_font(px(11))
+    font_sm = _load_font(px(13))
+    font_sm_bold = _load_font(px(13), bold=True)
+    font_title = _load_font(px(24), bold=True)
+
+    # заголовок
+    context_label = "Сьогодні" if is_today else ("Завтра" if scope == "tomorrow" else WEEKDAY_NAMES_UA[day.weekday()])
+    y = pad
+    draw.text((px(pad), px(y)), context_label.upper(), font=font_xs, fill=TEXT_MUTED)
+    draw.text((px(pad), px(y + 16)), WEEKDAY_NAMES_UA[day.weekday()], font=font_title, fill=TEXT_MAIN)
+    draw.text((px(pad), px(y + 50)), day.strftime("%d.%m.%Y"), font=font_sm, fill=TEXT_DIM)
+    if is_today:
+        pill_text = f"ЗАРАЗ {now.strftime('%H:%M')}"
+        text_w = draw.textlength(pill_text, font=font_xs)
+        x1 = px(width - pad)
+        x0 = x1 - text_w - px(24)
+        draw.rounded_rectangle([x0, px(y), x1, px(y + 26)], radius=px(13), fill=BADGE_POSITIVE, outline=NOW_LINE, width=px(1))
+        draw.text((x0 + px(12), px(y + 6)), pill_text, font=font_xs, fill=(167, 243, 208))
+
+    # підсумок
+    y = pad + header_height + 16
+    box = [px(pad), px(y), px(width - pad), px(y + summary_height)]
+    if not has_plan and not is_emergency:
+        draw.rounded_rectangle(box, radius=px(14), fill=EMPTY_BG, outline=EMPTY_BORDER, width=px(1))
+        empty_text = f"{'На сьогодні' if scope == 'today' else 'На завтра'} графік відключень порожній."
+        draw.text((px(pad + 16), px(y + summary_height / 2 - 8)), empty_text, font=font_sm, fill=EMPTY_TEXT)
+    else:
+        draw.rounded_rectangle(box, radius=px(14), fill=(24, 28, 32), outline=(60, 64, 70), width=px(1))
+        bx = pad + 16
+        by = y + 14
+
+        def badge(label: str, value: str, positive: bool, x: float) -> float:
+            label_w = draw.textlength(label.upper(), font=font_xs)
+            value_w = draw.textlength(value, font=font_sm_bold)
+            w = (label_w + value_w) / scale + 32
+            draw.rounded_rectangle(
+                [px(x), px(by), px(x + w), px(by + 26)],
+                radius=px(13),
+                fill=BADGE_POSITIVE if positive else BADGE_NEGATIVE,
+                outline=(52, 211, 153) if positive else (90, 96, 104),
+                width=px(1),
+            )
+            draw.text((px(x + 12), px(by + 7)), label.upper(), font=font_xs, fill=TEXT_DIM)
+            draw.text((px(x + 20) + label_w, px(by + 5)), value, font=font_sm_bold, fill=TEXT_MAIN)
+            return x + w + 10
+
+        if is_future:
+            badge("Світло має бути", _format_units(max(0.0, 24 - min(24.0, planned_hours))), True, bx)
+        elif actual and (outage_hours > 0 or light_hours > 0):
+            next_x = badge("Світло було", _format_units(light_hours), True, bx)
+            badge("Світла не було", _format_units(min(24.0, outage_hours)), False, next_x)
+        else:
+            draw.text((px(bx), px(by + 6)), "Фактичні відключення ще не підтверджені.", font=font_xs, fill=TEXT_DIM)
+
+        sx = bx
+        sy = by + 38
+        diff_label = f"{'+' if diff_hours >= 0 else '-'}{_format_clock(diff_hours)}"
+        for label, value, color in (
+            ("План:", _format_clock(planned_hours), TEXT_MAIN),
+            ("Факт:", _format_clock(actual_hours), TEXT_MAIN),
+            ("Різниця:", diff_label, DIFF_POSITIVE if diff_hours >= 0 else DIFF_NEGATIVE),
+        ):
+            label_w = draw.textlength(label, font=font_xs)
+            value_w = draw.textlength(value, font=font_xs)
+            w = (label_w + value_w) / scale + 26
+            draw.rounded_rectangle([px(sx), px(sy), px(sx + w), px(sy + 24)], radius=px(6), fill=STAT_BG)
+            draw.text((px(sx + 10), px(sy + 6)), label, font=font_xs, fill=TEXT_MUTED)
+            draw.text((px(sx + 16) + label_w, px(sy + 6)), value, font=font_xs, fill=color)
+            sx += w + 8
+
+    # змійка з годинних комірок
+    y = pad + header_height + 16 + summary_height + 16
+    grid_left = pad
+    grid_width = width - 2 * pad
+    gap = 4
+    cell_width = (grid_width - gap * (SLOTS_PER_ROW - 1)) / SLOTS_PER_ROW
+    for row_index in range(rows_count):
+        row_y = y + row_index * (row_height + row_gap)
+        row_slots = slots[row_index * SLOTS_PER_ROW:(row_index + 1) * SLOTS_PER_ROW]
+        for col, slot in enumerate(row_slots):
+            cx = grid_left + col * (cell_width + gap)
+            cell = [px(cx), px(row_y), px(cx + cell_width), px(row_y + row_height)]
+            has_outage = slot.fill_ratio > 0
+            draw.rounded_rectangle(
+                cell,
+                radius=px(16),
+                fill=CELL_BG if has_outage else CELL_LIGHT_GLOW,
+                outline=CELL_BORDER,
+                width=px(1),
+            )
+            if has_outage:
+                fx0 = cx + cell_width * min(max(slot.fill_start_ratio, 0.0), 1.0)
+                fx1 = fx0 + cell_width * min(max(slot.fill_ratio, 0.0), 1.0)
+                fill_box = [px(fx0), px(row_y + 4), px(fx1), px(row_y + row_height - 4)]
+                if fill_box[2] - fill_box[0] >= 2:
+                    draw.rounded_rectangle(
+                        fill_box,
+                        radius=min(px(16), (fill_box[2] - fill_box[0]) // 2),
+                        fill=_mix(OUTAGE_FILL_START, OUTAGE_FILL_END, 0.5),
+                        outline=OUTAGE_BORDER,
+                        width=px(1),
+                    )
+            label = _slot_label(slot)
+            label_w = draw.textlength(label, font=font_sm_bold)
+            draw.text(
+                (px(cx + cell_width / 2) - label_w / 2, px(row_y + row_height / 2 - 8)),
+                label,
+                font=font_sm_bold,
+                fill=(225, 228, 232) if has_outage else TEXT_MAIN,
+            )
+        if now_hour is not None and row_index * SLOTS_PER_ROW <= now_hour < (row_index + 1) * SLOTS_PER_ROW:
+            nx = grid_left + grid_width * (now_hour - row_index * SLOTS_PER_ROW) / SLOTS_PER_ROW
+            draw.line([(px(nx), px(row_y - 6)), (px(nx), px(row_y + row_height + 6))], fill=NOW_LINE, width=max(1, px(1)))
+            draw.ellipse([px(nx - 4), px(row_y - 8), px(nx + 4), px(row_y)], fill=(110, 231, 183))
+
+    # легенда
+    ly = y + rows_count * (row_height + row_gap) + 4
+    lx = pad
+    for label, color, is_line in (
+        ("Планове відключення", OUTAGE_FILL_END, False),
+        ("Світло", (34, 197, 94), False),
+        ("Теперішній час", NOW_LINE, True),
+    ):
+        if is_line:
+            draw.line([(px(lx), px(ly + 9)), (px(lx + 18), px(ly + 9))], fill=color, width=px(2))
+            text_x = lx + 24
+        else:
+            draw.rounded_rectangle([px(lx), px(ly + 4), px(lx + 10), px(ly + 14)], radius=px(2), fill=color)
+            text_x = lx + 16
+        draw.text((px(text_x), px(ly + 3)), label, font=font_xs, fill=TEXT_DIM)
+        lx = text_x + draw.textlength(label, font=font_xs) / scale + 18
+
+    if is_emergency:
+        overlay = Image.new("RGB", image.size, (0, 0, 0))
+        image = Image.blend(image, overlay, 0.75)
+        draw = ImageDraw.Draw(image)
+        text = "ДІЮТЬ ЕКСТРЕННІ ВІДКЛЮЧЕННЯ"
+        text_w = draw.textlength(text, font=font_title)
+        draw.text(((image.width - text_w) / 2, image.height / 2 - px(14)), text, font=font_title, fill=TEXT_MAIN)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=3)
+    return buffer.getvalue()
@@ -0,0 +1,167 @@
+import asyncio
+import contextlib
+import json
+import logging
+import secrets
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+
+class Trace:
+    """
+    Один шлях події від виявлення до доставки. Етапи — спани з відносним
+    початком і тривалістю (мс від старту трасування); точкові позначки (mark)
+    приймають абсолютний час, тож можна почати відлік ще до створення трасування
+    (наприклад, з моменту останнього UDP-пакета).
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, started_ts: float, attrs: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.trace_id = secrets.token_hex(8)
+        self.name = name
+        self.started_ts = started_ts
+        self.attrs = attrs
+        self.spans: list[dict[str, Any]] = []
+        self.expected: set[str] = set()
+        self.finished = False
+
+    def _offset_ms(self, ts: float) -> float:
+        return round((ts - self.started_ts) * 1000, 2)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+        started = time.time()
+        span: dict[str, Any] = {"name": name, "start_ms": self._offset_ms(started)}
+        try:
+            yield attrs
+        except BaseException as error:
+            span["error"] = type(error).__name__
+            raise
+        finally:
+            span["duration_ms"] = round((time.time() - started) * 1000, 2)
+            if attrs:
+                span["attrs"] = attrs
+            self.spans.append(span)
+
+    def mark(self, name: str, ts: float | None = None, **attrs: Any) -> None:
+        span: dict[str, Any] = {"name": name, "start_ms": self._offset_ms(ts if ts is not None else time.time())}
+        if attrs:
+            span["attrs"] = attrs
+        self.spans.append(span)
+
+    def expect(self, name: str) -> None:
+        """Етап, що завершиться пізніше й деінде (див. Tracer.resolve); запис чекає на нього."""
+        self.expected.add(name)
+
+    def finish(self) -> None:
+        self.finished = True
+        self.tracer._maybe_write(self)
+
+    def to_record(self) -> dict[str, Any]:
+        spans = sorted(self.spans, key=lambda span: span["start_ms"])
+        end_ms = max((span["start_ms"] + span.get("duration_ms", 0.0) for span in spans), default=0.0)
+        record: dict[str, Any] = {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "ts": round(self.started_ts, 3),
+            "total_ms": round(end_ms - min((span["start_ms"] for span in spans), default=0.0), 2),
+            "spans": spans,
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if self.expected:
+            record["incomplete"] = sorted(self.expected)
+        return record
+
+
+class Tracer:
+    """
+    Легке трасування без зовнішніх залежностей: завершені трасування
+    дописуються у JSONL-файл (по одному запису на трасування) у фоновому потоці.
+    """
+
+    def __init__(self, path: Path | None, expect_timeout_sec: float = 120.0, max_open: int = 256) -> None:
+        self.path = path
+        self.expect_timeout_sec = expect_timeout_sec
+        self.max_open = max_open
+        self._open: dict[str, Trace] = {}
+        self._buffer: list[dict[str, Any]] = []
+        self._flush_task: asyncio.Task | None = None
+
+        # метрики
+        self.written_total = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start(self, name: str, started_ts: float | None = None, **attrs: Any) -> Trace:
+        trace = Trace(self, name, started_ts if started_ts is not None else time.time(), attrs)
+        if self.enabled:
+            self._open[trace.trace_id] = trace
+            self._expire_open()
+        return trace
+
+    def resolve(self, trace_id: str, name: str, ts: float | None = None, **attrs: Any) -> None:
+        """Закриває очікуваний етап трасування (наприклад, доставку у веб)."""
+        trace = self._open.get(trace_id)
+        if trace is None:
+            return
+        trace.mark(name, ts, **attrs)
+        trace.expected.discard(name)
+        self._maybe_write(trace)
+        self._expire_open()
+
+    async def stop(self) -> None:
+        for trace in list(self._open.values()):
+            self._write(trace)
+        if self._flush_task is not None:
+            with contextlib.suppress(Exception):
+                await self._flush_task
+        await self._flush()
+
+    # ---------- запис ----------
+    def _maybe_write(self, trace: Trace) -> None:
+        if not trace.finished or not self.enabled:
+            return
+        if not trace.expected:
+            self._write(trace)
+            return
+        # Очікуваний етап може так і не настати, а нових трасувань — не бути годинами:
+        # перевіряємо прострочені за таймером, не чекаючи наступного start()
+        with contextlib.suppress(RuntimeError):
+            asyncio.get_running_loop().call_later(self.expect_timeout_sec + 1.0, self._expire_open)
+
+    def _write(self, trace: Trace) -> None:
+        if self._open.pop(trace.trace_id, None) is None:
+            return
+        self._buffer.append(trace.to_record())
+        if self._flush_task is None or self._flush_task.done():
+            with contextlib.suppress(RuntimeError):
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    def _expire_open(self) -> None:
+        # Якщо очікуваний етап так і не настав (веб недоступний) — пишемо як є
+        deadline = time.time() - self.expect_timeout_sec
+        stale = [trace for trace in self._open.values() if trace.finished and trace.started_ts < deadline]
+        overflow = len(self._open) - len(stale) - self.max_open
+        if overflow > 0:
+            stale.extend(list(self._open.values())[:overflow])
+        for trace in stale:
+            self._write(trace)
+
+    async def _flush(self) -> None:
+        # Поки файл дописується, можуть з'явитися нові записи — забираємо і їх
+        while self._buffer and self.path is not None:
+            records, self._buffer = self._buffer, []
+            try:
+                await asyncio.to_thread(self._append, records)
+                self.written_total += len(records)
+            except OSError:
+                logging.exception("Не вдалося дописати трасування у %s", self.path)
+
+    def _append(self, records: list[dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
@@ -2,6 +2,9 @@ import socket
 import threading
 import time
 
+from clock import Clock
+from metrics import UDP_PACKET_GAP_SECONDS, UDP_PACKETS
+
 class UDPListener:
     """
     Простий клас для прийому UDP-пакетів від ESP32.
@@ -15,6 +18,8 @@ class UDPListener:
         self.running = False
         self.sock = None
         self.thread = None
+        # Джерело часу; у replay підміняється на віртуальний годинник
+        self.clock = Clock()
 
         # callback-функції, які можна під’єднати з іншого коду
         self.on_packet = None        # викликається при отриманні пакета
@@ -36,16 +41,23 @@ class UDPListener:
         while self.running:
             try:
                 data, addr = self.sock.recvfrom(self.buffer_size)
-                msg = data.decode("utf-8").strip()
-                self.last_packet_time = time.time()
-                if self.on_packet:
-                    self.on_packet(msg, addr)
-                else:
-                    print(f"[{time.strftime('%H:%M:%S')}] From {addr}: {msg}")
+                self.handle_packet(data.decode("utf-8").strip(), addr)
             except Exception as e:
                 print("[UDPListener] Error:", e)
                 time.sleep(0.5)
 
+    def handle_packet(self, msg, addr):
+        """Обробляє один пакет (з сокета або з запису під час replay)."""
+        now = self.clock.time()
+        if self.last_packet_time:
+            UDP_PACKET_GAP_SECONDS.observe(now - self.last_packet_time)
+        UDP_PACKETS.inc()
+        self.last_packet_time = now
+        if self.on_packet:
+            self.on_packet(msg, addr)
+        else:
+            print(f"[{time.strftime('%H:%M:%S')}] From {addr}: {msg}")
+
     def stop(self):
         """Акуратно зупиняє приймач."""
         self.running = False
@@ -60,7 +72,7 @@ class UDPListener:
         """Повертає кількість секунд з останнього пакета."""
         if self.last_packet_time == 0:
             return float("inf")
-        return time.time() - self.last_packet_time
+        return self.clock.time() - self.last_packet_time
 
 
 if __name__ == "__main__":
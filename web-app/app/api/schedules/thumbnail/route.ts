@@ -0,0 +1,37 @@
+import fs from "node:fs/promises";
+import path from "node:path";
+import { NextResponse } from "next/server";
+
+export const dynamic = "force-dynamic";
+
+/**
+ * WebP-мініатюра останнього скріншоту графіка, яку пише бот (див. _publish_thumbnail у bot.py).
+ * Використовується як картинка push-сповіщення про новий графік.
+ */
+const thumbnailDir = process.env.SVITLO_THUMBNAIL_DIR
+  ? path.resolve(process.env.SVITLO_THUMBNAIL_DIR)
+  : path.resolve(process.cwd(), "../data", "thumbnails");
+
+export async function GET(request: Request) {
+  const scope = new URL(request.url).searchParams.get("scope");
+  if (scope !== "today" && scope !== "tomorrow") {
+    return NextResponse.json({ error: "bad-scope" }, { status: 400 });
+  }
+
+  let body: Buffer;
+  try {
+    body = await fs.readFile(path.join(thumbnailDir, `${scope}.webp`));
+  } catch {
+    return NextResponse.json({ error: "not-found" }, { status: 404 });
+  }
+
+  return new NextResponse(new Uint8Array(body), {
+    status: 200,
+    headers: {
+      "Content-Type": "image/webp",
+      "Content-Length": String(body.length),
+      // Файл перезаписується при кожному новому графіку
+      "Cache-Control": "no-cache",
+    },
+  });
+}
@@ -9,6 +9,7 @@ import {
   type ActualOutageRow,
   type ScheduleRow,
 } from "@/lib/db";
+import { applyLiveStatus, readLiveStatus } from "@/lib/statusSnapshot";
 import { SectionNav } from "@/app/components/SectionNav";
 import { VoltageChartLazy } from "@/app/components/VoltageChartLazy";
 
@@ -35,10 +36,11 @@ export default async function Home({ searchParams }: HomePageProps) {
   const bypassCache = isBotRequest;
   const initialTab = resolvedSearchParams?.scope === "tomorrow" ? "tomorrow" : "today";
 
-  const [schedules, actualOutages] = await Promise.all([
+  const [schedules, cachedOutages] = await Promise.all([
     getSchedules({ bypassCache }),
     getActualOutages({ bypassCache }),
   ]);
+  const actualOutages = applyLiveStatus(cachedOutages, readLiveStatus());
 
   const chartWeeks = prepareWeeksForChart(schedules, actualOutages);
   const currentStatus = resolveCurrentStatus(actualOutages);
@@ -79,7 +81,7 @@ export default async function Home({ searchParams }: HomePageProps) {
 }
 
 export async function generateMetadata(): Promise<Metadata> {
-  const currentStatus = resolveCurrentStatus(await getActualOutages());
+  const currentStatus = resolveCurrentStatus(applyLiveStatus(await getActualOutages(), readLiveStatus()));
   const isLightOn = currentStatus.tone !== "warning";
 
   return {
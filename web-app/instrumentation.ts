@@ -0,0 +1,9 @@
+export async function register() {
+  if (process.env.NEXT_RUNTIME !== "nodejs") {
+    return;
+  }
+  const { isBotChannelConfigured, startBotChannel } = await import("./lib/botChannel");
+  if (isBotChannelConfigured()) {
+    startBotChannel();
+  }
+}
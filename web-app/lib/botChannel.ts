@@ -0,0 +1,113 @@
+import net from "node:net";
+import { dispatchNotifyPayload, type NotifyPayload } from "@/lib/notifyDispatch";
+import { getBotChannelSeq, setBotChannelSeq } from "@/lib/pushDb";
+
+/**
+ * Підписка на постійний канал подій бота (event_channel.py).
+ * Один раз підключаємось до Unix-сокета або TCP-порту, отримуємо NDJSON-події
+ * з порядковими номерами і після обриву відновлюємося з останнього seq.
+ * Останній оброблений seq зберігається в push_subs DB, тож рестарт Next.js
+ * не призводить до повторної розсилки вже оброблених подій.
+ */
+
+const SOCKET_PATH = process.env.BOT_EVENT_CHANNEL_SOCKET || "";
+const PORT = Number(process.env.BOT_EVENT_CHANNEL_PORT || 0);
+const HOST = process.env.BOT_EVENT_CHANNEL_HOST || "127.0.0.1";
+const TOKEN = process.env.NOTIFY_BOT_TOKEN || "";
+const MAX_RECONNECT_DELAY_MS = 30_000;
+
+type ChannelLine = NotifyPayload & { ping?: number; error?: string };
+
+let started = false;
+let lastSeq = 0;
+
+export function isBotChannelConfigured(): boolean {
+  return Boolean(TOKEN && (SOCKET_PATH || PORT));
+}
+
+export function startBotChannel() {
+  if (started || !isBotChannelConfigured()) {
+    return;
+  }
+  started = true;
+  try {
+    lastSeq = getBotChannelSeq();
+  } catch (error) {
+    console.error("bot channel: failed to load last seq", error);
+  }
+  connect(0);
+}
+
+function connect(attempt: number) {
+  const socket = SOCKET_PATH
+    ? net.createConnection({ path: SOCKET_PATH })
+    : net.createConnection({ host: HOST, port: PORT });
+  socket.setEncoding("utf8");
+
+  let buffer = "";
+  // Події обробляємо строго по черзі, щоб зберегти порядок seq
+  let chain: Promise<void> = Promise.resolve();
+
+  socket.on("connect", () => {
+    attempt = 0;
+    socket.write(JSON.stringify({ token: TOKEN, since: lastSeq }) + "\n");
+    console.log("bot channel connected, since", lastSeq);
+  });
+
+  socket.on("data", (chunk: string) => {
+    buffer += chunk;
+    let newlineIndex = buffer.indexOf("\n");
+    while (newlineIndex >= 0) {
+      const line = buffer.slice(0, newlineIndex).trim();
+      buffer = buffer.slice(newlineIndex + 1);
+      newlineIndex = buffer.indexOf("\n");
+      if (!line) continue;
+
+      let message: ChannelLine;
+      try {
+        message = JSON.parse(line) as ChannelLine;
+      } catch {
+        console.error("bot channel: bad line", line);
+        continue;
+      }
+      if (message.error) {
+        console.error("bot channel error", message.error);
+        socket.destroy();
+        return;
+      }
+      if (message.ping !== undefined) {
+        continue;
+      }
+      const seq = typeof message.seq === "number" ? message.seq : undefined;
+      if (seq !== undefined && seq <= lastSeq) {
+        continue;
+      }
+      chain = chain.then(async () => {
+        try {
+          await dispatchNotifyPayload(message, "bot-channel");
+        } catch (error) {
+          console.error("bot channel dispatch error", error);
+        }
+        if (seq !== undefined) {
+          lastSeq = seq;
+          try {
+            setBotChannelSeq(seq);
+          } catch (error) {
+            console.error("bot channel: failed to persist seq", error);
+          }
+        }
+      });
+    }
+  });
+
+  socket.on("error", (error) => {
+    console.error("bot channel socket error", error.message);
+  });
+
+  socket.on("close", () => {
+    const delay = Math.min(MAX_RECONNECT_DELAY_MS, 500 * 2 ** attempt);
+    setTimeout(() => {
+      void chain.finally(() => connect(attempt + 1));
+    }, delay);
+  });
+}
@@ -50,6 +50,10 @@ function ensureDb() {
       created_at INTEGER NOT NULL,
       updated_at INTEGER NOT NULL
     );
+    CREATE TABLE IF NOT EXISTS channel_state (
+      key TEXT PRIMARY KEY,
+      value INTEGER NOT NULL
+    );
   `);
   ensureMigrations(db);
   return db;
@@ -194,6 +198,24 @@ export function updatePreferencesForEndpoint(
   return merged;
 }
 
+export function getBotChannelSeq(): number {
+  const database = ensureDb();
+  const row = database
+    .prepare(`SELECT value FROM channel_state WHERE key = 'bot_channel_seq'`)
+    .get() as { value: number } | undefined;
+  return row ? Number(row.value) : 0;
+}
+
+export function setBotChannelSeq(seq: number) {
+  const database = ensureDb();
+  database
+    .prepare(
+      `INSERT INTO channel_state (key, value) VALUES ('bot_channel_seq', @seq)
+       ON CONFLICT(key) DO UPDATE SET value = excluded.value`
+    )
+    .run({ seq });
+}
+
 export type { StoredSubscription };
 
 
@@ -0,0 +1,110 @@
+import fs from "node:fs";
+import path from "node:path";
+import type { ActualOutageRow } from "@/lib/db";
+
+/**
+ * Читає live-стан живлення з memory-mapped файлу, який веде бот (status_snapshot.py).
+ * Формат — 48 байт little-endian, див. опис STATUS_STRUCT у status_snapshot.py.
+ */
+
+const statusPath = process.env.SVITLO_STATUS_PATH
+  ? path.resolve(process.env.SVITLO_STATUS_PATH)
+  : path.resolve(process.cwd(), "../data", "status.bin");
+
+const RECORD_SIZE = 48;
+const MAGIC = "SVLT";
+const LAYOUT_VERSION = 1;
+// Якщо бот не оновлював запис довше — вважаємо його неактуальним
+const MAX_STALENESS_SECONDS = 15;
+const SEQ_OFFSET = 8;
+const READ_RETRIES = 5;
+
+type LiveStatus = {
+  powerOn: boolean | null;
+  sinceTs: number;
+  lastPacketTs: number;
+  updatedTs: number;
+  scheduleVersion: number;
+};
+
+/**
+ * Узгоджена копія запису (seqlock, як read_status_snapshot у status_snapshot.py):
+ * лічильник до копіювання має бути парним і збігатися з перечитаним після нього,
+ * інакше бот писав запис посеред читання — пробуємо ще раз.
+ */
+function readConsistentRecord(): Buffer | null {
+  let fd: number;
+  try {
+    fd = fs.openSync(statusPath, "r");
+  } catch {
+    return null;
+  }
+  try {
+    const seqAfter = Buffer.alloc(4);
+    for (let attempt = 0; attempt < READ_RETRIES; attempt++) {
+      const buffer = Buffer.alloc(RECORD_SIZE);
+      if (fs.readSync(fd, buffer, 0, RECORD_SIZE, 0) < RECORD_SIZE) {
+        return null;
+      }
+      if (buffer.toString("ascii", 0, 4) !== MAGIC || buffer.readUInt16LE(4) !== LAYOUT_VERSION) {
+        return null;
+      }
+      if (fs.readSync(fd, seqAfter, 0, 4, SEQ_OFFSET) < 4) {
+        return null;
+      }
+      const seq = buffer.readUInt32LE(SEQ_OFFSET);
+      if (seq % 2 === 0 && seq === seqAfter.readUInt32LE(0)) {
+        return buffer;
+      }
+    }
+    return null;
+  } catch {
+    return null;
+  } finally {
+    fs.closeSync(fd);
+  }
+}
+
+export function readLiveStatus(): LiveStatus | null {
+  const buffer = readConsistentRecord();
+  if (!buffer) {
+    return null;
+  }
+
+  const state = buffer.readUInt8(12);
+  const updatedTs = buffer.readDoubleLE(32);
+  if (Date.now() / 1000 - updatedTs > MAX_STALENESS_SECONDS) {
+    return null;
+  }
+
+  return {
+    powerOn: state === 1 ? true : state === 2 ? false : null,
+    sinceTs: buffer.readDoubleLE(16),
+    lastPacketTs: buffer.readDoubleLE(24),
+    updatedTs,
+    scheduleVersion: buffer.readUInt32LE(40),
+  };
+}
+
+/**
+ * Узгоджує (можливо закешовані) рядки outages з live-станом бота,
+ * щоб відповідь «чи є світло зараз» не чекала на інвалідацію кешу.
+ */
+export function applyLiveStatus(rows: ActualOutageRow[], live: LiveStatus | null): ActualOutageRow[] {
+  if (!live || live.powerOn === null || !live.sinceTs) {
+    return rows;
+  }
+  const activeIndex = rows.findIndex((row) => row.end_ts == null);
+
+  if (!live.powerOn && activeIndex < 0) {
+    return [...rows, { start_ts: live.sinceTs, end_ts: null }];
+  }
+  if (live.powerOn && activeIndex >= 0) {
+    const patched = [...rows];
+    patched[activeIndex] = { ...patched[activeIndex], end_ts: live.sinceTs };
+    return patched;
+  }
+  return rows;
+}
+
+export type { LiveStatus };
@@ -100,6 +100,7 @@ function buildNotification(payload) {
       body,
       icon: '/icons/icon-192.png',
       badge: isPowerEvent ? icon : undefined,
+      image: typeof data.image === 'string' ? data.image : undefined,
       data,
       tag,
       renotify: Boolean(tag),
@@ -0,0 +1,230 @@
+import asyncio
+import http.client
+import json
+import logging
+import time
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+from storage import Database
+
+
+class WebOutboxWorker:
+    """
+    Доставляє події з SQLite-outbox у веб-додаток (/api/notify).
+
+    Події відправляються строго по черзі (за id), через одне постійне
+    keep-alive з'єднання. Якщо веб-додаток недоступний — подія лишається
+    в черзі й повторюється з експоненційною затримкою, наступні чекають.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        url: str,
+        token: str,
+        timeout: float = 2.5,
+        base_backoff_sec: float = 1.0,
+        max_backoff_sec: float = 300.0,
+        max_age_sec: float = 6 * 3600,
+        retention_sec: float = 24 * 3600,
+    ) -> None:
+        self.db = database
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+        self.base_backoff_sec = base_backoff_sec
+        self.max_backoff_sec = max_backoff_sec
+        # Події старші за max_age_sec вже не мають сенсу для push (відкидаємо)
+        self.max_age_sec = max_age_sec
+        # Скільки зберігати доставлені події (для діагностики)
+        self.retention_sec = retention_sec
+
+        parts = urlsplit(url)
+        self._scheme = parts.scheme or "http"
+        self._host = parts.hostname or "127.0.0.1"
+        self._port = parts.port
+        self._path = parts.path or "/"
+        if parts.query:
+            self._path += "?" + parts.query
+
+        self._conn: http.client.HTTPConnection | None = None
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._last_prune_ts = 0.0
+        # Викликається з (payload, delivered_ts) після успішної доставки події
+        self.on_delivered: Callable[[dict[str, Any], float], None] | None = None
+
+        # метрики
+        self.delivered_total = 0
+        self.failed_attempts_total = 0
+        self.dropped_total = 0
+        self.last_delivery_latency_sec: float | None = None
+        self.max_delivery_latency_sec = 0.0
+        self._latency_sum_sec = 0.0
+
+    # ---------- керування ----------
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._close_connection()
+
+    def wake(self) -> None:
+        """Будить воркер після додавання нової події в outbox."""
+        self._wakeup.set()
+
+    async def stats(self) -> dict[str, Any]:
+        backlog = await self.db.get_web_outbox_stats()
+        oldest = backlog.get("oldest_created_at")
+        avg_latency = self._latency_sum_sec / self.delivered_total if self.delivered_total else None
+        return {
+            "backlog": backlog["pending"],
+            "backlog_oldest_age_sec": (time.time() - oldest) if oldest else 0.0,
+            "dropped_stored": backlog["dropped"],
+            "delivered_total": self.delivered_total,
+            "failed_attempts_total": self.failed_attempts_total,
+            "dropped_total": self.dropped_total,
+            "last_delivery_latency_sec": self.last_delivery_latency_sec,
+            "avg_delivery_latency_sec": avg_latency,
+            "max_delivery_latency_sec": self.max_delivery_latency_sec,
+        }
+
+    # ---------- цикл доставки ----------
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Скидаємо до _drain: wake() під час доставки не загубиться, а лише повторить цикл
+                self._wakeup.clear()
+                delay = await self._drain()
+                await self._maybe_prune()
+                with_timeout = delay if delay is not None else 60.0
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=with_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("Web outbox worker error")
+                await asyncio.sleep(5.0)
+
+    async def _drain(self) -> float | None:
+        """
+        Відправляє всі готові події по черзі.
+        Повертає через скільки секунд варто спробувати знову (або None, якщо черга порожня).
+        """
+        while True:
+            events = await self.db.get_pending_web_events(limit=20)
+            if not events:
+                return None
+            for event in events:
+                now = time.time()
+                if now - float(event["created_at"]) > self.max_age_sec:
+                    self.dropped_total += 1
+                    await self.db.drop_web_event(event["id"], "expired")
+                    logging.warning("Web outbox: подію #%s відкинуто як застарілу", event["id"])
+                    continue
+                wait = float(event["next_attempt_at"]) - now
+                if wait > 0:
+                    # Порядок важливий: поки голова черги чекає — решта теж чекає
+                    return wait
+
+                ok, permanent, error = await asyncio.to_thread(self._post, event["id"], event["payload"])
+                if ok:
+                    delivered_ts = time.time()
+                    await self.db.mark_web_event_delivered(event["id"], delivered_ts)
+                    self._record_latency(delivered_ts - float(event["created_at"]))
+                    if self.on_delivered is not None:
+                        self.on_delivered(event["payload"], delivered_ts)
+                    continue
+                if permanent:
+                    self.dropped_total += 1
+                    await self.db.drop_web_event(event["id"], error)
+                    logging.error("Web outbox: подію #%s відкинуто: %s", event["id"], error)
+                    continue
+
+                self.failed_attempts_total += 1
+                backoff = min(self.max_backoff_sec, self.base_backoff_sec * (2 ** int(event["attempts"])))
+                await self.db.mark_web_event_retry(event["id"], error, time.time() + backoff)
+                logging.info(
+                    "Web outbox: подія #%s не доставлена (%s), повтор через %.1f с",
+                    event["id"],
+                    error,
+                    backoff,
+                )
+                return backoff
+
+    async def _maybe_prune(self) -> None:
+        now = time.time()
+        if now - self._last_prune_ts < 3600:
+            return
+        self._last_prune_ts = now
+        removed = await self.db.prune_web_outbox(now - self.retention_sec)
+        if removed:
+            logging.info("Web outbox: видалено %s старих подій", removed)
+
+    def _record_latency(self, latency: float) -> None:
+        latency = max(0.0, latency)
+        self.delivered_total += 1
+        self.last_delivery_latency_sec = latency
+        self.max_delivery_latency_sec = max(self.max_delivery_latency_sec, latency)
+        self._latency_sum_sec += latency
+
+    # ---------- HTTP (виконується в окремому потоці) ----------
+    def _get_connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            if self._scheme == "https":
+                self._conn = http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout)
+            else:
+                self._conn = http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+        return self._conn
+
+    def _close_connection(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _post(self, event_id: int, payload: dict[str, Any]) -> tuple[bool, bool, str]:
+        """
+        Повертає (успіх, безповоротна_помилка, текст_помилки).
+        """
+        body = json.dumps({**payload, "seq": event_id}).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "x-bot-token": self.token,
+            "Connection": "keep-alive",
+        }
+        # Одна повторна спроба на випадок, якщо сервер закрив keep-alive з'єднання
+        for attempt in range(2):
+            conn = self._get_connection()
+            try:
+                conn.request("POST", self._path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+            except (http.client.HTTPException, OSError) as error:
+                self._close_connection()
+                if attempt == 0 and isinstance(error, (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)):
+                    continue
+                return False, False, f"{type(error).__name__}: {error}"
+
+            if response.will_close:
+                self._close_connection()
+            if 200 <= response.status < 300:
+                return True, False, ""
+            error_text = f"HTTP {response.status}"
+            # 4xx (крім 408/429) — повтор нічого не змінить
+            permanent = 400 <= response.status < 500 and response.status not in (408, 429)
+            return False, permanent, error_text
+        return False, False, "connection closed"
@@ -0,0 +1,90 @@
+import asyncio
+import contextlib
+import logging
+import signal
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """
+    Обмежує кількість оновлень, що обробляються одночасно. У webhook-режимі
+    aiogram обробляє кожен запит у фоні, тож без ліміту сплеск оновлень
+    запускає необмежену кількість хендлерів.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._semaphore = asyncio.Semaphore(limit)
+        self.limit = limit
+        self.in_flight = 0
+        self.waited_total = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if self._semaphore.locked():
+            self.waited_total += 1
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                return await handler(event, data)
+            finally:
+                self.in_flight -= 1
+
+
+async def run_webhook(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    *,
+    public_url: str,
+    path: str,
+    host: str,
+    port: int,
+    secret: str | None,
+    max_connections: int,
+    allowed_updates: list[str],
+) -> None:
+    """
+    Запускає диспетчер за локальним HTTP-ендпоінтом (TLS і балансування — на проксі).
+    Вебхук реєструється в Telegram на старті; при зупинці не знімається, щоб інші
+    воркери за тим самим проксі продовжували отримувати оновлення.
+    """
+
+    async def _register_webhook(bot: Bot) -> None:
+        await bot.set_webhook(
+            public_url,
+            secret_token=secret or None,
+            max_connections=max_connections,
+            allowed_updates=allowed_updates,
+        )
+        logging.info("Webhook registered: %s", public_url)
+
+    dispatcher.startup.register(_register_webhook)
+
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dispatcher, bot=bot, secret_token=secret or None).register(app, path=path)
+    setup_application(app, dispatcher, bot=bot)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logging.info("Webhook server listening on http://%s:%s%s", host, port, path)
+
+    # Як і start_polling, коректно зупиняємось по SIGTERM/SIGINT (на Windows — лише Ctrl+C)
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop_event.set)
+    try:
+        await stop_event.wait()
+    finally:
+        await runner.cleanup()
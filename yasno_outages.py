@@ -1,10 +1,18 @@
 from __future__ import annotations
 import datetime as dt
-from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
-import requests
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional, Sequence
 from zoneinfo import ZoneInfo
 
+from circuit_breaker import STATE_OPEN, CircuitBreaker, CircuitOpenError
+from clock import Clock
+from metrics import UPSTREAM_CIRCUIT_OPEN, UPSTREAM_FETCH_ERRORS, UPSTREAM_FETCH_SECONDS, UPSTREAM_STALE_SERVED
+from schedule_slot import Slot
+
+if TYPE_CHECKING:
+    import requests
+
 SCHEDULE_URL = "https://svitlo4u.online"
 
 
@@ -12,38 +20,38 @@ def schedule_link(label: str) -> str:
     return f'<a href="{SCHEDULE_URL}">{label}</a>'
 
 
-@dataclass(frozen=True)
-class Slot:
-    start_min: int
-    end_min: int     # невключно
-    type: str        # "Definite", "Possible", "NotPlanned", ...
-
-    def as_time_range(self, date: dt.date, tz: ZoneInfo) -> tuple[dt.datetime, dt.datetime]:
-        start = dt.datetime.combine(date, dt.time.min, tzinfo=tz) + dt.timedelta(minutes=self.start_min)
-        end = dt.datetime.combine(date, dt.time.min, tzinfo=tz) + dt.timedelta(minutes=self.end_min)
-        return start, end
-
-    @property
-    def is_outage(self) -> bool:
-        return self.type != "NotPlanned"
-
-
 class YasnoOutages:
     """
     Працюємо з плановими <a href="https://svitlo4u.online">графіками</a> ТІЛЬКИ коли day.status == 'ScheduleApplies'.
     Все інше (WaitingForSchedule, тощо) — ігноруємо як відсутній <a href="https://svitlo4u.online">графік</a>.
     """
 
-    def __init__(self, region_id: int, dso_id: int, group_id: str, tz_name: str = "Europe/Kyiv"):
+    def __init__(self, region_id: int, dso_id: int, group_id: str, tz_name: str = "Europe/Kyiv",
+                 api_base: str = "https://app.yasno.ua", fresh_sec: float = 60.0,
+                 breaker: Optional[CircuitBreaker] = None):
         self.region_id = region_id
         self.dso_id = dso_id
         self.group_id = group_id
         self.tz = ZoneInfo(tz_name)
         self.base_url = (
-            f"https://app.yasno.ua/api/blackout-service/public/shutdowns/regions/"
+            f"{api_base}/api/blackout-service/public/shutdowns/regions/"
             f"{self.region_id}/dsos/{self.dso_id}/planned-outages"
         )
-        self._session = requests.Session()
+        # requests (~60 мс імпорту) і сесія створюються при першому запиті, а не на старті бота
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        self.clock = Clock()
+        # Після кількох помилок поспіль запити відхиляються одразу, без 15-секундного таймауту
+        self.breaker = breaker or CircuitBreaker(clock=self.clock)
+        # Остання успішна відповідь і її час: fetch_cached віддає її одразу, а старшу
+        # за fresh_sec оновлює у фоні (stale-while-revalidate)
+        self.fresh_sec = fresh_sec
+        self._last_good: Optional[tuple[Dict[str, Any], float]] = None
+        self._refresh: Optional[Future] = None
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        # Викликається з (data, None) після успішного запиту або (None, error) після помилки
+        self.on_fetch: Optional[Callable[[Optional[Dict[str, Any]], Optional[BaseException]], None]] = None
         # Допуск раннього старту планового відключення
         self.early_start_grace_minutes = 45
         # Скільки часу після планового старту ще показувати повідомлення «мало відбутися»
@@ -53,9 +61,87 @@ class YasnoOutages:
 
     # ---------- HTTP ----------
     def fetch(self) -> Dict[str, Any]:
-        r = self._session.get(self.base_url, timeout=15)
-        r.raise_for_status()
-        return r.json()
+        """Запит до Yasno через запобіжник; при відкритому ланцюгу — одразу CircuitOpenError."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Yasno недоступний, запити тимчасово призупинено")
+        try:
+            with UPSTREAM_FETCH_SECONDS.time(source="yasno"):
+                r = self._get_session().get(self.base_url, timeout=15)
+                r.raise_for_status()
+                data = r.json()
+        except Exception as error:
+            UPSTREAM_FETCH_ERRORS.inc(source="yasno")
+            self.breaker.record_failure()
+            UPSTREAM_CIRCUIT_OPEN.set(1 if self.breaker.state == STATE_OPEN else 0, source="yasno")
+            if self.on_fetch is not None:
+                self.on_fetch(None, error)
+            raise
+        self.breaker.record_success()
+        UPSTREAM_CIRCUIT_OPEN.set(0, source="yasno")
+        self._last_good = (data, self.clock.time())
+        if self.on_fetch is not None:
+            self.on_fetch(data, None)
+        return data
+
+    def fetch_cached(self, max_wait_sec: float = 3.0) -> tuple[Dict[str, Any], float]:
+        """
+        Повертає (дані, вік у секундах) без очікування на мережу, якщо є хоч одна успішна
+        відповідь; застарілу (старшу за fresh_sec) паралельно оновлює у фоні.
+        Без жодної відповіді чекає на запит не довше max_wait_sec, далі — TimeoutError
+        (або CircuitOpenError, якщо апстрім уже визнано недоступним).
+        """
+        snapshot = self._last_good
+        if snapshot is not None:
+            data, fetched_ts = snapshot
+            age = max(0.0, self.clock.time() - fetched_ts)
+            if age > self.fresh_sec:
+                UPSTREAM_STALE_SERVED.inc(source="yasno")
+                self._refresh_in_background()
+            return data, age
+        data = self._refresh_in_background().result(timeout=max_wait_sec)
+        return data, 0.0
+
+    def _refresh_in_background(self) -> Future:
+        # Один фоновий запит на всіх: поки він триває, нові виклики чекають на нього ж
+        with self._refresh_lock:
+            if self._refresh is None or self._refresh.done():
+                if self._refresh_executor is None:
+                    self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yasno-refresh")
+                # Помилки фонового оновлення рахує fetch() (метрики, запобіжник); тут їх не чекає ніхто
+                self._refresh = self._refresh_executor.submit(self.fetch)
+            return self._refresh
+
+    def snapshot_from_schedules(self, days: Sequence[Dict[str, Any]], today: dt.date) -> Optional[Dict[str, Any]]:
+        """
+        Будує відповідь у форматі Yasno зі збережених днів (Database.get_schedules) —
+        запасний варіант, коли апстрім недоступний, а в пам'яті ще немає жодної відповіді.
+        """
+        by_date = {day["date"]: day for day in days}
+        group: Dict[str, Any] = {}
+        for key, day_date in (("today", today), ("tomorrow", today + dt.timedelta(days=1))):
+            day = by_date.get(day_date)
+            if day is None:
+                continue
+            group[key] = {
+                "date": day_date.isoformat(),
+                "status": day["status"],
+                "slots": [{"start": slot.start_min, "end": slot.end_min, "type": slot.type} for slot in day["raw_slots"]],
+            }
+        return {self.group_id: group} if group else None
+
+    def snapshot_date(self, data: Dict[str, Any]) -> Optional[dt.date]:
+        """Дата блоку «сьогодні» у відповіді Yasno (None, якщо її там немає)."""
+        date_str = data.get(self.group_id, {}).get("today", {}).get("date")
+        return dt.datetime.fromisoformat(date_str).date() if date_str else None
+
+    def _get_session(self) -> requests.Session:
+        # fetch() викликається з кількох потоків to_thread одночасно
+        with self._session_lock:
+            if self._session is None:
+                import requests
+
+                self._session = requests.Session()
+            return self._session
 
     # ---------- helpers ----------
     @staticmethod
@@ -77,16 +163,30 @@ class YasnoOutages:
         day_date = dt.datetime.fromisoformat(date_str).date() if date_str else dt.date.today()
 
         slots = self._parse_slots(day_block)
-        outages = []
-
-        if status == "ScheduleApplies":
-            for slot in slots:
-                if slot.is_outage:
-                    start_dt, end_dt = slot.as_time_range(day_date, self.tz)
-                    outages.append({"start": start_dt, "end": end_dt, "type": slot.type})
+        outages = self._slots_to_outages(slots, day_date) if status == "ScheduleApplies" else []
 
         return {"date": day_date, "status": status, "outages": outages, "raw_slots": slots}
 
+    def _slots_to_outages(self, slots: List[Slot], day_date: dt.date) -> List[Dict[str, Any]]:
+        outages = []
+        for slot in slots:
+            if slot.is_outage:
+                start_dt, end_dt = slot.as_time_range(day_date, self.tz)
+                outages.append({"start": start_dt, "end": end_dt, "type": slot.type})
+        return outages
+
+    def as_applied(self, outages_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Копія результату _day_outages так, ніби графік уже діє (status='ScheduleApplies').
+        Потрібно для попереднього рендеру, поки YASNO ще тримає день у WaitingForSchedule.
+        """
+        slots = outages_info.get("raw_slots") or []
+        return {
+            **outages_info,
+            "status": "ScheduleApplies",
+            "outages": self._slots_to_outages(slots, outages_info["date"]),
+        }
+
     # ---------- 1) Сьогодні ----------
     def get_today_outages(self, data_override: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         data = data_override if data_override else self.fetch()